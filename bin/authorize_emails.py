@@ -0,0 +1,23 @@
+import argparse
+
+from springapi.models.backends import EMAIL, use_backend
+from springapi.models.email import Email
+from springapi.models.sqlite import db
+
+
+def authorize_emails():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "database_filepath", help="Path to the SQLite database file")
+    parser.add_argument(
+        "emails", nargs="+", help="Email addresses to authorize")
+    parsed = parser.parse_args()
+
+    db.init_db(parsed.database_filepath)
+    use_backend(EMAIL, "sqlite")
+    return Email.authorize_emails(parsed.emails)
+
+
+if __name__ == "__main__":
+    added = authorize_emails()
+    print(f"{len(added)} emails authorized")
@@ -0,0 +1,23 @@
+import argparse
+import os
+
+from springapi.config_helpers import TOKEN, create_database_instance
+from springapi.models.token import TOKENS_PER_EMAIL, Token
+
+
+def compact_tokens():
+    parser = argparse.ArgumentParser(
+        description="Uses the backend selected by the TOKEN URI")
+    parser.add_argument(
+        "--keep", type=int, default=TOKENS_PER_EMAIL,
+        help="Number of unexpired tokens to keep per email")
+    parsed = parser.parse_args()
+
+    create_database_instance(os.environ, TOKEN)
+    return Token.compact_tokens(keep_per_email=parsed.keep)
+
+
+if __name__ == "__main__":
+    deleted = compact_tokens()
+    print(f"{deleted['expired']} expired and {deleted['superseded']} "
+          f"superseded tokens, and {deleted['revoked']} revocations deleted")
@@ -0,0 +1,20 @@
+import argparse
+import os
+
+from springapi.config_helpers import TOKEN, create_database_instance
+from springapi.models.token import Token
+
+
+def migrate_tokens():
+    parser = argparse.ArgumentParser(
+        description="Uses the backend selected by the TOKEN URI")
+    parser.parse_args()
+
+    create_database_instance(os.environ, TOKEN)
+    return Token.migrate_token_ids()
+
+
+if __name__ == "__main__":
+    migrated = migrate_tokens()
+    for collection, count in migrated.items():
+        print(f"{collection}: {count} migrated")
@@ -0,0 +1,20 @@
+import argparse
+import os
+
+from springapi.config_helpers import TOKEN, create_database_instance
+from springapi.utils.authorization import revoke_api_token
+
+
+def revoke_token():
+    parser = argparse.ArgumentParser(
+        description="Uses the backend selected by the TOKEN URI")
+    parser.add_argument("token", help="API token to revoke")
+    parsed = parser.parse_args()
+
+    create_database_instance(os.environ, TOKEN)
+    return revoke_api_token(parsed.token)
+
+
+if __name__ == "__main__":
+    revoked = revoke_token().to_json()
+    print(f"Token revoked until {revoked['expires']}")
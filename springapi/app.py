@@ -3,13 +3,21 @@ import os
 from flask import Flask
 
 from springapi.config_helpers import (
-    SUBMISSION, TOKEN, create_config, create_database_instance)
+    EMAIL, FIRESTORE_DEADLINE, FIRESTORE_MAX_CONCURRENCY,
+    FIRESTORE_QUEUE_TIMEOUT, HTTP_POOL_SIZE, HTTP_TIMEOUT, SUBMISSION,
+    SUBMISSION_VIEW, TOKEN, create_config, create_database_instance)
+from springapi.helpers import decode_json_uri
+from springapi.models.firebase.breaker import configure_breaker
+from springapi.models.firebase.retry import configure_retry
+from springapi.models.submission import Submission
 from springapi.routes.authorization import (
     request_auth_code, request_exchange_token)
 from springapi.routes.healthcheck import healthcheck
 from springapi.routes.helpers import register
 from springapi.routes.submissions import (
-    get_all, get_single, create_single, update_single)
+    get_all, get_single, create_single, create_batch, update_single,
+    update_batch, patch_single)
+from springapi.utils.http import configure_session
 
 
 def create_app(config):
@@ -22,19 +30,49 @@ def create_app(config):
     register(app, get_all)
     register(app, get_single)
     register(app, create_single)
+    register(app, create_batch)
     register(app, update_single)
+    register(app, update_batch)
+    register(app, patch_single)
     register(app, request_auth_code)
     register(app, request_exchange_token)
 
     create_database_instance(config, TOKEN, app)
+    if decode_json_uri(config[SUBMISSION])[0] != "firebase":
+        # Firestore is set up by main(), so that an app can be created
+        # without credentials.
+        create_database_instance(config, SUBMISSION, app)
+    if EMAIL in config:
+        create_database_instance(config, EMAIL, app)
+    configure_session(
+        pool_size=config[HTTP_POOL_SIZE], timeout=config[HTTP_TIMEOUT])
+    configure_retry(deadline=config[FIRESTORE_DEADLINE])
+    configure_breaker(
+        max_concurrency=config[FIRESTORE_MAX_CONCURRENCY],
+        queue_timeout=config[FIRESTORE_QUEUE_TIMEOUT])
 
     return app
 
 
-def main(environ):
+def create_app_from_environ(environ):
+    """
+    Creates the app from `environ`, along with what create_app leaves to the
+    serving process: Firestore credentials and the snapshot view.
+
+    :param environ: dict, environment variables
+    :return: obj <flask.Flask>
+    """
     config = create_config(environ)
     app = create_app(config)
-    create_database_instance(environ, SUBMISSION)
+    if decode_json_uri(config[SUBMISSION])[0] == "firebase":
+        create_database_instance(config, SUBMISSION, app)
+    if config[SUBMISSION_VIEW]:
+        Submission.start_view()
+    return app
+
+
+def main(environ):
+    app = create_app_from_environ(environ)
     app.run(host='0.0.0.0', port=5000)
 
 
@@ -0,0 +1,239 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+
+from werkzeug.http import quote_etag
+from werkzeug.wrappers import Request
+
+from springapi.app import create_app_from_environ
+from springapi.config_helpers import VERSION
+from springapi.exceptions import InvalidAuthorization
+from springapi.helpers import run_in_executor
+from springapi.models.firebase.retry import request_deadline
+from springapi.models.submission import Submission
+from springapi.routes.healthcheck import healthcheck
+from springapi.routes.helpers import (
+    bearer_token, is_valid_admin_token, version_etag)
+from springapi.routes.submissions import NDJSON
+
+
+HEALTHCHECK = f"/api/{VERSION}/healthcheck"
+SUBMISSIONS = f"/api/{VERSION}/submissions"
+# Reads of GET /submissions which the Flask routes serve.
+FLASK_ONLY_ARGS = ("ids", "limit", "cursor", "stream")
+
+
+def _json_response(body, code=200, headers=None):
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    return code, list(headers.items()), json.dumps(body).encode("utf8")
+
+
+def _error_response(err):
+    logging.exception("Error running route")
+    if hasattr(err, "error_response_body_and_code"):
+        return _json_response(*err.error_response_body_and_code())
+    return _json_response({"error": "Unexpected server error"}, 500)
+
+
+def _conditional_response(request, body, etag=None):
+    """
+    As <springapi.routes.helpers.conditional_response>, answering with 304
+    if If-None-Match matches the ETag.
+    """
+    code, headers, data = _json_response(body)
+    etag = etag or hashlib.sha256(data).hexdigest()
+    if etag in request.if_none_match:
+        return 304, [("ETag", quote_etag(etag))], b""
+    return code, headers + [("ETag", quote_etag(etag))], data
+
+
+async def _require_admin(config, request):
+    token = bearer_token(request.headers)
+    # Stored tokens may be looked up in the backend, which blocks.
+    if not await run_in_executor(is_valid_admin_token, config, token):
+        raise InvalidAuthorization()
+
+
+async def _healthcheck(config, request):
+    return _json_response(*healthcheck(config))
+
+
+async def _get_all(config, request):
+    await _require_admin(config, request)
+    filters = Submission.parse_filters(request.args)
+    projection = Submission.parse_projection(request.args.get("fields"))
+    etag = version_etag(Submission.get_view_version(), request.full_path)
+    if etag is not None and etag in request.if_none_match:
+        return 304, [("ETag", quote_etag(etag))], b""
+    submissions = await Submission.get_submissions_async(filters, projection)
+    submissions = [s.to_json() for s in submissions]
+    return _conditional_response(request, {"submissions": submissions}, etag)
+
+
+async def _get_single(config, request, entry_id):
+    await _require_admin(config, request)
+    projection = Submission.parse_projection(request.args.get("fields"))
+    etag = version_etag(Submission.get_view_version(), request.full_path)
+    if etag is not None and etag in request.if_none_match:
+        return 304, [("ETag", quote_etag(etag))], b""
+    try:
+        submission = await Submission.get_submission_async(
+            entry_id, projection)
+    except ValueError as err:
+        return _json_response(
+            {"error": f"{entry_id} contains data which has failed "
+                      f"validation - {err}"}, 400)
+    return _conditional_response(request, submission.to_json(), etag)
+
+
+def _async_route(request):
+    """
+    Returns the coroutine function serving `request` on the event loop and
+    its arguments, or None if the Flask app serves it.
+    """
+    if request.method != "GET":
+        return None
+    if request.path == HEALTHCHECK:
+        return _healthcheck, {}
+    if request.path == SUBMISSIONS:
+        if any(a in request.args for a in FLASK_ONLY_ARGS) or \
+                request.accept_mimetypes.best_match(
+                    ["application/json", NDJSON]) == NDJSON:
+            return None
+        return _get_all, {}
+    entry_id = request.path[len(SUBMISSIONS) + 1:]
+    if request.path.startswith(f"{SUBMISSIONS}/") and entry_id and \
+            "/" not in entry_id:
+        return _get_single, {"entry_id": entry_id}
+    return None
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key == "CONTENT_LENGTH":
+            continue
+        if key != "CONTENT_TYPE":
+            key = f"HTTP_{key}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+async def _send_wsgi(wsgi_app, environ, send):
+    # The Flask app runs on the executor. Its body is sent chunk by chunk
+    # as it is produced, so that streamed responses stay streamed.
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = headers
+
+    result = await run_in_executor(wsgi_app, environ, start_response)
+    chunks = iter(result)
+    try:
+        chunk = await run_in_executor(next, chunks, None)
+        await send({
+            "type": "http.response.start", "status": started["status"],
+            "headers": [
+                (k.lower().encode("latin-1"), v.encode("latin-1"))
+                for k, v in started["headers"]]})
+        while chunk is not None:
+            if chunk:
+                await send({
+                    "type": "http.response.body", "body": chunk,
+                    "more_body": True})
+            chunk = await run_in_executor(next, chunks, None)
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        if hasattr(result, "close"):
+            await run_in_executor(result.close)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def create_asgi_app(app):
+    """
+    Wraps the Flask `app` in an ASGI app. The admin reads of submissions
+    and the healthcheck are served on the event loop, reading Firestore
+    with its AsyncClient, so a request waiting on Firestore holds no
+    thread. Other requests are passed to `app` on the loop's executor.
+
+    :param app: obj <flask.Flask>, as returned by create_app
+    :return: ASGI application
+    """
+    async def asgi_app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await _lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        environ = _wsgi_environ(scope, await _read_body(receive))
+        request = Request(environ)
+        route = _async_route(request)
+        if route is None:
+            await _send_wsgi(app.wsgi_app, environ, send)
+            return
+        fn, kwargs = route
+        with request_deadline():
+            try:
+                code, headers, data = await fn(app.config, request, **kwargs)
+            except Exception as err:
+                code, headers, data = _error_response(err)
+        await send({
+            "type": "http.response.start", "status": code,
+            "headers": [
+                (k.lower().encode("latin-1"), v.encode("latin-1"))
+                for k, v in headers]})
+        await send({"type": "http.response.body", "body": data})
+
+    return asgi_app
+
+
+def from_environ():
+    """
+    Sets up the app from the environment as springapi.app.main does, for an
+    ASGI server's application factory, e.g.
+    `uvicorn --factory springapi.asgi:from_environ`.
+
+    :return: ASGI application
+    """
+    return create_asgi_app(create_app_from_environ(os.environ.copy()))
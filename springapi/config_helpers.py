@@ -2,15 +2,34 @@ import firebase_admin as admin  # type: ignore
 import os
 
 from springapi.helpers import decode_json_uri
+from springapi.models import backends
+from springapi.models.firebase import breaker, retry
 from springapi.models.firebase.client import authenticate_firebase
+from springapi.models.memory import client as memory_client
 from springapi.models.sqlite import db
+from springapi.utils import http
 
 
 AUTH = "AUTH"
 CLIENT_ID = "CLIENT_ID"
+EMAIL = "EMAIL"
+FIRESTORE_DEADLINE = "FIRESTORE_DEADLINE"
+FIRESTORE_MAX_CONCURRENCY = "FIRESTORE_MAX_CONCURRENCY"
+FIRESTORE_QUEUE_TIMEOUT = "FIRESTORE_QUEUE_TIMEOUT"
+HTTP_POOL_SIZE = "HTTP_POOL_SIZE"
+HTTP_TIMEOUT = "HTTP_TIMEOUT"
+# Where Flask puts the instance folder of springapi.app, for scripts which
+# set up a backend without an app.
+INSTANCE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance")
 KEY = "KEY"
 SUBMISSION = "SUBMISSION"
+SQLITE_FILE = "springapi.sqlite"
+SUBMISSION_VIEW = "SUBMISSION_VIEW"
 TOKEN = "TOKEN"
+TOKEN_VERIFICATION = "TOKEN_VERIFICATION"
+TOKEN_VERIFICATION_JWT = "jwt"
+TOKEN_VERIFICATION_LOOKUP = "lookup"
 VERSION = "v1"
 
 
@@ -26,9 +45,17 @@ def _verify_auth_credentials(config):
     return credentials
 
 
+def _verify_token_verification_mode(environ):
+    mode = environ.get(TOKEN_VERIFICATION, TOKEN_VERIFICATION_LOOKUP)
+    if mode not in (TOKEN_VERIFICATION_JWT, TOKEN_VERIFICATION_LOOKUP):
+        raise ValueError(f"Unknown token verification mode: {mode}")
+    return mode
+
+
 def create_database_instance(config, model, app=None):
     database_uri = config[model]
-    scheme, _ = decode_json_uri(database_uri)
+    scheme, options = decode_json_uri(database_uri)
+    options = options if isinstance(options, dict) else {}
 
     if scheme == "firebase":
         try:
@@ -36,15 +63,34 @@ def create_database_instance(config, model, app=None):
         except ValueError:
             authenticate_firebase(database_uri)
     elif scheme == "sqlite":
-        app.config.from_mapping(
-            TOKEN_DB=os.path.join(app.instance_path, f"token.{scheme}"))
+        instance_path = app.instance_path if app else INSTANCE_PATH
+        path = options.get("path") or os.path.join(instance_path, SQLITE_FILE)
+        # Models on SQLite share one database, since the client is
+        # configured once per process.
+        others = [m for m in backends.models_using(scheme) if m != model]
+        database = app.config.get("SQLITE_DB") if app else None
+        if others and database and \
+                os.path.abspath(path) != os.path.abspath(database):
+            raise ValueError(
+                f"{model} and {others[0]} name different SQLite databases")
         try:
-            os.makedirs(app.instance_path)
+            os.makedirs(os.path.dirname(path))
         except OSError:
             pass
-        db.init_app(app)
-    else:
+        if app:
+            app.config.from_mapping(SQLITE_DB=path)
+            db.init_app(app)
+        else:
+            db.init_db(path)
+    elif scheme == "memory":
+        memory_client.configure_client(
+            latency=options.get("latency", 0.0),
+            latency_sigma=options.get("latency_sigma", 0.0),
+            error_rate=options.get("error_rate", 0.0),
+            seed=options.get("seed"))
+    elif scheme not in backends.BACKENDS:
         raise ValueError(f"Unknown database protocol: {scheme}")
+    backends.use_backend(model, scheme)
 
 
 def create_config(environ):
@@ -60,7 +106,24 @@ def create_config(environ):
     auth_credentials = _verify_auth_credentials(environ)
     config[AUTH] = auth_credentials
     config[KEY] = environ[KEY]
+    config[SUBMISSION] = environ[SUBMISSION]
     config[TOKEN] = environ[TOKEN]
+    if EMAIL in environ:
+        config[EMAIL] = environ[EMAIL]
+    config[TOKEN_VERIFICATION] = _verify_token_verification_mode(environ)
+    config[HTTP_POOL_SIZE] = int(environ.get(HTTP_POOL_SIZE, http.POOL_SIZE))
+    config[HTTP_TIMEOUT] = float(environ.get(HTTP_TIMEOUT, http.TIMEOUT))
+    config[FIRESTORE_DEADLINE] = \
+        float(environ.get(FIRESTORE_DEADLINE, retry.DEADLINE))
+    config[FIRESTORE_MAX_CONCURRENCY] = int(environ.get(
+        FIRESTORE_MAX_CONCURRENCY, breaker.MAX_CONCURRENCY))
+    config[FIRESTORE_QUEUE_TIMEOUT] = float(environ.get(
+        FIRESTORE_QUEUE_TIMEOUT, breaker.QUEUE_TIMEOUT))
+    config[SUBMISSION_VIEW] = \
+        environ.get(SUBMISSION_VIEW, "false").lower() == "true"
+    if config[SUBMISSION_VIEW] and \
+            decode_json_uri(config[SUBMISSION])[0] != "firebase":
+        raise ValueError("SUBMISSION_VIEW needs a firebase SUBMISSION")
 
     assert "web" in config[AUTH]
     assert "client_id" in config[AUTH]["web"]
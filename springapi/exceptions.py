@@ -1,5 +1,6 @@
 import functools
 import logging
+import math
 
 
 class HttpError(Exception):
@@ -43,6 +44,23 @@ class EntryNotFound(HttpError):
         self.code = 404
 
 
+class DatabaseUnavailable(HttpError):
+
+    def __init__(self, reason, retry_after=None):
+        self.error = "unavailable"
+        self.message = f"Database unavailable, try again later: {reason}"
+        self.code = 503
+        self.retry_after = retry_after
+
+    def error_response_body_and_code(self):
+        if self.retry_after is None:
+            return self.error_response_body(), self.code
+        retry_after = max(1, math.ceil(self.retry_after))
+        return (
+            self.error_response_body(), self.code,
+            {"Retry-After": str(retry_after)})
+
+
 class ServerError(Exception):
 
     def __init__(self, message, code):
@@ -65,6 +83,8 @@ class ValidationError(HttpError):
             return f"Not allowed: {', '.join(invalid)}"
         if err_type == "missing":
             return f"Missing: {', '.join(invalid)}"
+        if err_type == "invalid":
+            return f"Invalid: {', '.join(invalid)}"
         if err_type == "type":
             message = [f"{e[0]} is {e[1]}, should be {e[2]}." for e in invalid]
             return f"Bad types: {', '.join(message)}"
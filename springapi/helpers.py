@@ -1,5 +1,8 @@
+import asyncio
 import base64
 import binascii
+import contextvars
+import functools
 import json
 import urllib.parse
 
@@ -23,3 +26,18 @@ def decode_json_uri(uri):
     except json.JSONDecodeError:
         raise InvalidJSONURI("The config URI provided is not valid JSON.")
     return parsed_url.scheme, config
+
+
+async def run_in_executor(fn, *args):
+    """
+    Calls a blocking `fn` on the event loop's default executor, in a copy of
+    the caller's context so that context variables such as the request
+    deadline carry over.
+
+    :param fn: func
+    :param args: arguments for `fn`
+    :return: result of `fn`
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        None, functools.partial(context.run, fn, *args))
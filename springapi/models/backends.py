@@ -0,0 +1,77 @@
+import springapi.models.firebase.client as firebase_client
+import springapi.models.memory.client as memory_client
+import springapi.models.sqlite.client as sqlite_client
+
+from types import ModuleType
+from typing import Dict, List
+
+
+DEFAULT_SCHEME = "firebase"
+SUBMISSION = "SUBMISSION"
+TOKEN = "TOKEN"
+# Authorized emails are read from Firebase Auth unless a backend is
+# selected for them.
+EMAIL = "EMAIL"
+
+# Functions a storage backend module provides, with the arguments, return
+# values and errors of <springapi.models.firebase.client>.
+OPERATIONS = (
+    "get_collection", "stream_collection", "get_entry", "get_entries",
+    "add_entry", "add_entries", "update_entry", "update_entries",
+    "delete_entry", "delete_entries", "get_email_addresses",
+    "email_address_exists"
+)
+
+BACKENDS: Dict[str, ModuleType] = {}
+_selected: Dict[str, ModuleType] = {}
+
+
+def register_backend(scheme: str, backend: ModuleType) -> None:
+    """
+    Makes `backend` selectable by database URIs with `scheme`.
+
+    :param scheme: str, URI scheme, e.g. "sqlite"
+    :param backend: module providing every function in OPERATIONS
+    :return: None
+    """
+    missing = [op for op in OPERATIONS if not hasattr(backend, op)]
+    if missing:
+        raise ValueError(
+            f"Backend {scheme} is missing: {', '.join(missing)}")
+    BACKENDS[scheme] = backend
+
+
+def use_backend(model: str, scheme: str) -> None:
+    """
+    Stores entries of `model`, i.e. SUBMISSION, TOKEN or EMAIL, with the
+    backend registered for `scheme`.
+    """
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unknown database protocol: {scheme}")
+    _selected[model] = BACKENDS[scheme]
+
+
+def get_backend(model: str) -> ModuleType:
+    """
+    Returns the backend selected for `model`, or the Firestore client if
+    none has been selected.
+    """
+    return _selected.get(model) or BACKENDS[DEFAULT_SCHEME]
+
+
+def models_using(scheme: str) -> List[str]:
+    """
+    Returns the models whose entries are stored with the backend registered
+    for `scheme`.
+    """
+    backend = BACKENDS.get(scheme)
+    return [model for model, b in _selected.items() if b is backend]
+
+
+def reset_backends() -> None:
+    _selected.clear()
+
+
+register_backend("firebase", firebase_client)
+register_backend("memory", memory_client)
+register_backend("sqlite", sqlite_client)
@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import threading
+import time
+
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+
+def hash_value(value: str) -> str:
+    return hashlib.sha256(value.encode("utf8")).hexdigest()
+
+
+class HashedSetCache:
+    """
+    Process-local set of hashed values, loaded in full by `loader` and kept
+    for `ttl` seconds. The first lookup loads synchronously; once the set is
+    stale, lookups keep answering from it while a background thread reloads.
+    If given, `fallback` is asked about values missing from the set, and
+    values it confirms are added.
+
+    The loader may yield (value, expires) pairs instead of values. A value
+    is then no longer in the set once the timestamp `expires` has passed,
+    even before the next reload; 0 never expires. Likewise, `fallback` may
+    return a value's expiry instead of True. With `loads_keys`, the loader
+    yields keys, e.g. stored digests, rather than values.
+    """
+
+    def __init__(
+            self, loader: Callable[[], Iterable[Union[str, Tuple[str, int]]]],
+            ttl: float, key: Callable[[str], str] = hash_value,
+            clock: Callable[[], float] = time.monotonic,
+            fallback: Optional[Callable[[str], Union[bool, int]]] = None,
+            now: Callable[[], float] = time.time, loads_keys: bool = False):
+        self._loader = loader
+        self._ttl = ttl
+        self._key = key
+        self._clock = clock
+        self._fallback = fallback
+        self._now = now
+        self._loads_keys = loads_keys
+        self._lock = threading.Lock()
+        self._values: Optional[Dict[str, int]] = None
+        self._pending: Dict[str, int] = {}
+        self._loaded_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def __contains__(self, value):
+        if not isinstance(value, str):
+            return False
+        expires = self._current().get(self._key(value))
+        if expires is not None:
+            return not 0 < expires <= self._now()
+        found = self._fallback(value) if self._fallback else False
+        if found is False:
+            return False
+        self.add(value, 0 if found is True else found)
+        return True
+
+    def add(self, value: str, expires: int = 0) -> None:
+        hashed = self._key(value)
+        with self._lock:
+            self._pending[hashed] = expires
+            if self._values is not None:
+                self._values[hashed] = expires
+
+    def discard(self, value: str) -> None:
+        hashed = self._key(value)
+        with self._lock:
+            self._pending.pop(hashed, None)
+            if self._values is not None:
+                self._values.pop(hashed, None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._values = None
+
+    def refresh(self) -> Dict[str, int]:
+        with self._lock:
+            self._pending = {}
+        values = {}
+        for loaded in self._loader():
+            value, expires = (loaded, 0) if isinstance(loaded, str) \
+                else loaded
+            values[value if self._loads_keys else self._key(value)] = expires
+        with self._lock:
+            values.update(self._pending)
+            self._values = values
+            self._loaded_at = self._clock()
+        return values
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logging.exception("Error refreshing cache in background")
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def _current(self) -> Dict[str, int]:
+        with self._lock:
+            values = self._values
+            stale = self._clock() - self._loaded_at >= self._ttl
+            if values is not None and stale and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._refresh_in_background, daemon=True)
+                self._thread.start()
+        if values is None:
+            values = self.refresh()
+        return values
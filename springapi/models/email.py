@@ -1,10 +1,48 @@
+from typing import Iterable, List
+
+from springapi.models.backends import EMAIL, get_backend
+from springapi.models.cache import HashedSetCache
 from springapi.models.helpers import ApiObjectModel
-from springapi.models.firebase import client
+
+
+EMAIL_INDEX_TTL = 600
 
 
 class Email(ApiObjectModel):
 
     @classmethod
-    def get_authorized_emails(cls) -> "ApiObjectModel":
-        emails = client.get_email_addresses()
-        return emails
+    def get_authorized_emails(cls) -> HashedSetCache:
+        return EMAIL_INDEX
+
+    @classmethod
+    def refresh_authorized_emails(cls) -> None:
+        EMAIL_INDEX.refresh()
+
+    @classmethod
+    def authorize_emails(cls, emails: Iterable[str]) -> List[str]:
+        """
+        Adds email addresses to those authorized on a SQLite or in-memory
+        backend. On Firestore, the authorized emails are the Firebase Auth
+        users, which are managed in Firebase.
+
+        :param emails: email addresses to authorize
+        :return: list, addresses added, leaving out those already authorized
+        """
+        backend = get_backend(EMAIL)
+        collection = getattr(backend, "EMAIL_COLLECTION", None)
+        if collection is None:
+            raise ValueError("Authorized emails are managed in Firebase Auth")
+        existing = set(backend.get_email_addresses())
+        new = sorted({e.lower() for e in emails} - existing)
+        added, failed = backend.add_entries(
+            collection, [{"id": email} for email in new])
+        EMAIL_INDEX.invalidate()
+        if failed:
+            raise next(iter(failed.values()))
+        return list(added)
+
+
+EMAIL_INDEX = HashedSetCache(
+    lambda: get_backend(EMAIL).get_email_addresses(), EMAIL_INDEX_TTL,
+    key=str.lower,
+    fallback=lambda email: get_backend(EMAIL).email_address_exists(email))
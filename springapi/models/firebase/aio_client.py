@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+
+import firebase_admin  # type: ignore
+from google.cloud import firestore as google_firestore  # type: ignore
+from springapi.exceptions import (
+    CollectionNotFound, DatabaseUnavailable, EntryNotFound)
+from springapi.models.firebase import breaker, retry
+from springapi.models.firebase.client import build_query
+
+
+_client_lock = threading.Lock()
+_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _create_client(app):
+    return google_firestore.AsyncClient(
+        project=app.project_id, credentials=app.credential.get_credential())
+
+
+def get_client():
+    """
+    Returns the async Firestore client for the running event loop. Its gRPC
+    channel is bound to the loop it was created on, so each loop gets its
+    own client, shared by every coroutine on that loop.
+
+    :return: obj <google.cloud.firestore.AsyncClient>
+    """
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _clients.get(loop)
+        if client is None:
+            client = _clients[loop] = _create_client(firebase_admin.get_app())
+        return client
+
+
+async def _guarded(fn, timeout):
+    # As <springapi.models.firebase.breaker.guard>, without the concurrency
+    # limit: a waiting coroutine holds no thread.
+    circuit = breaker.BREAKER
+    circuit.before_call()
+    start = time.monotonic()
+    try:
+        response = await fn(timeout)
+    except retry.RETRYABLE_ERRORS:
+        circuit.record(bad=True)
+        raise
+    except BaseException:
+        circuit.record(bad=False)
+        raise
+    circuit.record(bad=time.monotonic() - start > circuit.slow_call)
+    return response
+
+
+async def call_with_retry(fn, sleep=asyncio.sleep, jitter=random.random):
+    """
+    Awaits `fn` with the seconds left in the current deadline, retrying
+    transient errors as <springapi.models.firebase.retry.call_with_retry>
+    does. Each attempt is recorded on the breaker shared with the sync
+    client.
+
+    :param fn: coroutine function, takes a timeout in seconds
+    :param sleep: coroutine function, waits between attempts
+    :param jitter: func, returns a float in [0, 1) scaling each backoff
+    :return: result of `fn`
+    :raises DatabaseUnavailable: when the deadline is spent
+    """
+    deadline = retry.current_deadline()
+    backoff = retry.INITIAL_BACKOFF
+    while True:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DatabaseUnavailable("deadline exceeded")
+        try:
+            return await _guarded(fn, remaining)
+        except retry.RETRYABLE_ERRORS as err:
+            delay = jitter() * backoff
+            if deadline.remaining() <= delay:
+                raise DatabaseUnavailable(err.message) from err
+            logging.warning(
+                "Retrying Firestore call in %.3fs: %s", delay, err.message)
+            await sleep(delay)
+            backoff = min(
+                backoff * retry.BACKOFF_MULTIPLIER, retry.MAX_BACKOFF)
+
+
+async def get_collection(
+        collection, field=None, value=None, limit=None, start_after=None,
+        filters=None, field_paths=None):
+    """
+    Async counterpart of <springapi.models.firebase.client.get_collection>.
+    """
+    response = build_query(
+        get_client(), collection, field, value, limit, start_after, filters,
+        field_paths)
+
+    async def read(timeout):
+        return {
+            r.id: r.to_dict()
+            async for r in response.stream(retry=None, timeout=timeout)}
+    collection_obj = await call_with_retry(read)
+    if collection_obj:
+        return collection_obj
+    else:
+        raise CollectionNotFound(collection)
+
+
+async def get_entry(collection, entry_id, field_paths=None):
+    """
+    Async counterpart of <springapi.models.firebase.client.get_entry>.
+    """
+    client = get_client()
+    document = client.collection(collection).document(entry_id)
+    response = await call_with_retry(lambda timeout: document.get(
+        field_paths=field_paths, retry=None, timeout=timeout))
+    if response.exists:
+        return response.to_dict() or {}
+    else:
+        raise EntryNotFound(entry_id, collection)
@@ -0,0 +1,210 @@
+import collections
+import contextlib
+import threading
+import time
+
+from springapi.exceptions import DatabaseUnavailable
+from springapi.models.firebase.retry import RETRYABLE_ERRORS
+from typing import Callable, Deque, Optional, TypeVar
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+ERROR_RATE = 0.5
+WINDOW = 20
+MIN_CALLS = 10
+SLOW_CALL = 2.0
+OPEN_SECONDS = 5.0
+MAX_CONCURRENCY = 32
+QUEUE_TIMEOUT = 1.0
+
+T = TypeVar("T")
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of the last `window` backend calls. A call is bad if
+    it fails with a transient error or takes longer than `slow_call`
+    seconds. Once at least `min_calls` are recorded and the share of bad
+    calls reaches `error_rate`, the breaker opens and calls are refused for
+    `open_seconds`. It then lets one probe call through: the breaker closes
+    if the probe is good and opens again if not.
+    """
+
+    def __init__(
+            self, error_rate: float = ERROR_RATE, window: int = WINDOW,
+            min_calls: int = MIN_CALLS, slow_call: float = SLOW_CALL,
+            open_seconds: float = OPEN_SECONDS,
+            clock: Callable[[], float] = time.monotonic):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = collections.deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self.retry_after() == 0:
+                return HALF_OPEN
+            return self._state
+
+    def retry_after(self) -> float:
+        """
+        Seconds until the open breaker lets a probe call through.
+        """
+        return max(0.0, self._opened_at + self.open_seconds - self._clock())
+
+    def before_call(self) -> None:
+        """
+        :raises DatabaseUnavailable: while the breaker refuses calls
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN:
+                if self.retry_after() > 0:
+                    raise DatabaseUnavailable(
+                        "circuit open", retry_after=self.retry_after())
+                self._state = HALF_OPEN
+            if self._probing:
+                raise DatabaseUnavailable(
+                    "circuit open", retry_after=self.open_seconds)
+            self._probing = True
+
+    def record(self, bad: bool) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+                self._outcomes.clear()
+                if bad:
+                    self._open()
+                else:
+                    self._state = CLOSED
+                return
+            self._outcomes.append(bad)
+            if (self._state == CLOSED
+                    and len(self._outcomes) >= self.min_calls
+                    and sum(self._outcomes) >=
+                    self.error_rate * len(self._outcomes)):
+                self._open()
+
+    def cancel(self) -> None:
+        """
+        Forgets a call let through by before_call that was never made.
+        """
+        with self._lock:
+            self._probing = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._outcomes.clear()
+            self._state = CLOSED
+            self._probing = False
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the number of backend calls in flight. A call waits up to
+    `queue_timeout` seconds for a free slot and is shed if none frees up.
+    """
+
+    def __init__(
+            self, max_concurrency: int = MAX_CONCURRENCY,
+            queue_timeout: float = QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    @contextlib.contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """
+        :param timeout: float, optional shorter wait than `queue_timeout`
+        :raises DatabaseUnavailable: when no slot frees up in time
+        """
+        wait = self.queue_timeout
+        if timeout is not None:
+            wait = min(wait, timeout)
+        if not self._slots.acquire(timeout=wait):
+            raise DatabaseUnavailable(
+                "too many concurrent requests", retry_after=1)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+BREAKER = CircuitBreaker()
+LIMITER = ConcurrencyLimiter()
+
+
+def configure_breaker(
+        max_concurrency: int = MAX_CONCURRENCY,
+        queue_timeout: float = QUEUE_TIMEOUT) -> None:
+    """
+    Sets how many Firestore calls this process makes at once, and how long
+    a call waits for a free slot before it is shed. Resets the breaker.
+
+    :param max_concurrency: int, calls allowed in flight
+    :param queue_timeout: float, seconds a call waits for a slot
+    :return: None
+    """
+    global LIMITER
+    LIMITER = ConcurrencyLimiter(max_concurrency, queue_timeout)
+    BREAKER.reset()
+
+
+@contextlib.contextmanager
+def guard(timeout: Optional[float] = None, clock=time.monotonic):
+    """
+    Runs the block as one backend call: refused while the breaker is open,
+    made within the concurrency limit, and recorded on the breaker. Errors
+    other than transient ones mean the backend answered, so they count as
+    good calls.
+
+    :param timeout: float, optional limit on the wait for a slot
+    :raises DatabaseUnavailable: when the call is refused or shed
+    """
+    breaker = BREAKER
+    breaker.before_call()
+    start = None
+    try:
+        with LIMITER.slot(timeout):
+            start = clock()
+            yield
+    except RETRYABLE_ERRORS:
+        breaker.record(bad=True)
+        raise
+    except BaseException:
+        if start is None:
+            # Shed before reaching the backend, so nothing to record.
+            breaker.cancel()
+        else:
+            breaker.record(bad=False)
+        raise
+    else:
+        breaker.record(bad=clock() - start > breaker.slow_call)
+
+
+def guarded(fn: Callable[[float], T]) -> Callable[[float], T]:
+    """
+    Wraps a function taking a timeout, as passed to
+    <springapi.models.firebase.retry.call_with_retry>, so that each attempt
+    is guarded.
+    """
+    def call(timeout: float) -> T:
+        with guard(timeout):
+            return fn(timeout)
+    return call
@@ -1,78 +1,390 @@
-import json
-import tempfile
+import os
+import threading
 
 import firebase_admin  # type: ignore
-from firebase_admin import firestore, auth  # type: ignore
+from firebase_admin import auth  # type: ignore
 from google.api_core import exceptions as google_exceptions  # type: ignore
+from google.cloud import firestore as google_firestore  # type: ignore
+from google.cloud.firestore_v1.field_path import FieldPath  # type: ignore
+from google.cloud.firestore_v1.services.firestore import (  # type: ignore
+    client as firestore_client, transports as firestore_transports)
 from springapi.helpers import decode_json_uri
+from springapi.models.firebase.breaker import guard, guarded
+from springapi.models.firebase.retry import call_with_retry
 from springapi.exceptions import (
-    CollectionNotFound, EntryAlreadyExists, EntryNotFound,
-    MissingProjectId, ValidationError)
+    CollectionNotFound, DatabaseUnavailable, EntryAlreadyExists,
+    EntryNotFound, HttpError, MissingProjectId, ValidationError)
 
 
-def get_collection(collection, field=None, value=None):
-    client = firestore.client()
+BATCH_LIMIT = 500
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1)
+]
+
+_client_lock = threading.Lock()
+_client = None
+_client_pid = None
+_channel_options = list(CHANNEL_OPTIONS)
+
+
+def _create_client(app, channel_options):
+    client = google_firestore.Client(
+        project=app.project_id, credentials=app.credential.get_credential())
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        return client
+    # The library builds its own channel on first use; supplying the GAPIC
+    # client up front lets us choose the channel options.
+    transport = firestore_transports.FirestoreGrpcTransport
+    channel = transport.create_channel(
+        client._target, credentials=client._credentials,
+        options=channel_options)
+    client._firestore_api_internal = firestore_client.FirestoreClient(
+        transport=transport(host=client._target, channel=channel),
+        client_options=client._client_options)
+    return client
+
+
+def configure_client(channel_options=None):
+    """
+    Sets gRPC channel options, such as keepalive or
+    grpc.max_concurrent_streams, for the Firestore client. The client is
+    rebuilt on next use.
+
+    :param channel_options: list of (str, value) tuples, channel arguments
+    :return: None
+    """
+    global _client, _channel_options
+    with _client_lock:
+        _channel_options = list(channel_options or CHANNEL_OPTIONS)
+        _client = None
+
+
+def get_client():
+    """
+    Returns the Firestore client for this process. It is created once and
+    shared by all threads, and created again in a forked worker so that the
+    child does not reuse the parent's gRPC channel.
+
+    :return: obj <google.cloud.firestore.Client>
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = _create_client(
+                firebase_admin.get_app(), _channel_options)
+            _client_pid = os.getpid()
+        return _client
+
+
+def build_query(
+        client, collection, field=None, value=None, limit=None,
+        start_after=None, filters=None, field_paths=None):
+    """
+    Builds the query read by get_collection and stream_collection on
+    `client`, which may be a Client or an AsyncClient.
+    """
     if field and value:
         response = client.collection(
             f'{collection}').where(f'{field}', u'==', f'{value}')
     else:
         response = client.collection(f'{collection}')
-    collection_obj = {}
-    for r in response.stream():
-        collection_obj[r.id] = r.to_dict()
+    for filter_field, filter_value in (filters or {}).items():
+        response = response.where(filter_field, u'==', filter_value)
+    if field_paths is not None:
+        response = response.select(field_paths)
+    if limit is not None:
+        document_id = FieldPath.document_id()
+        response = response.order_by(document_id).limit(limit)
+        if start_after is not None:
+            response = response.start_after({document_id: start_after})
+    return response
+
+
+def get_collection(
+        collection, field=None, value=None, limit=None, start_after=None,
+        filters=None, field_paths=None):
+    """
+    Returns entries in a collection, optionally restricted to entries whose
+    fields equal the values in `filters` and paged in id order by `limit`
+    and `start_after`.
+
+    :param collection: str, name of collection
+    :param field: str, optional field to filter on
+    :param value: str, value `field` must equal
+    :param limit: int, optional maximum number of entries
+    :param start_after: str, optional id to start after when paging
+    :param filters: dict, optional field names and values entries must equal
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: dict, entries keyed by id
+    """
+    response = build_query(
+        get_client(), collection, field, value, limit, start_after, filters,
+        field_paths)
+
+    def read(timeout):
+        return {
+            r.id: r.to_dict()
+            for r in response.stream(retry=None, timeout=timeout)}
+    collection_obj = call_with_retry(guarded(read))
     if collection_obj:
         return collection_obj
     else:
         raise CollectionNotFound(collection)
 
 
-def get_entry(collection, entry_id):
-    client = firestore.client()
-    response = client.collection(collection).document(entry_id).get()
-    entry = response.to_dict()
-    if entry:
-        return entry
+def stream_collection(
+        collection, field=None, value=None, filters=None, field_paths=None):
+    """
+    Yields entries one at a time as they arrive from Firestore, so that the
+    collection is never held in memory at once. An empty or missing
+    collection yields nothing. Running the query up to its first result
+    counts as one backend call; the rest is read as the caller consumes it,
+    without holding a concurrency slot.
+
+    :param collection: str, name of collection
+    :param field: str, optional field to filter on
+    :param value: str, value `field` must equal
+    :param filters: dict, optional field names and values entries must equal
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: generator of (str, dict), entry id and entry data
+    """
+    query = build_query(
+        get_client(), collection, field, value, filters=filters,
+        field_paths=field_paths)
+    with guard():
+        results = iter(query.stream())
+        first = next(results, None)
+    if first is None:
+        return
+    yield first.id, first.to_dict()
+    for r in results:
+        yield r.id, r.to_dict()
+
+
+def get_entry(collection, entry_id, field_paths=None):
+    client = get_client()
+    document = client.collection(collection).document(entry_id)
+    response = call_with_retry(guarded(lambda timeout: document.get(
+        field_paths=field_paths, retry=None, timeout=timeout)))
+    if response.exists:
+        return response.to_dict() or {}
     else:
         raise EntryNotFound(entry_id, collection)
 
 
-def add_entry(collection, data):
-    client = firestore.client()
+def get_entries(collection, entry_ids, field_paths=None):
+    """
+    Reads many entries by id with one get_all per chunk of up to
+    BATCH_LIMIT ids.
+
+    :param collection: str, name of collection
+    :param entry_ids: list of str, ids of entries to read
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: tuple of (dict, list), entries found keyed by id in the order
+        requested, and ids not found
+    """
+    client = get_client()
+    reference = client.collection(collection)
+    snapshots = {}
+    for start in range(0, len(entry_ids), BATCH_LIMIT):
+        documents = [
+            reference.document(entry_id)
+            for entry_id in entry_ids[start:start + BATCH_LIMIT]]
+        with guard():
+            for snapshot in client.get_all(
+                    documents, field_paths=field_paths):
+                if snapshot.exists:
+                    snapshots[snapshot.id] = snapshot.to_dict() or {}
+    found = {i: snapshots[i] for i in entry_ids if i in snapshots}
+    missing = [i for i in entry_ids if i not in snapshots]
+    return found, missing
+
+
+def add_entry(collection, data, verify=False):
+    """
+    Creates an entry and returns it as written. Unless `verify` is set, the
+    entry is built from `data` rather than read back from Firestore.
+
+    :param collection: str, name of collection
+    :param data: dict, entry data including its id
+    :param verify: bool, read the entry back once after writing it
+    :return: dict, entry keyed by its id
+    """
+    client = get_client()
     entry_id = data.pop('id', None)
     if entry_id is None:
         raise ValidationError(["id"], "missing")
+    reference = client.collection(collection)
+    attempts = []
+
+    def create(timeout):
+        attempts.append(timeout)
+        try:
+            return reference.add(
+                data, entry_id, retry=None, timeout=timeout)[1]
+        except google_exceptions.AlreadyExists:
+            # An earlier attempt which failed in transit may have written
+            # the entry; ids are unique, so it must be this one.
+            if len(attempts) > 1:
+                return reference.document(entry_id)
+            raise
     try:
-        __, response = client.collection(collection).add(data, entry_id)
-        added = {response.get().id: response.get().to_dict()}
-        added[entry_id].update({"id": entry_id})
-        return added
+        response = call_with_retry(guarded(create))
     except google_exceptions.AlreadyExists:
         raise EntryAlreadyExists(entry_id, collection)
+    if verify:
+        snapshot = response.get()
+        added = {snapshot.id: snapshot.to_dict()}
+    else:
+        added = {entry_id: dict(data)}
+    added[entry_id].update({"id": entry_id})
+    return added
+
+
+def add_entries(collection, entries):
+    """
+    Creates entries in chunked batches of up to BATCH_LIMIT writes. Each
+    batch is committed atomically, so a failed commit fails every entry in
+    its chunk without affecting the others.
+
+    :param collection: str, name of collection
+    :param entries: list of dict, entry data including ids
+    :return: tuple of (dict, dict), entries written keyed by id, and
+        <springapi.exceptions.HttpError> keyed by id for entries which were
+        not written
+    """
+    client = get_client()
+    reference = client.collection(collection)
+    added, failed = {}, {}
+    for start in range(0, len(entries), BATCH_LIMIT):
+        chunk = {}
+        batch = client.batch()
+        for data in entries[start:start + BATCH_LIMIT]:
+            data = dict(data)
+            entry_id = data.pop('id', None)
+            if entry_id is None:
+                raise ValidationError(["id"], "missing")
+            batch.create(reference.document(entry_id), data)
+            chunk[entry_id] = data
+        try:
+            with guard():
+                batch.commit()
+        except DatabaseUnavailable as err:
+            failed.update({entry_id: err for entry_id in chunk})
+            continue
+        except google_exceptions.AlreadyExists:
+            failed.update({
+                entry_id: EntryAlreadyExists(entry_id, collection)
+                for entry_id in chunk})
+            continue
+        except google_exceptions.GoogleAPICallError as err:
+            error = HttpError("write_failed", err.message, 500)
+            failed.update({entry_id: error for entry_id in chunk})
+            continue
+        for entry_id, data in chunk.items():
+            added[entry_id] = {**data, "id": entry_id}
+    return added, failed
 
 
 def update_entry(collection, data, entry_id):
-    client = firestore.client()
+    client = get_client()
     data.pop('id', None)
+    document = client.collection(collection).document(entry_id)
     try:
-        client.collection(collection).document(entry_id).update(data)
+        call_with_retry(guarded(lambda timeout: document.update(
+            data, retry=None, timeout=timeout)))
         return {'success': f'{entry_id} updated in {collection}'}
     except google_exceptions.NotFound:
         raise EntryNotFound(entry_id, collection)
 
 
+def update_entries(collection, entry_ids, data):
+    """
+    Applies the same update to many entries. Existing entries are found
+    with one get_all per chunk of up to BATCH_LIMIT ids, reading no fields,
+    and the chunk's updates are then committed as a single batch. If an
+    entry is deleted before the commit, the chunk is checked again and the
+    remaining entries are committed.
+
+    :param collection: str, name of collection
+    :param entry_ids: list of str, ids of entries to update
+    :param data: dict, fields to set on every entry
+    :return: tuple of (list, list), ids updated and ids not found
+    """
+    client = get_client()
+    reference = client.collection(collection)
+    updated, missing = set(), set()
+    for start in range(0, len(entry_ids), BATCH_LIMIT):
+        pending = entry_ids[start:start + BATCH_LIMIT]
+        while pending:
+            documents = [reference.document(entry_id) for entry_id in pending]
+            with guard():
+                found = {
+                    snapshot.id for snapshot in
+                    client.get_all(documents, field_paths=[])
+                    if snapshot.exists}
+            missing.update(i for i in pending if i not in found)
+            batch = client.batch()
+            for entry_id, document in zip(pending, documents):
+                if entry_id in found:
+                    batch.update(document, data)
+            pending = [i for i in pending if i in found]
+            if not pending:
+                break
+            try:
+                with guard():
+                    batch.commit()
+            except google_exceptions.NotFound:
+                # The whole batch fails when any entry in it was deleted
+                # since get_all; the vanished ids are found on the next pass.
+                continue
+            updated.update(pending)
+            break
+    return ([i for i in entry_ids if i in updated],
+            [i for i in entry_ids if i in missing])
+
+
+def delete_entry(collection, entry_id):
+    client = get_client()
+    with guard():
+        client.collection(collection).document(entry_id).delete()
+    return {'success': f'{entry_id} deleted from {collection}'}
+
+
+def delete_entries(collection, entry_ids):
+    client = get_client()
+    reference = client.collection(collection)
+    for start in range(0, len(entry_ids), BATCH_LIMIT):
+        batch = client.batch()
+        for entry_id in entry_ids[start:start + BATCH_LIMIT]:
+            batch.delete(reference.document(entry_id))
+        with guard():
+            batch.commit()
+    return {'success': f'{len(entry_ids)} deleted from {collection}'}
+
+
 def get_email_addresses():
     user_list = auth.list_users()
-    users = [u.email for u in user_list.users]
+    users = [u.email for u in user_list.iterate_all() if u.email]
     return users
 
 
+def email_address_exists(email):
+    try:
+        auth.get_user_by_email(email)
+    except auth.UserNotFoundError:
+        return False
+    return True
+
+
 def authenticate_firebase(uri):
     _, config = decode_json_uri(uri)
     if 'project_id' in config.keys():
-        with tempfile.NamedTemporaryFile(suffix=".json") as cred_file:
-            cred_file.write(json.dumps(config).encode("utf8"))
-            cred_file.seek(0)
-            app = firebase_admin.credentials.Certificate(cred_file.name)
+        app = firebase_admin.credentials.Certificate(config)
         firebase_admin.initialize_app(app, {
             'projectId': app.project_id,
             'storageBucket': f'{app.project_id}.appspot.com'
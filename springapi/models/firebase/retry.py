@@ -0,0 +1,108 @@
+import contextlib
+import contextvars
+import logging
+import random
+import time
+
+from google.api_core import exceptions as google_exceptions  # type: ignore
+from springapi.exceptions import DatabaseUnavailable
+from typing import Callable, Optional, TypeVar
+
+
+DEADLINE = 10.0
+INITIAL_BACKOFF = 0.1
+MAX_BACKOFF = 2.0
+BACKOFF_MULTIPLIER = 2.0
+RETRYABLE_ERRORS = (
+    google_exceptions.Aborted,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable
+)
+
+T = TypeVar("T")
+
+_settings = {"deadline": DEADLINE}
+_deadline: "contextvars.ContextVar[Optional[Deadline]]" = \
+    contextvars.ContextVar("firestore_deadline", default=None)
+
+
+class Deadline:
+
+    def __init__(
+            self, seconds: float,
+            clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+
+def configure_retry(deadline: float = DEADLINE) -> None:
+    """
+    Sets the default time budget for Firestore operations.
+
+    :param deadline: float, seconds allowed for an operation and its retries
+    :return: None
+    """
+    _settings["deadline"] = deadline
+
+
+def current_deadline() -> Deadline:
+    """
+    Returns the deadline set by request_deadline, or a new default one
+    outside of it.
+    """
+    return _deadline.get() or Deadline(_settings["deadline"])
+
+
+@contextlib.contextmanager
+def request_deadline(
+        seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic):
+    """
+    Shares one time budget between every Firestore operation made inside
+    the block, e.g. all the operations made while handling a request.
+    """
+    if seconds is None:
+        seconds = _settings["deadline"]
+    token = _deadline.set(Deadline(seconds, clock))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def call_with_retry(
+        fn: Callable[[float], T], sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random) -> T:
+    """
+    Calls `fn` with the seconds left in the current deadline, retrying
+    transient errors with full-jitter exponential backoff until the deadline
+    is spent. `fn` must be safe to call again after a failure that may have
+    been applied, such as a read, an update, or a create keyed by id.
+
+    :param fn: func, takes a timeout in seconds
+    :param sleep: func, waits between attempts
+    :param jitter: func, returns a float in [0, 1) scaling each backoff
+    :return: result of `fn`
+    :raises DatabaseUnavailable: when the deadline is spent
+    """
+    deadline = current_deadline()
+    backoff = INITIAL_BACKOFF
+    while True:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DatabaseUnavailable("deadline exceeded")
+        try:
+            return fn(remaining)
+        except RETRYABLE_ERRORS as err:
+            delay = jitter() * backoff
+            if deadline.remaining() <= delay:
+                raise DatabaseUnavailable(err.message) from err
+            logging.warning(
+                "Retrying Firestore call in %.3fs: %s", delay, err.message)
+            sleep(delay)
+            backoff = min(backoff * BACKOFF_MULTIPLIER, MAX_BACKOFF)
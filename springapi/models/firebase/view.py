@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+import uuid
+
+import springapi.models.firebase.client as client
+from google.cloud.firestore_v1.watch import Watch  # type: ignore
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+
+RESTART_INTERVAL = 5.0
+
+
+class CollectionView:
+    """
+    In-process copy of a collection, kept current by a Firestore snapshot
+    listener once started. Entries are held by id, with an index of ids by
+    value for each of the `indexed` fields, so equality filters on those
+    fields are answered without scanning. A listener which stops is
+    restarted on a later read, at most once every `restart_interval`
+    seconds. `version` changes whenever the entries may have changed.
+    """
+
+    def __init__(
+            self, collection: str, indexed: Iterable[str] = (),
+            clock: Callable[[], float] = time.monotonic,
+            restart_interval: float = RESTART_INTERVAL):
+        self.collection = collection
+        self.restart_interval = restart_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[Any, Set[str]]] = {
+            f: {} for f in indexed}
+        self._watch: Optional[Watch] = None
+        self._updated_at: Optional[float] = None
+        self._ready = threading.Event()
+        self._restarted_at: Optional[float] = None
+        # The id tells apart views in other processes, whose counts of
+        # changes may coincide with this one's.
+        self._id = uuid.uuid4().hex
+        self._changes = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._watch is None:
+                reference = client.get_client().collection(self.collection)
+                self._watch = reference.on_snapshot(self._on_snapshot)
+
+    def stop(self) -> None:
+        with self._lock:
+            watch, self._watch = self._watch, None
+            self._clear()
+        if watch is not None:
+            watch.unsubscribe()
+
+    def serving(self) -> bool:
+        """
+        True if reads can be served from the view. Restarts the listener if
+        it has stopped since start; reads are served from Firestore until
+        the new listener delivers its initial snapshot.
+        """
+        watch = self._watch
+        if watch is not None and not watch.is_active:
+            self._restart(watch)
+        return self.active
+
+    @property
+    def active(self) -> bool:
+        """
+        True while the listener is running and has delivered the initial
+        snapshot, i.e. while reads can be served from the view.
+        """
+        watch = self._watch
+        return watch is not None and watch.is_active and self._ready.is_set()
+
+    @property
+    def version(self) -> str:
+        """
+        Identifies the entries currently held: equal versions of a view
+        hold equal entries. Read it before reading entries, so that a
+        version is never paired with entries older than it.
+        """
+        return f"{self._id}:{self._changes}"
+
+    def since_last_change(self) -> Optional[float]:
+        """
+        Seconds since the listener last delivered changes, or None if it has
+        not delivered any. Firestore only delivers snapshots when documents
+        change, so this grows on a quiet collection while the view is
+        current; whether the view is current is told by `active`.
+        """
+        if self._updated_at is None:
+            return None
+        return self._clock() - self._updated_at
+
+    def get(self, entry_id: str,
+            field_paths: Optional[Iterable[str]] = None
+            ) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                return None
+            return _copy(entry, field_paths)
+
+    def query(self, filters: Optional[Dict[str, Any]] = None,
+              field_paths: Optional[Iterable[str]] = None
+              ) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns copies of the entries whose fields equal `filters`, keyed by
+        id in id order.
+        """
+        filters = filters or {}
+        with self._lock:
+            entry_ids: Optional[Set[str]] = None
+            for field, value in filters.items():
+                if field in self._indexes:
+                    matching = self._indexes[field].get(value, set())
+                    entry_ids = matching if entry_ids is None \
+                        else entry_ids & matching
+            if entry_ids is None:
+                entry_ids = set(self._entries)
+            return {
+                i: _copy(self._entries[i], field_paths)
+                for i in sorted(entry_ids)
+                if all(self._entries[i].get(f, _MISSING) == v
+                       for f, v in filters.items())}
+
+    def _restart(self, stopped: Watch) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._watch is not stopped or (
+                    self._restarted_at is not None
+                    and now - self._restarted_at < self.restart_interval):
+                return
+            self._restarted_at = now
+            try:
+                reference = client.get_client().collection(self.collection)
+                self._watch = reference.on_snapshot(self._on_snapshot)
+            except Exception:
+                logging.exception(
+                    f"Error restarting listener on {self.collection}")
+                return
+            # The new listener delivers every entry again as added.
+            self._clear()
+        if stopped is not None:
+            stopped.unsubscribe()
+
+    def _clear(self):
+        self._entries = {}
+        self._indexes = {f: {} for f in self._indexes}
+        self._updated_at = None
+        self._ready.clear()
+        self._changes += 1
+
+    def _on_snapshot(self, snapshots, changes, read_time):
+        with self._lock:
+            for change in changes:
+                entry_id = change.document.id
+                self._remove(entry_id)
+                if change.type.name != "REMOVED":
+                    self._add(entry_id, change.document.to_dict() or {})
+            self._updated_at = self._clock()
+            if changes:
+                self._changes += 1
+        self._ready.set()
+
+    def _add(self, entry_id, data):
+        self._entries[entry_id] = data
+        for field, index in self._indexes.items():
+            if field in data and _hashable(data[field]):
+                index.setdefault(data[field], set()).add(entry_id)
+
+    def _remove(self, entry_id):
+        data = self._entries.pop(entry_id, None)
+        if data is None:
+            return
+        for field, index in self._indexes.items():
+            if field in data and _hashable(data[field]):
+                index.get(data[field], set()).discard(entry_id)
+
+
+_MISSING = object()
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _copy(entry: Dict[str, Any],
+          field_paths: Optional[Iterable[str]]) -> Dict[str, Any]:
+    if field_paths is None:
+        return dict(entry)
+    return {f: entry[f] for f in field_paths if f in entry}
@@ -1,7 +1,8 @@
 import base64
+import binascii
 import uuid
 from springapi.exceptions import ValidationError
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 
 
 class ApiObjectModel:
@@ -19,10 +20,19 @@ class ApiObjectModel:
         return self.to_json() == other.to_json()
 
     @classmethod
-    def from_json(cls, user_data: Dict[str, Any]) -> "ApiObjectModel":
-        validate_data(user_data, cls._fields)
-        populated = set_defaults(user_data, cls._fields)
-        return cls(cls._fields, **populated)
+    def from_json(
+            cls, user_data: Dict[str, Any],
+            projection: Optional[Iterable[str]] = None) -> "ApiObjectModel":
+        """
+        Validates `user_data` and creates a model from it. Given a
+        `projection`, only those fields are validated and emitted by to_json.
+        """
+        fields = cls._fields
+        if projection is not None:
+            fields = {f: cls._fields[f] for f in projection}
+        validate_data(user_data, fields)
+        populated = set_defaults(user_data, fields)
+        return cls(fields, **populated)
 
     def to_json(self):
         json = dict([(k, getattr(self, k)) for k in self.fields.keys()])
@@ -36,6 +46,55 @@ def create_uid():
     return uid_base32
 
 
+def encode_cursor(entry_id: str) -> str:
+    return base64.urlsafe_b64encode(
+        entry_id.encode("utf8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded = base64.b64decode(padded, altchars=b"-_", validate=True)
+        return decoded.decode("utf8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError(["cursor"], "invalid")
+
+
+def parse_filters(params: Dict[str, str], fields) -> Dict[str, Any]:
+    """
+    Converts query string values into equality filters typed according to
+    `fields`. Booleans are given as "true" or "false".
+    """
+    filters: Dict[str, Any] = {}
+    invalid = []
+    for field_name, raw in params.items():
+        field_type = fields[field_name]["type"]
+        if field_type is bool:
+            if raw.lower() not in ("true", "false"):
+                invalid.append(field_name)
+                continue
+            filters[field_name] = raw.lower() == "true"
+        else:
+            filters[field_name] = field_type(raw)
+    if invalid:
+        raise ValidationError(sorted(invalid), "invalid")
+    return filters
+
+
+def parse_projection(value: Optional[str], fields) -> Optional[List[str]]:
+    """
+    Converts a comma-separated list of field names into a projection in
+    the order of `fields`. "id" is always included.
+    """
+    if value is None:
+        return None
+    requested = {f.strip() for f in value.split(",") if f.strip()}
+    not_allowed = sorted(requested - set(fields))
+    if not_allowed:
+        raise ValidationError(not_allowed, "not_allowed")
+    return [f for f in fields if f in requested or f == "id"]
+
+
 def set_defaults(data: Dict[str, Any], fields) -> Dict[str, Any]:
     for field_name, field_settings in fields.items():
         data.setdefault(field_name, field_settings["default"])
@@ -61,6 +120,19 @@ def _check_type(data: Dict[str, Any], fields) -> List[Tuple[str, str, str]]:
     return bad_types
 
 
+def validate_partial_data(data: Dict[str, Any], fields) -> None:
+    """
+    Validates the fields present in `data` without requiring any others.
+    """
+    disallowed = _check_disallowed_fields(data, fields)
+    if disallowed:
+        raise ValidationError(disallowed, "not_allowed")
+
+    bad_types = _check_type(data, fields)
+    if bad_types:
+        raise ValidationError(bad_types, "type")
+
+
 def validate_data(data: Dict[str, Any], fields) -> None:
     disallowed = _check_disallowed_fields(data, fields)
     if disallowed:
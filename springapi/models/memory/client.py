@@ -0,0 +1,280 @@
+import copy
+import random
+import threading
+import time
+
+from typing import Any, Dict
+
+from springapi.exceptions import (
+    CollectionNotFound, DatabaseUnavailable, EntryAlreadyExists,
+    EntryNotFound, ValidationError)
+
+
+BATCH_LIMIT = 500
+EMAIL_COLLECTION = "emails"
+
+# Stored entries are replaced rather than changed in place, so an entry
+# read under the lock can be copied after it is released.
+_lock = threading.RLock()
+_collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+_settings = {"latency": 0.0, "latency_sigma": 0.0, "error_rate": 0.0}
+_random = random.Random()
+
+
+def configure_client(
+        latency=0.0, latency_sigma=0.0, error_rate=0.0, seed=None):
+    """
+    Sets the delay and failures injected into every call, to reproduce a
+    slow or failing backend. Stored entries are kept.
+
+    :param latency: float, median seconds added to each call
+    :param latency_sigma: float, spread of the log-normal delay; 0 adds
+        exactly `latency`
+    :param error_rate: float, share of calls which fail with
+        <springapi.exceptions.DatabaseUnavailable>
+    :param seed: optional seed, to inject the same delays and failures in
+        every run
+    :return: None
+    """
+    with _lock:
+        _settings.update(
+            latency=latency, latency_sigma=latency_sigma,
+            error_rate=error_rate)
+        _random.seed(seed)
+
+
+def clear():
+    with _lock:
+        _collections.clear()
+
+
+def _inject():
+    with _lock:
+        latency, sigma = _settings["latency"], _settings["latency_sigma"]
+        delay = latency * _random.lognormvariate(0, sigma) if latency else 0
+        failed = _random.random() < _settings["error_rate"]
+    if delay:
+        time.sleep(delay)
+    if failed:
+        raise DatabaseUnavailable("injected error")
+
+
+def _project(entry, field_paths=None):
+    if field_paths is None:
+        return copy.deepcopy(entry)
+    return {f: copy.deepcopy(entry[f]) for f in field_paths if f in entry}
+
+
+def _select(
+        collection, field=None, value=None, limit=None, start_after=None,
+        filters=None):
+    conditions = dict(filters or {})
+    if field and value:
+        conditions[field] = f'{value}'
+    with _lock:
+        entries = sorted(_collections.get(collection, {}).items())
+    selected = [
+        (entry_id, entry) for entry_id, entry in entries
+        if (start_after is None or entry_id > start_after)
+        and all(name in entry and entry[name] == filter_value
+                and type(entry[name]) is type(filter_value)
+                for name, filter_value in conditions.items())]
+    return selected if limit is None else selected[:limit]
+
+
+def get_collection(
+        collection, field=None, value=None, limit=None, start_after=None,
+        filters=None, field_paths=None):
+    """
+    Returns entries in a collection, optionally restricted to entries whose
+    fields equal the values in `filters` and paged in id order by `limit`
+    and `start_after`.
+
+    :param collection: str, name of collection
+    :param field: str, optional field to filter on
+    :param value: str, value `field` must equal
+    :param limit: int, optional maximum number of entries
+    :param start_after: str, optional id to start after when paging
+    :param filters: dict, optional field names and values entries must equal
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: dict, entries keyed by id
+    """
+    _inject()
+    collection_obj = {
+        entry_id: _project(entry, field_paths) for entry_id, entry in
+        _select(collection, field, value, limit, start_after, filters)}
+    if collection_obj:
+        return collection_obj
+    else:
+        raise CollectionNotFound(collection)
+
+
+def stream_collection(
+        collection, field=None, value=None, filters=None, field_paths=None):
+    """
+    Yields the entries matching at the time of the call, one at a time. An
+    empty or missing collection yields nothing.
+
+    :param collection: str, name of collection
+    :param field: str, optional field to filter on
+    :param value: str, value `field` must equal
+    :param filters: dict, optional field names and values entries must equal
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: generator of (str, dict), entry id and entry data
+    """
+    _inject()
+    for entry_id, entry in _select(
+            collection, field, value, filters=filters):
+        yield entry_id, _project(entry, field_paths)
+
+
+def get_entry(collection, entry_id, field_paths=None):
+    _inject()
+    with _lock:
+        entry = _collections.get(collection, {}).get(entry_id)
+        if entry is None:
+            raise EntryNotFound(entry_id, collection)
+        return _project(entry, field_paths)
+
+
+def get_entries(collection, entry_ids, field_paths=None):
+    """
+    Reads many entries by id.
+
+    :param collection: str, name of collection
+    :param entry_ids: list of str, ids of entries to read
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: tuple of (dict, list), entries found keyed by id in the order
+        requested, and ids not found
+    """
+    _inject()
+    with _lock:
+        entries = _collections.get(collection, {})
+        found = {
+            i: _project(entries[i], field_paths)
+            for i in entry_ids if i in entries}
+    missing = [i for i in entry_ids if i not in found]
+    return found, missing
+
+
+def add_entry(collection, data, verify=False):
+    """
+    Creates an entry and returns it as written.
+
+    :param collection: str, name of collection
+    :param data: dict, entry data including its id
+    :param verify: bool, accepted for parity with the Firestore client;
+        the entry is always returned as stored
+    :return: dict, entry keyed by its id
+    """
+    _inject()
+    entry_id = data.pop('id', None)
+    if entry_id is None:
+        raise ValidationError(["id"], "missing")
+    with _lock:
+        entries = _collections.setdefault(collection, {})
+        if entry_id in entries:
+            raise EntryAlreadyExists(entry_id, collection)
+        entries[entry_id] = copy.deepcopy(data)
+    return {entry_id: {**copy.deepcopy(data), "id": entry_id}}
+
+
+def add_entries(collection, entries):
+    """
+    Creates entries in chunks of up to BATCH_LIMIT. A chunk holding an
+    existing id fails every entry in it without affecting the others.
+
+    :param collection: str, name of collection
+    :param entries: list of dict, entry data including ids
+    :return: tuple of (dict, dict), entries written keyed by id, and
+        <springapi.exceptions.HttpError> keyed by id for entries which were
+        not written
+    """
+    _inject()
+    added, failed = {}, {}
+    for start in range(0, len(entries), BATCH_LIMIT):
+        chunk = {}
+        for data in entries[start:start + BATCH_LIMIT]:
+            data = copy.deepcopy(data)
+            entry_id = data.pop('id', None)
+            if entry_id is None:
+                raise ValidationError(["id"], "missing")
+            chunk[entry_id] = data
+        with _lock:
+            stored = _collections.setdefault(collection, {})
+            if any(entry_id in stored for entry_id in chunk):
+                failed.update({
+                    entry_id: EntryAlreadyExists(entry_id, collection)
+                    for entry_id in chunk})
+                continue
+            stored.update(copy.deepcopy(chunk))
+        for entry_id, data in chunk.items():
+            added[entry_id] = {**data, "id": entry_id}
+    return added, failed
+
+
+def update_entry(collection, data, entry_id):
+    _inject()
+    data.pop('id', None)
+    with _lock:
+        entry = _collections.get(collection, {}).get(entry_id)
+        if entry is None:
+            raise EntryNotFound(entry_id, collection)
+        _collections[collection][entry_id] = {
+            **entry, **copy.deepcopy(data)}
+    return {'success': f'{entry_id} updated in {collection}'}
+
+
+def update_entries(collection, entry_ids, data):
+    """
+    Applies the same update to many entries.
+
+    :param collection: str, name of collection
+    :param entry_ids: list of str, ids of entries to update
+    :param data: dict, fields to set on every entry
+    :return: tuple of (list, list), ids updated and ids not found
+    """
+    _inject()
+    updated, missing = [], []
+    with _lock:
+        entries = _collections.get(collection, {})
+        for entry_id in entry_ids:
+            if entry_id in entries:
+                entries[entry_id] = {
+                    **entries[entry_id], **copy.deepcopy(data)}
+                updated.append(entry_id)
+            else:
+                missing.append(entry_id)
+    return updated, missing
+
+
+def delete_entry(collection, entry_id):
+    _inject()
+    with _lock:
+        _collections.get(collection, {}).pop(entry_id, None)
+    return {'success': f'{entry_id} deleted from {collection}'}
+
+
+def delete_entries(collection, entry_ids):
+    _inject()
+    with _lock:
+        entries = _collections.get(collection, {})
+        for entry_id in entry_ids:
+            entries.pop(entry_id, None)
+    return {'success': f'{len(entry_ids)} deleted from {collection}'}
+
+
+def get_email_addresses():
+    """
+    Returns the authorized email addresses, stored as the ids of entries in
+    EMAIL_COLLECTION.
+    """
+    _inject()
+    with _lock:
+        return list(_collections.get(EMAIL_COLLECTION, {}))
+
+
+def email_address_exists(email):
+    _inject()
+    with _lock:
+        return email.lower() in _collections.get(EMAIL_COLLECTION, {})
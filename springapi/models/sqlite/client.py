@@ -0,0 +1,329 @@
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from springapi.exceptions import (
+    CollectionNotFound, EntryAlreadyExists, EntryNotFound, HttpError,
+    ValidationError)
+
+
+BATCH_LIMIT = 500
+BUSY_TIMEOUT = 5.0
+CACHED_STATEMENTS = 256
+EMAIL_COLLECTION = "emails"
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL"
+]
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_local = threading.local()
+_database = None
+_generation = 0
+
+
+def configure_client(database):
+    """
+    Sets the SQLite database file which entries are stored in. Each thread
+    opens its own connection on next use.
+
+    :param database: str, path of the database file
+    :return: None
+    """
+    global _database, _generation
+    _database = database
+    _generation += 1
+
+
+def get_client():
+    """
+    Returns this thread's connection to the configured database. It is
+    opened once per thread, and opened again in a forked worker. The
+    connection is in autocommit mode; writes of many rows are wrapped in
+    explicit transactions.
+
+    :return: obj <sqlite3.Connection>
+    """
+    key = (_database, _generation, os.getpid())
+    if getattr(_local, "key", None) != key:
+        if _database is None:
+            raise RuntimeError("SQLite database has not been configured")
+        connection = sqlite3.connect(
+            _database, timeout=BUSY_TIMEOUT, isolation_level=None,
+            cached_statements=CACHED_STATEMENTS)
+        for pragma in PRAGMAS:
+            connection.execute(pragma)
+        _local.connection, _local.key = connection, key
+    return _local.connection
+
+
+@contextlib.contextmanager
+def _transaction(connection):
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def _field(name):
+    # Field names are written into the SQL so that the expression matches
+    # the indexes in schema.sql; only plain names are accepted.
+    if not FIELD_NAME.match(name):
+        raise ValidationError([name], "invalid")
+    return f"json_extract(data, '$.{name}')"
+
+
+def _select(
+        collection, field=None, value=None, limit=None, start_after=None,
+        filters=None):
+    conditions = dict(filters or {})
+    if field and value:
+        conditions[field] = f'{value}'
+    clauses, params = ["collection = ?"], [collection]
+    for name, filter_value in conditions.items():
+        clauses.append(f"{_field(name)} = ?")
+        params.append(filter_value)
+    if start_after is not None:
+        clauses.append("id > ?")
+        params.append(start_after)
+    sql = f"SELECT id, data FROM entries WHERE {' AND '.join(clauses)} " \
+        "ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def _load(data, field_paths=None):
+    entry = json.loads(data)
+    if field_paths is None:
+        return entry
+    return {f: entry[f] for f in field_paths if f in entry}
+
+
+def get_collection(
+        collection, field=None, value=None, limit=None, start_after=None,
+        filters=None, field_paths=None):
+    """
+    Returns entries in a collection, optionally restricted to entries whose
+    fields equal the values in `filters` and paged in id order by `limit`
+    and `start_after`.
+
+    :param collection: str, name of collection
+    :param field: str, optional field to filter on
+    :param value: str, value `field` must equal
+    :param limit: int, optional maximum number of entries
+    :param start_after: str, optional id to start after when paging
+    :param filters: dict, optional field names and values entries must equal
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: dict, entries keyed by id
+    """
+    sql, params = _select(
+        collection, field, value, limit, start_after, filters)
+    collection_obj = {
+        entry_id: _load(data, field_paths)
+        for entry_id, data in get_client().execute(sql, params)}
+    if collection_obj:
+        return collection_obj
+    else:
+        raise CollectionNotFound(collection)
+
+
+def stream_collection(
+        collection, field=None, value=None, filters=None, field_paths=None):
+    """
+    Yields entries one at a time as rows are read, so that the collection
+    is never held in memory at once. An empty or missing collection yields
+    nothing.
+
+    :param collection: str, name of collection
+    :param field: str, optional field to filter on
+    :param value: str, value `field` must equal
+    :param filters: dict, optional field names and values entries must equal
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: generator of (str, dict), entry id and entry data
+    """
+    sql, params = _select(collection, field, value, filters=filters)
+    for entry_id, data in get_client().execute(sql, params):
+        yield entry_id, _load(data, field_paths)
+
+
+def get_entry(collection, entry_id, field_paths=None):
+    row = get_client().execute(
+        "SELECT data FROM entries WHERE collection = ? AND id = ?",
+        (collection, entry_id)).fetchone()
+    if row is None:
+        raise EntryNotFound(entry_id, collection)
+    return _load(row[0], field_paths)
+
+
+def get_entries(collection, entry_ids, field_paths=None):
+    """
+    Reads many entries by id with one query per chunk of up to
+    BATCH_LIMIT ids.
+
+    :param collection: str, name of collection
+    :param entry_ids: list of str, ids of entries to read
+    :param field_paths: list, optional fields to read, others are omitted
+    :return: tuple of (dict, list), entries found keyed by id in the order
+        requested, and ids not found
+    """
+    client = get_client()
+    rows = {}
+    for start in range(0, len(entry_ids), BATCH_LIMIT):
+        chunk = entry_ids[start:start + BATCH_LIMIT]
+        placeholders = ", ".join("?" * len(chunk))
+        rows.update(client.execute(
+            "SELECT id, data FROM entries "
+            f"WHERE collection = ? AND id IN ({placeholders})",
+            [collection, *chunk]))
+    found = {i: _load(rows[i], field_paths) for i in entry_ids if i in rows}
+    missing = [i for i in entry_ids if i not in rows]
+    return found, missing
+
+
+def add_entry(collection, data, verify=False):
+    """
+    Creates an entry and returns it as written. Unless `verify` is set, the
+    entry is built from `data` rather than read back.
+
+    :param collection: str, name of collection
+    :param data: dict, entry data including its id
+    :param verify: bool, read the entry back once after writing it
+    :return: dict, entry keyed by its id
+    """
+    entry_id = data.pop('id', None)
+    if entry_id is None:
+        raise ValidationError(["id"], "missing")
+    try:
+        get_client().execute(
+            "INSERT INTO entries (collection, id, data) VALUES (?, ?, ?)",
+            (collection, entry_id, json.dumps(data)))
+    except sqlite3.IntegrityError:
+        raise EntryAlreadyExists(entry_id, collection)
+    if verify:
+        added = {entry_id: get_entry(collection, entry_id)}
+    else:
+        added = {entry_id: dict(data)}
+    added[entry_id].update({"id": entry_id})
+    return added
+
+
+def add_entries(collection, entries):
+    """
+    Creates entries in chunked transactions of up to BATCH_LIMIT inserts.
+    A failed chunk fails every entry in it without affecting the others.
+
+    :param collection: str, name of collection
+    :param entries: list of dict, entry data including ids
+    :return: tuple of (dict, dict), entries written keyed by id, and
+        <springapi.exceptions.HttpError> keyed by id for entries which were
+        not written
+    """
+    client = get_client()
+    added, failed = {}, {}
+    for start in range(0, len(entries), BATCH_LIMIT):
+        chunk = {}
+        for data in entries[start:start + BATCH_LIMIT]:
+            data = dict(data)
+            entry_id = data.pop('id', None)
+            if entry_id is None:
+                raise ValidationError(["id"], "missing")
+            chunk[entry_id] = data
+        try:
+            with _transaction(client):
+                client.executemany(
+                    "INSERT INTO entries (collection, id, data) "
+                    "VALUES (?, ?, ?)",
+                    [(collection, entry_id, json.dumps(data))
+                     for entry_id, data in chunk.items()])
+        except sqlite3.IntegrityError:
+            failed.update({
+                entry_id: EntryAlreadyExists(entry_id, collection)
+                for entry_id in chunk})
+            continue
+        except sqlite3.Error as err:
+            error = HttpError("write_failed", str(err), 500)
+            failed.update({entry_id: error for entry_id in chunk})
+            continue
+        for entry_id, data in chunk.items():
+            added[entry_id] = {**data, "id": entry_id}
+    return added, failed
+
+
+def update_entry(collection, data, entry_id):
+    data.pop('id', None)
+    cursor = get_client().execute(
+        "UPDATE entries SET data = json_patch(data, ?) "
+        "WHERE collection = ? AND id = ?",
+        (json.dumps(data), collection, entry_id))
+    if cursor.rowcount == 0:
+        raise EntryNotFound(entry_id, collection)
+    return {'success': f'{entry_id} updated in {collection}'}
+
+
+def update_entries(collection, entry_ids, data):
+    """
+    Applies the same update to many entries in one transaction per chunk
+    of up to BATCH_LIMIT ids.
+
+    :param collection: str, name of collection
+    :param entry_ids: list of str, ids of entries to update
+    :param data: dict, fields to set on every entry
+    :return: tuple of (list, list), ids updated and ids not found
+    """
+    client = get_client()
+    patch = json.dumps(data)
+    updated, missing = [], []
+    for start in range(0, len(entry_ids), BATCH_LIMIT):
+        with _transaction(client):
+            for entry_id in entry_ids[start:start + BATCH_LIMIT]:
+                cursor = client.execute(
+                    "UPDATE entries SET data = json_patch(data, ?) "
+                    "WHERE collection = ? AND id = ?",
+                    (patch, collection, entry_id))
+                if cursor.rowcount:
+                    updated.append(entry_id)
+                else:
+                    missing.append(entry_id)
+    return updated, missing
+
+
+def delete_entry(collection, entry_id):
+    get_client().execute(
+        "DELETE FROM entries WHERE collection = ? AND id = ?",
+        (collection, entry_id))
+    return {'success': f'{entry_id} deleted from {collection}'}
+
+
+def delete_entries(collection, entry_ids):
+    client = get_client()
+    for start in range(0, len(entry_ids), BATCH_LIMIT):
+        with _transaction(client):
+            client.executemany(
+                "DELETE FROM entries WHERE collection = ? AND id = ?",
+                [(collection, entry_id)
+                 for entry_id in entry_ids[start:start + BATCH_LIMIT]])
+    return {'success': f'{len(entry_ids)} deleted from {collection}'}
+
+
+def get_email_addresses():
+    """
+    Returns the authorized email addresses, stored as the ids of entries in
+    EMAIL_COLLECTION.
+    """
+    return [entry_id for entry_id, in get_client().execute(
+        "SELECT id FROM entries WHERE collection = ?", (EMAIL_COLLECTION,))]
+
+
+def email_address_exists(email):
+    row = get_client().execute(
+        "SELECT 1 FROM entries WHERE collection = ? AND id = ?",
+        (EMAIL_COLLECTION, email.lower())).fetchone()
+    return row is not None
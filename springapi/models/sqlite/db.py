@@ -1,33 +1,23 @@
-import sqlite3
+import os
 
-from flask import current_app, g
+from springapi.models.sqlite import client
 
 
-def get_db():
-    if 'db' not in g:
-        g.db = sqlite3.connect(
-            current_app.config['TOKEN_DB'],
-            detect_types=sqlite3.PARSE_DECLTYPES)
-        g.db.row_factory = sqlite3.Row
+SCHEMA = os.path.join(os.path.dirname(__file__), "schema.sql")
 
-    return g.db
 
+def init_db(database):
+    """
+    Points the SQLite client at `database` and creates its tables and
+    indexes if they do not exist yet. Stored entries are kept.
 
-def init_db():
-    db = get_db()
-
-    with current_app.open_resource('models/sqlite/schema.sql') as f:
-        db.executescript(f.read().decode('utf8'))
-
-
-def close_db(e=None):
-    db = g.pop('db', None)
-
-    if db is not None:
-        db.close()
+    :param database: str, path of the database file
+    :return: None
+    """
+    client.configure_client(database)
+    with open(SCHEMA) as f:
+        client.get_client().executescript(f.read())
 
 
 def init_app(app):
-    app.teardown_appcontext(close_db)
-    with app.app_context():
-        init_db()
+    init_db(app.config['SQLITE_DB'])
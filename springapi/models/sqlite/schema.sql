@@ -1,6 +1,12 @@
-DROP TABLE IF EXISTS token;
-
-CREATE TABLE token (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  api_token TEXT UNIQUE NOT NULL
+CREATE TABLE IF NOT EXISTS entries (
+  collection TEXT NOT NULL,
+  id TEXT NOT NULL,
+  data TEXT NOT NULL,
+  PRIMARY KEY (collection, id)
 );
+
+CREATE INDEX IF NOT EXISTS entries_is_approved
+  ON entries (collection, json_extract(data, '$.isApproved'), id);
+
+CREATE INDEX IF NOT EXISTS entries_location
+  ON entries (collection, json_extract(data, '$.location'), id);
@@ -1,11 +1,19 @@
-import springapi.models.firebase.client as client
-from springapi.exceptions import ValidationError
+from springapi.exceptions import (
+    CollectionNotFound, EntryNotFound, HttpError, ValidationError)
+from springapi.helpers import run_in_executor
+import springapi.models.firebase.aio_client as firebase_aio_client
+import springapi.models.firebase.client as firebase_client
+from springapi.models.backends import SUBMISSION, get_backend
+from springapi.models.firebase.view import CollectionView
 from springapi.models.helpers import (
-    ApiObjectModel, create_uid, validate_data, set_defaults)
-from typing import Dict, List, Any
+    ApiObjectModel, create_uid, decode_cursor, encode_cursor, parse_filters,
+    parse_projection, validate_data, validate_partial_data, set_defaults)
+from typing import Dict, Iterator, List, Any, Mapping, Optional, Tuple
 
 
 COLLECTION = 'submissions'
+FILTER_FIELDS = ('allowSharing', 'allowSNS', 'isApproved', 'location')
+VIEW_INDEXES = ('isApproved', 'location')
 
 
 class Submission(ApiObjectModel):
@@ -25,35 +33,226 @@ class Submission(ApiObjectModel):
         self.fields = field_data
 
     @classmethod
-    def get_submissions(cls) -> List["ApiObjectModel"]:
-        response = client.get_collection(COLLECTION)
-        submissions = []
-        for result_id, result in response.items():
+    def parse_filters(cls, params: Mapping[str, str]) -> Dict[str, Any]:
+        """
+        Returns typed equality filters for the FILTER_FIELDS present in
+        `params`, ignoring any other parameters.
+        """
+        return parse_filters(
+            {f: params[f] for f in FILTER_FIELDS if f in params}, cls._fields)
+
+    @classmethod
+    def parse_projection(
+            cls, value: Optional[str]) -> Optional[List[str]]:
+        """
+        Returns the fields named in a comma-separated `value`, or None to
+        read whole submissions.
+        """
+        return parse_projection(value, cls._fields)
+
+    @classmethod
+    def start_view(cls) -> CollectionView:
+        """
+        Starts listening for changes to submissions. Once the initial
+        snapshot has arrived, get_submissions and get_submission are served
+        from memory while the listener is active. A stopped listener is
+        restarted on a later read.
+        """
+        SUBMISSION_VIEW.start()
+        return SUBMISSION_VIEW
+
+    @classmethod
+    def get_view(cls) -> CollectionView:
+        return SUBMISSION_VIEW
+
+    @classmethod
+    def get_view_version(cls) -> Optional[str]:
+        """
+        The version of the submissions get_submissions and get_submission
+        serve from the view, or None while they are read from the backend.
+        """
+        if not _view_serving():
+            return None
+        return SUBMISSION_VIEW.version
+
+    @classmethod
+    def get_submissions(
+            cls, filters: Optional[Dict[str, Any]] = None,
+            projection: Optional[List[str]] = None
+    ) -> List["ApiObjectModel"]:
+        field_paths = _field_paths(projection)
+        if _view_serving():
+            response = SUBMISSION_VIEW.query(filters, field_paths)
+            if not response:
+                raise CollectionNotFound(COLLECTION)
+        else:
+            response = _client().get_collection(
+                COLLECTION, filters=filters, field_paths=field_paths)
+        return _submissions_from_results(response, projection)
+
+    @classmethod
+    async def get_submissions_async(
+            cls, filters: Optional[Dict[str, Any]] = None,
+            projection: Optional[List[str]] = None
+    ) -> List["ApiObjectModel"]:
+        """
+        As get_submissions, awaiting Firestore's AsyncClient rather than
+        blocking a thread. Other backends are read on the executor.
+        """
+        if get_backend(SUBMISSION) is not firebase_client:
+            return await run_in_executor(
+                cls.get_submissions, filters, projection)
+        field_paths = _field_paths(projection)
+        if SUBMISSION_VIEW.serving():
+            response = SUBMISSION_VIEW.query(filters, field_paths)
+            if not response:
+                raise CollectionNotFound(COLLECTION)
+        else:
+            response = await firebase_aio_client.get_collection(
+                COLLECTION, filters=filters, field_paths=field_paths)
+        return _submissions_from_results(response, projection)
+
+    @classmethod
+    def stream_submissions(
+            cls, filters: Optional[Dict[str, Any]] = None,
+            projection: Optional[List[str]] = None
+    ) -> Iterator["ApiObjectModel"]:
+        """
+        Yields valid submissions one at a time as they are read, skipping
+        invalid entries in the same way as get_submissions.
+        """
+        results = _client().stream_collection(
+            COLLECTION, filters=filters, field_paths=_field_paths(projection))
+        for result_id, result in results:
             result["id"] = result_id
             try:
-                submissions.append(Submission.from_json(result))
+                yield Submission.from_json(result, projection)
             except ValidationError:
                 continue
-        return submissions
 
     @classmethod
-    def get_submission(cls, entry_id: str) -> "ApiObjectModel":
-        response = client.get_entry(COLLECTION, entry_id)
+    def get_submissions_page(
+            cls, limit: int, cursor: Optional[str] = None,
+            filters: Optional[Dict[str, Any]] = None,
+            projection: Optional[List[str]] = None
+    ) -> Tuple[List["ApiObjectModel"], Optional[str]]:
+        """
+        Returns up to `limit` submissions ordered by id, starting after the
+        entry encoded in `cursor`, along with the cursor for the next page.
+        The next cursor is None once the last page has been returned.
+        """
+        start_after = decode_cursor(cursor) if cursor else None
+        try:
+            response = _client().get_collection(
+                COLLECTION, limit=limit, start_after=start_after,
+                filters=filters, field_paths=_field_paths(projection))
+        except CollectionNotFound:
+            if start_after is None:
+                raise
+            response = {}
+        next_cursor = None
+        if len(response) == limit:
+            next_cursor = encode_cursor(list(response)[-1])
+        return _submissions_from_results(response, projection), next_cursor
+
+    @classmethod
+    def get_submission(
+            cls, entry_id: str, projection: Optional[List[str]] = None
+    ) -> "ApiObjectModel":
+        field_paths = _field_paths(projection)
+        if _view_serving():
+            entry = SUBMISSION_VIEW.get(entry_id, field_paths)
+            if entry is None:
+                raise EntryNotFound(entry_id, COLLECTION)
+            response = entry
+        else:
+            response = _client().get_entry(
+                COLLECTION, entry_id, field_paths=field_paths)
         response["id"] = entry_id
-        submission = Submission.from_json(response)
+        submission = Submission.from_json(response, projection)
         return submission
 
+    @classmethod
+    async def get_submission_async(
+            cls, entry_id: str, projection: Optional[List[str]] = None
+    ) -> "ApiObjectModel":
+        """
+        As get_submission, awaiting Firestore's AsyncClient rather than
+        blocking a thread. Other backends are read on the executor.
+        """
+        if get_backend(SUBMISSION) is not firebase_client:
+            return await run_in_executor(
+                cls.get_submission, entry_id, projection)
+        field_paths = _field_paths(projection)
+        if SUBMISSION_VIEW.serving():
+            entry = SUBMISSION_VIEW.get(entry_id, field_paths)
+            if entry is None:
+                raise EntryNotFound(entry_id, COLLECTION)
+            response = entry
+        else:
+            response = await firebase_aio_client.get_entry(
+                COLLECTION, entry_id, field_paths=field_paths)
+        response["id"] = entry_id
+        return Submission.from_json(response, projection)
+
+    @classmethod
+    def get_submissions_by_ids(
+            cls, entry_ids: List[str], projection: Optional[List[str]] = None
+    ) -> Tuple[List["ApiObjectModel"], List[str]]:
+        """
+        Returns the valid submissions found for `entry_ids`, in the order
+        requested, along with the ids which were not found.
+        """
+        found, missing = _client().get_entries(
+            COLLECTION, list(dict.fromkeys(entry_ids)),
+            field_paths=_field_paths(projection))
+        return _submissions_from_results(found, projection), missing
+
     @classmethod
     def create_submission(cls, data: Dict[str, Any]) -> "ApiObjectModel":
         data["id"] = create_uid()
         validate_data(data, cls._fields)
         data = set_defaults(data, cls._fields)
 
-        response = client.add_entry(COLLECTION, data.copy())
+        response = _client().add_entry(COLLECTION, data.copy())
         result = response[data["id"]]
         result.setdefault("id", data["id"])
         return Submission.from_json(result)
 
+    @classmethod
+    def create_submissions(
+            cls, items: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Validates every item and creates the valid ones in batched writes.
+        Returns one result per item, in order, holding its status code and
+        either the created submission or the error which prevented it.
+        """
+        results: List[Dict[str, Any]] = []
+        valid = []
+        for index, data in enumerate(items):
+            try:
+                if not isinstance(data, dict):
+                    raise ValidationError(
+                        [[index, type(data), dict]], "type")
+                data = dict(data, id=create_uid())
+                validate_data(data, cls._fields)
+                valid.append(set_defaults(data, cls._fields))
+                results.append({"index": index, "id": data["id"]})
+            except ValidationError as err:
+                results.append(_error_result(index, err))
+
+        added, failed = _client().add_entries(COLLECTION, valid)
+        for i, result in enumerate(results):
+            entry_id = result.get("id")
+            if entry_id in added:
+                submission = Submission.from_json(added[entry_id])
+                results[i] = {
+                    "index": result["index"], "status": 201,
+                    "submission": submission.to_json()}
+            elif entry_id in failed:
+                results[i] = _error_result(result["index"], failed[entry_id])
+        return results
+
     @classmethod
     def update_submission(
             cls, entry_id: str, data: Dict[str, Any]) -> "ApiObjectModel":
@@ -61,5 +260,87 @@ class Submission(ApiObjectModel):
         validate_data(data, cls._fields)
         data = set_defaults(data, cls._fields)
 
-        response = client.update_entry(COLLECTION, data.copy(), entry_id)
+        response = _client().update_entry(COLLECTION, data.copy(), entry_id)
+        return response
+
+    @classmethod
+    def patch_submission(
+            cls, entry_id: str, data: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Sets only the fields supplied in `data`, leaving the others as they
+        are stored.
+        """
+        if not isinstance(data, dict):
+            raise ValidationError([["body", type(data), dict]], "type")
+        if not data:
+            raise ValidationError(["body"], "missing")
+        validate_partial_data(data, _patch_fields())
+
+        response = _client().update_entry(COLLECTION, data.copy(), entry_id)
         return response
+
+    @classmethod
+    def update_submissions(
+            cls, entry_ids: List[str], patch: Dict[str, Any]
+    ) -> Dict[str, List[str]]:
+        """
+        Sets the fields in `patch` on every submission in `entry_ids`. The
+        patch is validated once; the ids that were not found are reported
+        rather than failing the whole update.
+        """
+        if not isinstance(entry_ids, list) or not all(
+                isinstance(i, str) for i in entry_ids):
+            raise ValidationError([["ids", type(entry_ids), list]], "type")
+        if not isinstance(patch, dict):
+            raise ValidationError([["patch", type(patch), dict]], "type")
+        if not patch:
+            raise ValidationError(["patch"], "missing")
+        validate_partial_data(patch, _patch_fields())
+
+        entry_ids = list(dict.fromkeys(entry_ids))
+        updated, missing = _client().update_entries(
+            COLLECTION, entry_ids, patch)
+        return {"updated": updated, "missing": missing}
+
+
+def _view_serving() -> bool:
+    # The view mirrors Firestore, so it only answers for submissions stored
+    # there.
+    return get_backend(SUBMISSION) is firebase_client \
+        and SUBMISSION_VIEW.serving()
+
+
+def _client():
+    return get_backend(SUBMISSION)
+
+
+def _error_result(index: int, err: HttpError) -> Dict[str, Any]:
+    return {
+        "index": index, "status": err.code,
+        "error": err.error_response_body()}
+
+
+def _patch_fields() -> Dict[str, Any]:
+    return {k: v for k, v in Submission._fields.items() if k != "id"}
+
+
+def _field_paths(projection: Optional[List[str]]) -> Optional[List[str]]:
+    if projection is None:
+        return None
+    return [f for f in projection if f != "id"]
+
+
+def _submissions_from_results(
+        response: Dict[str, Dict[str, Any]],
+        projection: Optional[List[str]] = None) -> List["ApiObjectModel"]:
+    submissions = []
+    for result_id, result in response.items():
+        result["id"] = result_id
+        try:
+            submissions.append(Submission.from_json(result, projection))
+        except ValidationError:
+            continue
+    return submissions
+
+
+SUBMISSION_VIEW = CollectionView(COLLECTION, VIEW_INDEXES)
@@ -1,18 +1,27 @@
-import springapi.models.firebase.client as client
+import time
 
-from typing import Dict, List, Any
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple, Union
 
-from springapi.exceptions import ValidationError
+from springapi.exceptions import (
+    CollectionNotFound, EntryAlreadyExists, EntryNotFound, ValidationError)
+from springapi.models.backends import TOKEN, get_backend
+from springapi.models.cache import HashedSetCache, hash_value
 from springapi.models.helpers import (
-    ApiObjectModel, create_uid, set_defaults, validate_data)
+    ApiObjectModel, set_defaults, validate_data)
 
 
 COLLECTION = "tokens"
+REVOKED_COLLECTION = "revoked_tokens"
+TOKEN_INDEX_TTL = 300
+TOKENS_PER_EMAIL = 5
 
 
 class Token(ApiObjectModel):
 
     _fields = {
+        "email": {"isRequired": False, "type": str, "default": ""},
+        "expires": {"isRequired": False, "type": int, "default": 0},
         "id": {"isRequired": True, "type": str, "default": ""},
         "token": {"isRequired": True, "type": str, "default": ""}
     }
@@ -23,7 +32,7 @@ class Token(ApiObjectModel):
 
     @classmethod
     def get_tokens(cls) -> List["ApiObjectModel"]:
-        response = client.get_collection(COLLECTION)
+        response = _client().get_collection(COLLECTION)
         tokens = []
         for result_id, result in response.items():
             result["id"] = result_id
@@ -33,17 +42,225 @@ class Token(ApiObjectModel):
                 continue
         return tokens
 
+    @classmethod
+    def get_token(cls, token: str) -> "ApiObjectModel":
+        entry_id = hash_value(token)
+        response = _client().get_entry(COLLECTION, entry_id)
+        response["id"] = entry_id
+        return Token.from_json(response)
+
+    @classmethod
+    def token_exists(cls, token: str) -> bool:
+        try:
+            result = cls.get_token(token).to_json()
+        except (EntryNotFound, ValidationError):
+            return False
+        return not _is_expired(result, time.time())
+
+    @classmethod
+    def token_expiry(cls, token: str) -> Union[bool, int]:
+        """
+        Returns False if `token` is not stored or has expired, otherwise its
+        expiry, or True if it does not expire.
+        """
+        try:
+            result = cls.get_token(token).to_json()
+        except (EntryNotFound, ValidationError):
+            return False
+        if _is_expired(result, time.time()):
+            return False
+        return _expires(result) or True
+
+    @classmethod
+    def get_valid_tokens(cls) -> HashedSetCache:
+        return TOKEN_INDEX
+
+    @classmethod
+    def get_revoked_tokens(cls) -> HashedSetCache:
+        return REVOKED_INDEX
+
     @classmethod
     def create_token(cls, data: Dict[str, Any]) -> "ApiObjectModel":
-        data["id"] = create_uid()
+        token = data.get("token")
+        data["id"] = hash_value(token) if isinstance(token, str) else ""
         validate_data(data, cls._fields)
         data = set_defaults(data, cls._fields)
 
-        response = client.add_entry(COLLECTION, data.copy())
+        try:
+            response = _client().add_entry(COLLECTION, data.copy())
+        except EntryAlreadyExists:
+            response = {data["id"]: data.copy()}
+        TOKEN_INDEX.add(data["token"], data["expires"])
         result = response[data["id"]]
         result.setdefault("id", data["id"])
         return Token.from_json(result)
 
     @classmethod
-    def delete_token(cls, token: str) -> "ApiObjectModel":
-        pass
+    def revoke_token(
+            cls, token: str, expires: int = 0) -> "ApiObjectModel":
+        """
+        Adds `token` to the revocation set and deletes it from the stored
+        tokens, so it is rejected in both verification modes. Only the
+        token's digest is stored. Once `expires` has passed the token is
+        rejected anyway, and compact_tokens drops the revocation; 0 keeps it
+        for good.
+        """
+        data = {"id": hash_value(token), "expires": expires}
+        validate_data(data, _REVOKED_FIELDS)
+
+        try:
+            _client().add_entry(REVOKED_COLLECTION, data.copy())
+        except EntryAlreadyExists:
+            pass
+        REVOKED_INDEX.add(token, expires)
+        cls.delete_token(token)
+        return Token.from_json({**data, "token": token})
+
+    @classmethod
+    def delete_token(cls, token: str) -> Dict[str, str]:
+        """
+        Deletes a stored token. Other processes keep accepting it until
+        their TOKEN_INDEX reloads, at most TOKEN_INDEX_TTL seconds later.
+        """
+        response = _client().delete_entry(COLLECTION, hash_value(token))
+        TOKEN_INDEX.discard(token)
+        return response
+
+    @classmethod
+    def compact_tokens(
+            cls, now: Optional[float] = None,
+            keep_per_email: int = TOKENS_PER_EMAIL) -> Dict[str, int]:
+        """
+        Batch-deletes expired tokens, tokens superseded by at least
+        `keep_per_email` newer tokens for the same email, and revocations
+        of tokens which have since expired.
+
+        :param now: float, timestamp to compare expiry against
+        :param keep_per_email: int, number of live tokens kept per email
+        :return: dict, number of expired and superseded tokens and of
+            revocations deleted
+        """
+        now = time.time() if now is None else now
+        revoked = _compact_revocations(now)
+        try:
+            response = _client().get_collection(COLLECTION)
+        except CollectionNotFound:
+            return {"expired": 0, "superseded": 0, "revoked": revoked}
+
+        expired = []
+        by_email: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for entry_id, entry in response.items():
+            if _is_expired(entry, now):
+                expired.append(entry_id)
+            elif isinstance(entry.get("email"), str) and entry["email"]:
+                by_email[entry["email"]].append({**entry, "id": entry_id})
+
+        superseded = []
+        for entries in by_email.values():
+            entries.sort(key=lambda e: e.get("expires", 0), reverse=True)
+            superseded += [e["id"] for e in entries[keep_per_email:]]
+
+        if expired or superseded:
+            _client().delete_entries(COLLECTION, expired + superseded)
+            TOKEN_INDEX.invalidate()
+        return {
+            "expired": len(expired), "superseded": len(superseded),
+            "revoked": revoked}
+
+    @classmethod
+    def migrate_token_ids(cls) -> Dict[str, int]:
+        """
+        Moves tokens stored under random ids to ids derived from the token
+        value, so they can be found with a single get, and drops the token
+        value from revocations. Safe to run again.
+
+        :return: dict, number of migrated entries per collection
+        """
+        return {c: _migrate_collection(c)
+                for c in (COLLECTION, REVOKED_COLLECTION)}
+
+
+_REVOKED_FIELDS = {f: Token._fields[f] for f in ("id", "expires")}
+
+
+def _client():
+    return get_backend(TOKEN)
+
+
+def _migrate_collection(collection: str) -> int:
+    try:
+        response = _client().get_collection(collection)
+    except CollectionNotFound:
+        return 0
+    migrated = 0
+    for entry_id, entry in response.items():
+        token = entry.get("token")
+        if not isinstance(token, str):
+            continue
+        data = {**entry, "id": hash_value(token)}
+        if collection == REVOKED_COLLECTION:
+            # Revocations keep only the digest of the token.
+            del data["token"]
+        elif entry_id == data["id"]:
+            continue
+        if entry_id == data["id"]:
+            _client().delete_entry(collection, entry_id)
+            _client().add_entry(collection, data)
+        else:
+            try:
+                _client().add_entry(collection, data)
+            except EntryAlreadyExists:
+                pass
+            _client().delete_entry(collection, entry_id)
+        migrated += 1
+    return migrated
+
+
+def _compact_revocations(now: float) -> int:
+    try:
+        response = _client().get_collection(REVOKED_COLLECTION)
+    except CollectionNotFound:
+        return 0
+    expired = [i for i, entry in response.items() if _is_expired(entry, now)]
+    if expired:
+        _client().delete_entries(REVOKED_COLLECTION, expired)
+        REVOKED_INDEX.invalidate()
+    return len(expired)
+
+
+def _is_expired(entry: Dict[str, Any], now: float) -> bool:
+    return 0 < _expires(entry) <= now
+
+
+def _load_token_values(collection: str) -> List[Tuple[str, int]]:
+    try:
+        response = _client().get_collection(collection)
+    except CollectionNotFound:
+        return []
+    now = time.time()
+    return [(r["token"], _expires(r)) for r in response.values()
+            if isinstance(r.get("token"), str) and not _is_expired(r, now)]
+
+
+def _load_revoked_keys() -> List[Tuple[str, int]]:
+    try:
+        response = _client().get_collection(REVOKED_COLLECTION)
+    except CollectionNotFound:
+        return []
+    now = time.time()
+    # Revocations stored before only digests were kept hold the token.
+    return [(hash_value(r["token"]) if isinstance(r.get("token"), str)
+             else entry_id, _expires(r))
+            for entry_id, r in response.items() if not _is_expired(r, now)]
+
+
+def _expires(entry: Dict[str, Any]) -> int:
+    expires = entry.get("expires", 0)
+    return expires if isinstance(expires, int) else 0
+
+
+TOKEN_INDEX = HashedSetCache(
+    lambda: _load_token_values(COLLECTION), TOKEN_INDEX_TTL,
+    fallback=Token.token_expiry)
+REVOKED_INDEX = HashedSetCache(
+    _load_revoked_keys, TOKEN_INDEX_TTL, loads_keys=True)
@@ -1,7 +1,14 @@
-from springapi.config_helpers import VERSION
+from springapi.config_helpers import SUBMISSION_VIEW, VERSION
+from springapi.models.submission import Submission
 from springapi.routes.helpers import make_route
 
 
 @make_route(f"/api/{VERSION}/healthcheck", methods=['GET'])
 def healthcheck(config):
-    return {"success": True}, 200
+    body = {"success": True}
+    if config.get(SUBMISSION_VIEW):
+        view = Submission.get_view()
+        body["submissionView"] = {
+            "active": view.active,
+            "secondsSinceChange": view.since_last_change()}
+    return body, 200
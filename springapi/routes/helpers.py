@@ -1,10 +1,15 @@
 import functools
-from flask import request
+import hashlib
+from flask import Response, jsonify, request
 
+from springapi.config_helpers import (
+    KEY, TOKEN_VERIFICATION, TOKEN_VERIFICATION_JWT)
 from springapi.exceptions import (
     pretty_errors, MissingAuthorization, InvalidAuthHeaderValue,
     InvalidAuthorization)
+from springapi.models.firebase.retry import request_deadline
 from springapi.models.token import Token
+from springapi.utils.authorization import verify_api_token
 
 
 def make_route(*route_args, **route_kwargs):
@@ -46,14 +51,99 @@ def register(app, fn):
         :return: dict or exception
         """
 
-        return fn(app.config, **kwargs)
+        with request_deadline():
+            return fn(app.config, **kwargs)
 
     app.route(*fn.route_args, **fn.route_kwargs)(config_route)
 
 
+def conditional_response(body, code=200, etag=None):
+    """
+    Serializes `body` as JSON with a strong ETag computed from its content,
+    unless `etag` is given. A request whose If-None-Match matches the ETag
+    is answered with 304 and no body.
+
+    :param body: dict, response body
+    :param code: int, status code when the body is sent
+    :param etag: str, optional ETag of `body`
+    :return: obj <flask.Response>
+    """
+    response = jsonify(body)
+    response.status_code = code
+    response.set_etag(
+        etag or hashlib.sha256(response.get_data()).hexdigest())
+    return response.make_conditional(request)
+
+
+def version_etag(version, full_path=None):
+    """
+    Computes the ETag of the response to the current request from the
+    version of the data it reads, so that a matching If-None-Match can be
+    answered before reading. Responses to other query strings get other
+    ETags.
+
+    :param version: str, version of the data read, or None if unknown
+    :param full_path: str, path and query string, defaults to the request's
+    :return: str or None if `version` is None
+    """
+    if version is None:
+        return None
+    key = f"{version} {full_path or request.full_path}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def not_modified(etag):
+    """
+    Answers the current request with 304 if its If-None-Match matches
+    `etag`.
+
+    :param etag: str, ETag of the response, or None if unknown
+    :return: obj <flask.Response> or None if the response is needed
+    """
+    if etag is None or etag not in request.if_none_match:
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
 def get_valid_admin_tokens():
-    tokens = [t.to_json()["token"] for t in Token.get_tokens()]
-    return tokens
+    return Token.get_valid_tokens()
+
+
+def is_valid_admin_token(config, token):
+    """
+    Checks an API token either against stored tokens or, when
+    TOKEN_VERIFICATION is "jwt", by verifying the token locally.
+
+    :param config: dict, configuration
+    :param token: str, API token from Authorization header
+    :return: bool
+    """
+    if config.get(TOKEN_VERIFICATION) == TOKEN_VERIFICATION_JWT:
+        try:
+            verify_api_token(token, config[KEY])
+        except InvalidAuthorization:
+            return False
+        return True
+    return token in get_valid_admin_tokens()
+
+
+def bearer_token(headers):
+    """
+    Returns the API token of an Authorization header.
+
+    :param headers: mapping of request headers
+    :return: str
+    :raises MissingAuthorization: without an Authorization header
+    :raises InvalidAuthHeaderValue: if the header is not a bearer token
+    """
+    if "Authorization" not in headers:
+        raise MissingAuthorization()
+    auth_header_value = headers["Authorization"]
+    if not auth_header_value.startswith("Bearer "):
+        raise InvalidAuthHeaderValue()
+    return auth_header_value.split("Bearer ", 1)[1]
 
 
 def requires_admin(original_route):
@@ -66,14 +156,8 @@ def requires_admin(original_route):
     """
     @functools.wraps(original_route)
     def wrapper(config, *args, **kwargs):
-        if "Authorization" not in request.headers:
-            raise MissingAuthorization()
-        auth_header_value = request.headers["Authorization"]
-        if not auth_header_value.startswith("Bearer "):
-            raise InvalidAuthHeaderValue()
-        auth_token_value = auth_header_value.split("Bearer ", 1)[1]
-        tokens = get_valid_admin_tokens()
-        if auth_token_value not in tokens:
+        auth_token_value = bearer_token(request.headers)
+        if not is_valid_admin_token(config, auth_token_value):
             raise InvalidAuthorization()
         return original_route(config, *args, **kwargs)
     return wrapper
@@ -85,8 +169,7 @@ def checks_authentication(original_route):
             auth_header_value = request.headers["Authorization"]
             if auth_header_value.startswith("Bearer "):
                 auth_token_value = auth_header_value.split("Bearer ", 1)[1]
-                tokens = get_valid_admin_tokens()
-                if auth_token_value in tokens:
+                if is_valid_admin_token(config, auth_token_value):
                     return {"status": "Valid token found in request header"}
         return original_route(config, *args, **kwargs)
     return wrapper
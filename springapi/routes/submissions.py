@@ -1,27 +1,103 @@
 import json
 from springapi.exceptions import ValidationError
 from springapi.config_helpers import VERSION
-from springapi.routes.helpers import make_route, requires_admin
+from springapi.routes.helpers import (
+    conditional_response, make_route, not_modified, requires_admin,
+    version_etag)
 from springapi.models.submission import Submission
-from flask import request
+from flask import Response, request
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+MAX_BATCH_SIZE = 5000
+NDJSON = "application/x-ndjson"
+
+
+def _get_page_size():
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValidationError(["limit"], "invalid")
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValidationError(["limit"], "invalid")
+    return limit
+
+
+def _get_ids():
+    entry_ids = [i for i in request.args["ids"].split(",") if i]
+    if not entry_ids or len(entry_ids) > MAX_PAGE_SIZE:
+        raise ValidationError(["ids"], "invalid")
+    return entry_ids
+
+
+def _wants_stream():
+    if request.args.get("stream") == "1":
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON])
+    return best == NDJSON
+
+
+def _stream_submissions(filters, projection):
+    # The first submission is read before the response starts, so that an
+    # unavailable backend is answered with an error status rather than a
+    # 200 with a broken body.
+    submissions = Submission.stream_submissions(filters, projection)
+    first = next(submissions, None)
+
+    def generate():
+        if first is None:
+            return
+        yield json.dumps(first.to_json()) + "\n"
+        for submission in submissions:
+            yield json.dumps(submission.to_json()) + "\n"
+    return generate()
 
 
 @make_route(f"/api/{VERSION}/submissions", methods=['GET'])
 @requires_admin
 def get_all(config):
-    submissions = [s.to_json() for s in Submission.get_submissions()]
-    return {"submissions": submissions}, 200
+    filters = Submission.parse_filters(request.args)
+    projection = Submission.parse_projection(request.args.get("fields"))
+    if "ids" in request.args:
+        found, missing = Submission.get_submissions_by_ids(
+            _get_ids(), projection)
+        submissions = [s.to_json() for s in found]
+        return conditional_response(
+            {"submissions": submissions, "missing": missing})
+    if _wants_stream():
+        stream = _stream_submissions(filters, projection)
+        return Response(stream, mimetype=NDJSON), 200
+    if "limit" in request.args or "cursor" in request.args:
+        page, next_cursor = Submission.get_submissions_page(
+            _get_page_size(), request.args.get("cursor"), filters, projection)
+        submissions = [s.to_json() for s in page]
+        return conditional_response(
+            {"submissions": submissions, "next_cursor": next_cursor})
+    etag = version_etag(Submission.get_view_version())
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    submissions = Submission.get_submissions(filters, projection)
+    submissions = [s.to_json() for s in submissions]
+    return conditional_response({"submissions": submissions}, etag=etag)
 
 
 @make_route(f"/api/{VERSION}/submissions/<entry_id>", methods=['GET'])
 @requires_admin
 def get_single(config, entry_id):
+    projection = Submission.parse_projection(request.args.get("fields"))
+    etag = version_etag(Submission.get_view_version())
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
     try:
-        submission = Submission.get_submission(entry_id)
+        submission = Submission.get_submission(entry_id, projection)
     except ValueError as err:
         return {"error": f"{entry_id} contains data which has failed "
                          f"validation - {err}"}, 400
-    return submission.to_json(), 200
+    return conditional_response(submission.to_json(), etag=etag)
 
 
 @make_route(f"/api/{VERSION}/submissions", methods=['POST'])
@@ -34,6 +110,43 @@ def create_single(config):
     return Submission.create_submission(request_data).to_json(), 201
 
 
+@make_route(f"/api/{VERSION}/submissions/batch", methods=['POST'])
+@requires_admin
+def create_batch(config):
+    try:
+        request_data = json.loads(request.data)
+    except ValueError:
+        raise ValidationError(
+            [[request.data, type(request.data), "json"]], "type")
+    if not isinstance(request_data, list):
+        raise ValidationError(
+            [["submissions", type(request_data), list]], "type")
+    if len(request_data) > MAX_BATCH_SIZE:
+        raise ValidationError(["submissions"], "invalid")
+    results = Submission.create_submissions(request_data)
+    code = 201 if all(r["status"] == 201 for r in results) else 207
+    return {"results": results}, code
+
+
+@make_route(f"/api/{VERSION}/submissions/batch", methods=['PUT'])
+@requires_admin
+def update_batch(config):
+    try:
+        request_data = json.loads(request.data)
+    except ValueError:
+        raise ValidationError(
+            [[request.data, type(request.data), "json"]], "type")
+    if not isinstance(request_data, dict):
+        raise ValidationError([["body", type(request_data), dict]], "type")
+    missing = sorted({"ids", "patch"} - set(request_data))
+    if missing:
+        raise ValidationError(missing, "missing")
+    entry_ids = request_data["ids"]
+    if isinstance(entry_ids, list) and len(entry_ids) > MAX_BATCH_SIZE:
+        raise ValidationError(["ids"], "invalid")
+    return Submission.update_submissions(entry_ids, request_data["patch"]), 200
+
+
 @make_route(f"/api/{VERSION}/submissions/<entry_id>", methods=['PUT'])
 @requires_admin
 def update_single(config, entry_id):
@@ -43,3 +156,14 @@ def update_single(config, entry_id):
         raise ValidationError(
             [[request.data, type(request.data), "json"]], "type")
     return Submission.update_submission(entry_id, request_data), 200
+
+
+@make_route(f"/api/{VERSION}/submissions/<entry_id>", methods=['PATCH'])
+@requires_admin
+def patch_single(config, entry_id):
+    try:
+        request_data = json.loads(request.data)
+    except ValueError:
+        raise ValidationError(
+            [[request.data, type(request.data), "json"]], "type")
+    return Submission.patch_submission(entry_id, request_data), 200
@@ -1,20 +1,37 @@
 import jwt
+import logging
+import time
 
 from springapi.utils.google.client import (
-    create_auth_request_uri, get_oauth_token, get_authenticated_user_email)
+    create_auth_request_uri, get_oauth_token_data,
+    get_authenticated_user_email, verify_id_token)
 from springapi.models.email import Email
 from springapi.models.token import Token
 from springapi.exceptions import (
-    AuthorizationError, AuthProviderResponseError, ValidationError)
+    AuthorizationError, AuthProviderResponseError, InvalidAuthorization,
+    ValidationError)
+
+
+API_TOKEN_ISSUER = "springapi"
+API_TOKEN_LIFETIME = 60 * 60 * 24
 
 
 def get_auth_code_uri(redirect_host, client_id):
     return create_auth_request_uri(redirect_host, client_id)
 
 
-def _validate_user_by_email(token):
+def _get_user_email(token_data, credentials):
+    id_token = token_data.get("id_token")
+    if id_token:
+        try:
+            return verify_id_token(id_token, credentials["web"]["client_id"])
+        except AuthProviderResponseError:
+            logging.warning("ID token not verified, falling back to userinfo")
+    return get_authenticated_user_email(token_data["access_token"])
+
+
+def _validate_user_by_email(user_email):
     valid_emails = Email.get_authorized_emails()
-    user_email = get_authenticated_user_email(token)
     if user_email not in valid_emails:
         raise AuthorizationError(
             f"User associated with {user_email} is not authorized")
@@ -23,28 +40,78 @@ def _validate_user_by_email(token):
 
 def exchange_oauth_token(auth_code, credentials, redirect_host):
     try:
-        token = get_oauth_token(auth_code, credentials, redirect_host)
+        token_data = get_oauth_token_data(
+            auth_code, credentials, redirect_host)
+        user_email = _get_user_email(token_data, credentials)
     except AuthProviderResponseError as e:
         raise AuthorizationError(e)
     try:
-        email = _validate_user_by_email(token)
+        email = _validate_user_by_email(user_email)
     except ValidationError as e:
         raise AuthorizationError(f"User associated with {e} is not authorized")
     return email
 
 
-def generate_api_token(email, key):
+def generate_api_token(
+        email, key, lifetime=API_TOKEN_LIFETIME, issued_at=None):
+    issued_at = int(time.time()) if issued_at is None else issued_at
     payload = {
         "email": email,
-        "iss": "springapi"
+        "iss": API_TOKEN_ISSUER,
+        "iat": issued_at,
+        "exp": issued_at + lifetime
     }
     token = jwt.encode(payload, key, algorithm="HS256")
     return token
 
 
+def verify_api_token(token, key):
+    """
+    Verifies signature, issuer and lifetime of an API token locally, so the
+    only storage consulted is the cached revocation set.
+
+    :param token: str, API token from Authorization header
+    :param key: str, secret key the token was signed with
+    :return: dict, decoded token payload
+    """
+    try:
+        payload = jwt.decode(
+            token, key, algorithms=["HS256"], issuer=API_TOKEN_ISSUER,
+            options={"require_exp": True, "require_iat": True})
+    except jwt.InvalidTokenError:
+        raise InvalidAuthorization()
+    if token in Token.get_revoked_tokens():
+        raise InvalidAuthorization()
+    return payload
+
+
+def revoke_api_token(token):
+    """
+    Revokes an API token until it expires. The expiry is read from the
+    token without verifying it, since a forged token is rejected anyway.
+
+    :param token: str, API token to revoke
+    :return: obj <springapi.models.token.Token>, stored revocation
+    """
+    try:
+        payload = jwt.decode(
+            token, options={"verify_signature": False, "verify_exp": False})
+    except jwt.InvalidTokenError:
+        raise ValidationError(["token"], "invalid")
+    expires = payload.get("exp")
+    if not isinstance(expires, int):
+        raise ValidationError(["exp"], "missing")
+    return Token.revoke_token(token, expires=expires)
+
+
 def create_api_token(auth_code, credentials, key, redirect_host):
     email = exchange_oauth_token(auth_code, credentials, redirect_host)
-    api_token = generate_api_token(email, key)
-    token_obj = {"token": api_token.decode("utf-8")}
+    issued_at = int(time.time())
+    api_token = generate_api_token(email, key, issued_at=issued_at)
+    token_obj = {
+        "email": email,
+        "expires": issued_at + API_TOKEN_LIFETIME,
+        "token": api_token.decode("utf-8")
+    }
     Token.create_token(token_obj)
     return api_token
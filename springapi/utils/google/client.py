@@ -1,9 +1,72 @@
 import json
+import jwt
+import re
 import requests
+import threading
+import time
 import urllib
 
+from jwt.algorithms import RSAAlgorithm
+
 from springapi.exceptions import AuthProviderResponseError
 from springapi.config_helpers import VERSION
+from springapi.utils import http
+
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+KEY_SET_TTL = 60 * 60
+KEY_SET_MIN_REFRESH = 60
+
+
+class KeySetCache:
+    """
+    Public keys used to sign Google ID tokens, keyed by key id. The key set
+    is fetched on first use and again once it expires, following the
+    response's Cache-Control max-age when given. An unknown key id causes
+    a refetch, at most once every KEY_SET_MIN_REFRESH seconds.
+    """
+
+    def __init__(self, url, ttl=KEY_SET_TTL, clock=time.monotonic):
+        self.url = url
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._fetched_at = None
+        self._expires_at = 0.0
+
+    def _fetch(self):
+        try:
+            response = http.get(self.url)
+            key_set = json.loads(response.content)
+            keys = {k["kid"]: RSAAlgorithm.from_jwk(json.dumps(k))
+                    for k in key_set["keys"]}
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            raise AuthProviderResponseError(
+                f"Error retrieving signing keys from {self.url}")
+        max_age = re.search(
+            r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+        now = self._clock()
+        self._keys = keys
+        self._fetched_at = now
+        self._expires_at = now + (int(max_age[1]) if max_age else self._ttl)
+
+    def get_key(self, key_id):
+        with self._lock:
+            now = self._clock()
+            recently_fetched = self._fetched_at is not None and \
+                now - self._fetched_at < KEY_SET_MIN_REFRESH
+            if now >= self._expires_at or \
+                    (key_id not in self._keys and not recently_fetched):
+                self._fetch()
+            if key_id not in self._keys:
+                raise AuthProviderResponseError(
+                    f"Unknown signing key {key_id}")
+            return self._keys[key_id]
+
+
+GOOGLE_KEY_SET = KeySetCache(GOOGLE_CERTS_URL)
 
 
 def create_auth_request_uri(
@@ -17,13 +80,14 @@ def create_auth_request_uri(
         "response_type": "code",
         "scope": "https://www.googleapis.com/auth/userinfo.email "
                  "https://www.googleapis.com/auth/userinfo.profile "
+                 "openid"
     }
 
     full_url = f"{oauth_url}?{urllib.parse.urlencode(params)}"
     return full_url
 
 
-def get_oauth_token(
+def get_oauth_token_data(
         auth_code, credentials, redirect_host,
         token_url="https://oauth2.googleapis.com/token"):
     client_id = credentials["web"]["client_id"]
@@ -36,23 +100,59 @@ def get_oauth_token(
         "redirect_uri": f"{redirect_host}api/{VERSION}/auth-callback",
         "grant_type": "authorization_code"}
 
-    response = requests.post(token_url, data=data)
-    token_data = json.loads(response.content)
+    try:
+        response = http.post(token_url, data=data)
+        token_data = json.loads(response.content)
+    except (requests.RequestException, ValueError):
+        raise AuthProviderResponseError(
+            f"Error retrieving token from {token_url}")
 
     if "access_token" not in token_data:
         raise AuthProviderResponseError(
             f"Error retrieving token from {token_url}")
+    return token_data
+
+
+def get_oauth_token(
+        auth_code, credentials, redirect_host,
+        token_url="https://oauth2.googleapis.com/token"):
+    token_data = get_oauth_token_data(
+        auth_code, credentials, redirect_host, token_url)
     return token_data["access_token"]
 
 
+def verify_id_token(id_token, client_id, key_set=GOOGLE_KEY_SET):
+    """
+    Verifies an ID token returned by the token endpoint against Google's
+    cached signing keys, without calling the userinfo endpoint.
+
+    :param id_token: str, ID token from the token response
+    :param client_id: str, OAuth client ID the token must be issued for
+    :param key_set: obj <KeySetCache>, signing keys
+    :return: str, verified email of the authenticated user
+    """
+    try:
+        key_id = jwt.get_unverified_header(id_token).get("kid")
+        claims = jwt.decode(
+            id_token, key_set.get_key(key_id), algorithms=["RS256"],
+            audience=client_id, options={"require_exp": True})
+    except jwt.InvalidTokenError:
+        raise AuthProviderResponseError("ID token failed verification")
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        raise AuthProviderResponseError("ID token has unexpected issuer")
+    if not claims.get("email") or claims.get("email_verified") is not True:
+        raise AuthProviderResponseError("ID token has no verified email")
+    return claims["email"]
+
+
 def get_authenticated_user_email(
         token, user_url="https://www.googleapis.com/oauth2/v2/userinfo"):
     full_url = f"{user_url}?access_token={token}"
     try:
-        response = requests.get(full_url)
+        response = http.get(full_url)
         user_data = json.loads(response.content)
         assert "email" in user_data
-    except AssertionError:
+    except (AssertionError, requests.RequestException, ValueError):
         raise AuthProviderResponseError(
             f"Error retrieving user info from {user_url}")
     return user_data["email"]
@@ -0,0 +1,68 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry  # type: ignore
+
+
+POOL_SIZE = 10
+RETRIES = 3
+BACKOFF_FACTOR = 0.3
+TIMEOUT = 10.0
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_lock = threading.Lock()
+_session = None
+_settings = {"pool_size": POOL_SIZE, "retries": RETRIES, "timeout": TIMEOUT}
+
+
+def _create_session(pool_size, retries):
+    retry = Retry(
+        total=retries, backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "POST"]), raise_on_status=False)
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True,
+        max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_session(pool_size=POOL_SIZE, retries=RETRIES, timeout=TIMEOUT):
+    """
+    Sets pool size, retry count and default timeout for outbound requests.
+    The shared session is rebuilt on next use.
+
+    :param pool_size: int, connections kept open per host
+    :param retries: int, retries on connection errors and 5xx responses
+    :param timeout: float, seconds to wait for connect and for each read
+    :return: None
+    """
+    global _session
+    with _lock:
+        _settings.update(
+            pool_size=pool_size, retries=retries, timeout=timeout)
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _create_session(
+                _settings["pool_size"], _settings["retries"])
+        return _session
+
+
+def get(url, **kwargs):
+    kwargs.setdefault("timeout", _settings["timeout"])
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    kwargs.setdefault("timeout", _settings["timeout"])
+    return get_session().post(url, **kwargs)
@@ -1,11 +1,72 @@
 import contextlib
+import functools
+import os
+import tempfile
 import uuid
-from mockfirestore import MockFirestore  # type: ignore
+from mockfirestore import (  # type: ignore
+    CollectionReference, DocumentReference, DocumentSnapshot, MockFirestore,
+    Query)
 
 from springapi.app import create_app, create_config
 from springapi.config_helpers import (
     AUTH, KEY, SUBMISSION, TOKEN)
 from springapi.helpers import encode_json_uri
+from springapi.models.backends import reset_backends
+from unittest import mock
+
+
+class _ProjectedSnapshot(DocumentSnapshot):
+    """
+    A snapshot holding only the fields read, which exists if its document
+    does, as Firestore returns for a read with `field_paths`.
+    """
+
+    def __init__(self, snapshot, field_paths):
+        data = snapshot.to_dict()
+        super().__init__(
+            snapshot.reference,
+            {f: data[f] for f in field_paths if f in data})
+        self._exists = snapshot.exists
+
+    @property
+    def exists(self):
+        return self._exists
+
+
+def _accept_rpc_options(method):
+    """
+    mockfirestore's reads and writes do not take the options the client
+    passes to Firestore; accept them, ignore retry and timeout, and keep
+    only the `field_paths` of the snapshots read.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, field_paths=None, retry=None, timeout=None,
+                **kwargs):
+        response = method(self, *args, **kwargs)
+        if field_paths is None:
+            return response
+        if isinstance(response, DocumentSnapshot):
+            return _ProjectedSnapshot(response, field_paths)
+        return (_ProjectedSnapshot(r, field_paths) for r in response)
+    return wrapper
+
+
+def patch_mockfirestore(testcase):
+    """
+    Makes mockfirestore accept the client's options until `testcase` is
+    cleaned up.
+
+    :param testcase: unittest.TestCase, usually `self` in setUp
+    :return: None
+    """
+    for cls, name in [
+            (CollectionReference, "add"), (CollectionReference, "stream"),
+            (DocumentReference, "get"), (DocumentReference, "update"),
+            (Query, "stream")]:
+        patcher = mock.patch.object(
+            cls, name, _accept_rpc_options(getattr(cls, name)))
+        patcher.start()
+        testcase.addCleanup(patcher.stop)
 
 
 def populate_mock_submissions(entries):
@@ -20,15 +81,22 @@ def populate_mock_submissions(entries):
 def make_test_client(environ=None, skip_defaults=False):
     auth_credentials = {"web": {"client_id": "abc123"}}
     environ = environ or {}
+    directory = tempfile.TemporaryDirectory()
     if not skip_defaults:
+        database = os.path.join(directory.name, "springapi.sqlite")
         environ.setdefault(AUTH, encode_json_uri("google", auth_credentials))
         environ.setdefault(KEY, "secretkey")
         environ.setdefault(SUBMISSION, encode_json_uri("firebase", {}))
-        environ.setdefault(TOKEN, encode_json_uri("sqlite", {}))
-    config = create_config(environ)
-    app = create_app(config)
-    with app.test_client() as client:
-        yield client
+        environ.setdefault(
+            TOKEN, encode_json_uri("sqlite", {"path": database}))
+    try:
+        config = create_config(environ)
+        app = create_app(config)
+        with app.test_client() as client:
+            yield client
+    finally:
+        reset_backends()
+        directory.cleanup()
 
 
 class MockUid:
@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+
+from google.api_core import exceptions as google_exceptions  # type: ignore
+from springapi.exceptions import (
+    CollectionNotFound, DatabaseUnavailable, EntryNotFound)
+from springapi.models.firebase import aio_client, breaker
+from springapi.models.firebase.retry import request_deadline
+from unittest import mock
+
+
+async def _return(value):
+    return value
+
+
+async def _iterate(values):
+    for value in values:
+        yield value
+
+
+async def _no_sleep(delay):
+    pass
+
+
+def _snapshot(entry_id, data):
+    snapshot = mock.MagicMock(id=entry_id, exists=bool(data))
+    snapshot.to_dict.return_value = data
+    return snapshot
+
+
+@mock.patch('springapi.models.firebase.aio_client.get_client')
+class TestAsyncFirestoreCalls(unittest.TestCase):
+
+    def setUp(self):
+        breaker.BREAKER.reset()
+        self.addCleanup(breaker.BREAKER.reset)
+
+    def test_get_collection_returns_collection_if_found(self, mock_client):
+        query = mock_client.return_value.collection.return_value
+        query.where.return_value.stream.side_effect = lambda **kw: _iterate([
+            _snapshot("1", {"name": "a"}), _snapshot("2", {"name": "b"})])
+
+        response = asyncio.run(aio_client.get_collection(
+            "submissions", filters={"isApproved": False}))
+        self.assertEqual(response, {"1": {"name": "a"}, "2": {"name": "b"}})
+        query.where.assert_called_with("isApproved", "==", False)
+        stream = query.where.return_value.stream
+        self.assertIsNone(stream.call_args[1]["retry"])
+
+    def test_get_collection_raises_CollectionNotFound(self, mock_client):
+        query = mock_client.return_value.collection.return_value
+        query.stream.side_effect = lambda **kw: _iterate([])
+
+        with self.assertRaises(CollectionNotFound):
+            asyncio.run(aio_client.get_collection("submissions"))
+
+    def test_get_entry_returns_entry_data_if_found(self, mock_client):
+        document = mock_client.return_value.collection.return_value.document
+        document.return_value.get.side_effect = \
+            lambda **kw: _return(_snapshot("1", {"name": "a"}))
+
+        response = asyncio.run(aio_client.get_entry(
+            "submissions", "1", field_paths=["name"]))
+        self.assertEqual(response, {"name": "a"})
+        document.return_value.get.assert_called_with(
+            field_paths=["name"], retry=None, timeout=mock.ANY)
+
+    def test_get_entry_raises_EntryNotFound(self, mock_client):
+        document = mock_client.return_value.collection.return_value.document
+        document.return_value.get.side_effect = \
+            lambda **kw: _return(_snapshot("1", {}))
+
+        with self.assertRaises(EntryNotFound):
+            asyncio.run(aio_client.get_entry("submissions", "1"))
+
+
+class TestAsyncCallWithRetry(unittest.TestCase):
+
+    def setUp(self):
+        breaker.BREAKER.reset()
+        self.addCleanup(breaker.BREAKER.reset)
+
+    def test_retries_transient_errors(self):
+        outcomes = [google_exceptions.ServiceUnavailable("down"), "ok"]
+
+        async def call(timeout):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        response = asyncio.run(aio_client.call_with_retry(
+            call, sleep=_no_sleep, jitter=lambda: 0.5))
+        self.assertEqual(response, "ok")
+        self.assertEqual(outcomes, [])
+
+    def test_raises_DatabaseUnavailable_once_deadline_spent(self):
+        async def call(timeout):
+            raise google_exceptions.ServiceUnavailable("down")
+
+        async def run():
+            with request_deadline(0.0):
+                return await aio_client.call_with_retry(call)
+
+        with self.assertRaises(DatabaseUnavailable):
+            asyncio.run(run())
+
+    def test_is_refused_while_breaker_is_open(self):
+        calls = []
+
+        async def call(timeout):
+            calls.append(timeout)
+
+        breaker.BREAKER._open()
+        with self.assertRaises(DatabaseUnavailable):
+            asyncio.run(aio_client.call_with_retry(call))
+        self.assertEqual(calls, [])
+
+
+@mock.patch('springapi.models.firebase.aio_client._create_client')
+@mock.patch('firebase_admin.get_app')
+class TestAsyncFirestoreClient(unittest.TestCase):
+
+    def test_get_client_is_shared_within_an_event_loop(
+            self, mock_app, mock_create):
+        mock_create.side_effect = lambda app: mock.MagicMock()
+
+        async def get_clients():
+            return aio_client.get_client(), aio_client.get_client()
+
+        first, second = asyncio.run(get_clients())
+        self.assertIs(first, second)
+        other, _ = asyncio.run(get_clients())
+        self.assertIsNot(first, other)
@@ -0,0 +1,162 @@
+import threading
+import unittest
+from unittest import mock
+
+from google.api_core import exceptions as google_exceptions  # type: ignore
+
+from springapi.exceptions import DatabaseUnavailable
+from springapi.models.firebase import breaker
+from springapi.models.firebase.breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ConcurrencyLimiter,
+    configure_breaker, guard)
+from springapi.models.firebase.client import get_entry
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            error_rate=0.5, window=4, min_calls=4, open_seconds=5,
+            clock=self.clock)
+
+    def trip(self):
+        for _ in range(4):
+            self.breaker.record(bad=True)
+
+    def test_opens_at_error_rate(self):
+        for bad in [False, True, False]:
+            self.breaker.record(bad=bad)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record(bad=True)
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_stays_closed_below_min_calls(self):
+        for _ in range(3):
+            self.breaker.record(bad=True)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before_call()
+
+    def test_refuses_calls_while_open(self):
+        self.trip()
+        self.clock.now = 2
+        with self.assertRaises(DatabaseUnavailable) as cm:
+            self.breaker.before_call()
+        self.assertEqual(cm.exception.retry_after, 3)
+        body, code, headers = cm.exception.error_response_body_and_code()
+        self.assertEqual(code, 503)
+        self.assertEqual(headers, {"Retry-After": "3"})
+
+    def test_lets_one_probe_through_then_closes_on_success(self):
+        self.trip()
+        self.clock.now = 5
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.before_call()
+        with self.assertRaises(DatabaseUnavailable):
+            self.breaker.before_call()
+        self.breaker.record(bad=False)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_reopens_on_failed_probe(self):
+        self.trip()
+        self.clock.now = 5
+        self.breaker.before_call()
+        self.breaker.record(bad=True)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.retry_after(), 5)
+
+    def test_cancelled_probe_frees_the_probe(self):
+        self.trip()
+        self.clock.now = 5
+        self.breaker.before_call()
+        self.breaker.cancel()
+        self.breaker.before_call()
+
+
+class TestConcurrencyLimiter(unittest.TestCase):
+
+    def test_sheds_call_when_no_slot_frees_up(self):
+        limiter = ConcurrencyLimiter(max_concurrency=1, queue_timeout=0.01)
+        with limiter.slot():
+            with self.assertRaises(DatabaseUnavailable) as cm:
+                with limiter.slot():
+                    pass
+        self.assertEqual(cm.exception.retry_after, 1)
+        with limiter.slot():
+            pass
+
+    def test_queued_call_gets_released_slot(self):
+        limiter = ConcurrencyLimiter(max_concurrency=1, queue_timeout=5)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with limiter.slot():
+                entered.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        entered.wait()
+        threading.Timer(0.01, release.set).start()
+        with limiter.slot():
+            pass
+        thread.join()
+
+
+class TestGuard(unittest.TestCase):
+
+    def setUp(self):
+        configure_breaker()
+        self.addCleanup(configure_breaker)
+
+    def test_transient_errors_are_bad_calls(self):
+        with mock.patch.object(breaker.BREAKER, "record") as record:
+            with self.assertRaises(google_exceptions.ServiceUnavailable):
+                with guard():
+                    raise google_exceptions.ServiceUnavailable("down")
+        record.assert_called_once_with(bad=True)
+
+    def test_other_errors_are_good_calls(self):
+        with mock.patch.object(breaker.BREAKER, "record") as record:
+            with self.assertRaises(google_exceptions.NotFound):
+                with guard():
+                    raise google_exceptions.NotFound("missing")
+        record.assert_called_once_with(bad=False)
+
+    def test_slow_calls_are_bad_calls(self):
+        clock = mock.Mock(side_effect=[0, breaker.SLOW_CALL + 1])
+        with mock.patch.object(breaker.BREAKER, "record") as record:
+            with guard(clock=clock):
+                pass
+        record.assert_called_once_with(bad=True)
+
+    @mock.patch("springapi.models.firebase.client.get_client")
+    def test_open_breaker_fails_fast_without_calling_firestore(
+            self, mock_client):
+        document = mock_client.return_value.collection.return_value.document
+        document.return_value.get.side_effect = \
+            google_exceptions.InternalServerError("broken")
+        with mock.patch("springapi.models.firebase.retry.INITIAL_BACKOFF", 0):
+            for _ in range(breaker.MIN_CALLS):
+                with self.assertRaises(DatabaseUnavailable):
+                    with mock.patch(
+                            "springapi.models.firebase.retry.Deadline"
+                            ".remaining", side_effect=[1, 1, 0]):
+                        get_entry("submissions", "1")
+        self.assertEqual(breaker.BREAKER.state, OPEN)
+
+        document.return_value.get.reset_mock()
+        with self.assertRaises(DatabaseUnavailable) as cm:
+            get_entry("submissions", "1")
+        self.assertEqual(cm.exception.message.split(": ")[-1], "circuit open")
+        self.assertFalse(document.return_value.get.called)
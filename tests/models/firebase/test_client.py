@@ -1,18 +1,24 @@
-import json
 import unittest
 
 from springapi.helpers import encode_json_uri
 from springapi.exceptions import (
-    EntryAlreadyExists, EntryNotFound, InvalidJSONURI, MissingProjectId)
+    CollectionNotFound, EntryAlreadyExists, EntryNotFound, InvalidJSONURI,
+    MissingProjectId)
+from springapi.models.firebase import breaker
 from springapi.models.firebase.client import (
-    add_entry, authenticate_firebase, get_collection, get_entry,
-    get_email_addresses, update_entry)
-from tests.helpers import populate_mock_submissions
+    BATCH_LIMIT, CHANNEL_OPTIONS, _create_client, add_entries, add_entry,
+    authenticate_firebase, configure_client, delete_entries, delete_entry,
+    email_address_exists, get_client, get_collection, get_entries, get_entry,
+    get_email_addresses, stream_collection, update_entries, update_entry)
+from tests.helpers import patch_mockfirestore, populate_mock_submissions
 from tests.models.helpers import ClientResponseAssertions
+import mockfirestore  # type: ignore
+from firebase_admin import auth  # type: ignore
+from google.api_core import exceptions as google_exceptions  # type: ignore
 from unittest import mock
 
 
-@mock.patch('firebase_admin.firestore.client')
+@mock.patch('springapi.models.firebase.client.get_client')
 class TestFirestoreCalls(ClientResponseAssertions):
 
     def __init__(self, *args, **kwargs):
@@ -24,6 +30,9 @@ class TestFirestoreCalls(ClientResponseAssertions):
             "4": {"name": "This Person"}
         }
 
+    def setUp(self):
+        patch_mockfirestore(self)
+
     def test_get_collection_returns_collection_if_found(self, mock_client):
         mock_client.return_value = populate_mock_submissions(self.entries)
 
@@ -51,6 +60,88 @@ class TestFirestoreCalls(ClientResponseAssertions):
         self.assert_get_collection_raises_CollectionNotFound(
             "nonexistent", get_collection)
 
+    def test_get_collection_orders_by_id_and_pages_given_limit(
+            self, mock_client):
+        query = mock_client.return_value.collection.return_value
+        query = query.order_by.return_value.limit.return_value
+        query.start_after.return_value.stream.return_value = []
+        query.stream.return_value = []
+
+        with self.assertRaises(CollectionNotFound):
+            get_collection("submissions", limit=10)
+        with self.assertRaises(CollectionNotFound):
+            get_collection("submissions", limit=10, start_after="abc")
+
+        collection = mock_client.return_value.collection.return_value
+        collection.order_by.assert_called_with("__name__")
+        collection.order_by.return_value.limit.assert_called_with(10)
+        query.start_after.assert_called_once_with({"__name__": "abc"})
+
+    def test_get_collection_applies_typed_equality_filters(
+            self, mock_client):
+        entries = {
+            "1": {"name": "a", "isApproved": True, "location": "Here"},
+            "2": {"name": "b", "isApproved": False, "location": "Here"},
+            "3": {"name": "c", "isApproved": False, "location": "There"}
+        }
+        mock_client.return_value = populate_mock_submissions(entries)
+
+        self.assertEqual(
+            get_collection(
+                "submissions",
+                filters={"isApproved": False, "location": "Here"}),
+            {"2": entries["2"]})
+        self.assertEqual(
+            dict(stream_collection(
+                "submissions", filters={"isApproved": True})),
+            {"1": entries["1"]})
+
+    def test_get_collection_selects_field_paths(self, mock_client):
+        collection = mock_client.return_value.collection.return_value
+        snapshot = mock.MagicMock(id="1")
+        snapshot.to_dict.return_value = {"name": "a"}
+        collection.select.return_value.stream.return_value = [snapshot]
+
+        response = get_collection("submissions", field_paths=["name"])
+
+        self.assertEqual(response, {"1": {"name": "a"}})
+        collection.select.assert_called_with(["name"])
+
+    def test_stream_collection_yields_entries(self, mock_client):
+        mock_client.return_value = populate_mock_submissions(self.entries)
+
+        self.assertEqual(
+            dict(stream_collection("submissions")), self.entries)
+
+    def test_stream_collection_yields_filtered_entries(self, mock_client):
+        mock_client.return_value = populate_mock_submissions(self.entries)
+
+        self.assertEqual(
+            dict(stream_collection("submissions", "message", "Goodbye")),
+            {"2": self.entries["2"], "3": self.entries["3"]})
+
+    def test_stream_collection_yields_nothing_if_not_found(
+            self, mock_client):
+        mock_client.return_value = populate_mock_submissions(self.entries)
+
+        self.assertEqual(list(stream_collection("nonexistent")), [])
+
+    def test_stream_collection_releases_slot_between_entries(
+            self, mock_client):
+        mock_client.return_value = populate_mock_submissions(self.entries)
+        limiter = breaker.ConcurrencyLimiter(max_concurrency=1)
+        circuit = breaker.CircuitBreaker()
+
+        with mock.patch.object(breaker, 'LIMITER', limiter), \
+                mock.patch.object(breaker, 'BREAKER', circuit), \
+                mock.patch.object(circuit, 'record') as mock_record:
+            stream = stream_collection("submissions")
+            self.assertEqual(next(stream)[0], "1")
+            with limiter.slot(timeout=0):
+                pass
+            self.assertEqual(len(list(stream)), len(self.entries) - 1)
+        mock_record.assert_called_once_with(bad=False)
+
     def test_add_entry_raises_ValidationError_missing(self, mock_client):
         mock_client.return_value = populate_mock_submissions(self.entries)
         missing = "id"
@@ -80,6 +171,37 @@ class TestFirestoreCalls(ClientResponseAssertions):
         response = get_entry('submissions', '1')
         self.assertEqual(response, self.entries['1'])
 
+    def test_get_entry_reads_only_field_paths(self, mock_client):
+        document = mock_client.return_value.collection.return_value.document
+        snapshot = document.return_value.get.return_value
+        snapshot.exists = True
+        snapshot.to_dict.return_value = {"name": "a"}
+
+        response = get_entry('submissions', '1', field_paths=["name"])
+
+        self.assertEqual(response, {"name": "a"})
+        document.return_value.get.assert_called_with(
+            field_paths=["name"], retry=None, timeout=mock.ANY)
+
+    def test_get_entry_forwards_field_paths_to_firestore(self, mock_client):
+        mock_client.return_value = populate_mock_submissions(self.entries)
+
+        self.assertEqual(
+            get_entry('submissions', '1', field_paths=["name"]),
+            {"name": "Some Guy"})
+        self.assertEqual(get_entry('submissions', '1', field_paths=[]), {})
+        with self.assertRaises(EntryNotFound):
+            get_entry('submissions', '5', field_paths=["name"])
+
+    def test_get_entry_returns_empty_entry_given_no_field_paths(
+            self, mock_client):
+        document = mock_client.return_value.collection.return_value.document
+        snapshot = document.return_value.get.return_value
+        snapshot.exists = True
+        snapshot.to_dict.return_value = None
+
+        self.assertEqual(get_entry('submissions', '1', field_paths=[]), {})
+
     def test_add_entry_returns_entry_data_if_successful(self, mock_client):
         mock_client.return_value = populate_mock_submissions(self.entries)
 
@@ -90,6 +212,34 @@ class TestFirestoreCalls(ClientResponseAssertions):
         self.assertEqual(
             response, {entry_id: data})
 
+    def test_add_entry_does_not_read_entry_back(self, mock_client):
+        mock_db = mock_client.return_value
+        reference = mock.Mock()
+        mock_db.collection.return_value.add.return_value = (None, reference)
+
+        data = {"name": "This Person", "id": "abc123"}
+        response = add_entry("submissions", data.copy())
+
+        self.assertEqual(response, {"abc123": data})
+        mock_db.collection.return_value.add.assert_called_once_with(
+            {"name": "This Person"}, "abc123", retry=None, timeout=mock.ANY)
+        self.assertFalse(reference.get.called)
+
+    def test_add_entry_reads_entry_back_once_if_verify(self, mock_client):
+        mock_client.return_value = populate_mock_submissions(self.entries)
+
+        entry_id = "abc123"
+        data = {"name": "This Person", "message": "Ohayo", "id": entry_id}
+        with mock.patch(
+                'mockfirestore.document.DocumentReference.get',
+                autospec=True,
+                side_effect=mockfirestore.document.DocumentReference.get
+        ) as mock_get:
+            response = add_entry("submissions", data.copy(), verify=True)
+
+        self.assertEqual(response, {entry_id: data})
+        self.assertEqual(mock_get.call_count, 1)
+
     def test_add_entry_raises_EntryAlreadyExists(self, mock_client):
         mock_client.return_value = populate_mock_submissions(self.entries)
 
@@ -128,6 +278,121 @@ class TestFirestoreCalls(ClientResponseAssertions):
             EntryNotFound(entry_id, collection).error_response_body()
         )
 
+    def test_delete_entry_removes_entry(self, mock_client):
+        mock_client.return_value = populate_mock_submissions(self.entries)
+        entry_id = "1"
+
+        response = delete_entry('submissions', entry_id)
+        self.assertEqual(
+            response, {"success": f"{entry_id} deleted from submissions"})
+        with self.assertRaises(EntryNotFound):
+            get_entry('submissions', entry_id)
+
+    def test_delete_entries_commits_chunked_batches(self, mock_client):
+        entry_ids = [str(i) for i in range(501)]
+
+        response = delete_entries('tokens', entry_ids)
+        self.assertEqual(response, {"success": "501 deleted from tokens"})
+        batch = mock_client.return_value.batch.return_value
+        self.assertEqual(batch.delete.call_count, 501)
+        self.assertEqual(batch.commit.call_count, 2)
+
+    def test_add_entries_commits_chunked_batches(self, mock_client):
+        entries = [{"id": str(i), "name": "a"} for i in range(BATCH_LIMIT + 1)]
+
+        added, failed = add_entries('submissions', entries)
+        self.assertEqual(added, {e["id"]: e for e in entries})
+        self.assertEqual(failed, {})
+        batch = mock_client.return_value.batch.return_value
+        self.assertEqual(batch.create.call_count, BATCH_LIMIT + 1)
+        self.assertEqual(batch.commit.call_count, 2)
+        batch.create.assert_called_with(
+            mock_client.return_value.collection.return_value.document(
+                str(BATCH_LIMIT)), {"name": "a"})
+
+    def test_get_entries_returns_found_in_order_and_missing(
+            self, mock_client):
+        client = mock_client.return_value
+        client.collection.return_value.document.side_effect = \
+            lambda entry_id: mock.MagicMock(id=entry_id)
+
+        def get_all(documents, field_paths):
+            for document in reversed(documents):
+                snapshot = mock.MagicMock(
+                    id=document.id, exists=document.id != "2")
+                snapshot.to_dict.return_value = {"name": document.id}
+                yield snapshot
+        client.get_all.side_effect = get_all
+
+        found, missing = get_entries(
+            'submissions', ["3", "2", "1"], field_paths=["name"])
+        self.assertEqual(list(found.items()), [
+            ("3", {"name": "3"}), ("1", {"name": "1"})])
+        self.assertEqual(missing, ["2"])
+        client.get_all.assert_called_once()
+        self.assertEqual(
+            client.get_all.call_args[1], {"field_paths": ["name"]})
+
+    def test_update_entries_updates_found_entries_in_batches(
+            self, mock_client):
+        entry_ids = [str(i) for i in range(BATCH_LIMIT + 2)]
+        client = mock_client.return_value
+        client.collection.return_value.document.side_effect = \
+            lambda entry_id: mock.MagicMock(id=entry_id)
+        client.get_all.side_effect = lambda documents, field_paths: [
+            mock.MagicMock(id=d.id, exists=d.id != "1") for d in documents]
+
+        updated, missing = update_entries(
+            'submissions', entry_ids, {"isApproved": True})
+        self.assertEqual(missing, ["1"])
+        self.assertEqual(updated, [i for i in entry_ids if i != "1"])
+        self.assertEqual(client.get_all.call_count, 2)
+        self.assertEqual(client.get_all.call_args[1], {"field_paths": []})
+        batch = client.batch.return_value
+        self.assertEqual(batch.update.call_count, BATCH_LIMIT + 1)
+        self.assertEqual(batch.commit.call_count, 2)
+        self.assertEqual(batch.update.call_args[0][1], {"isApproved": True})
+
+    def test_update_entries_reports_entries_deleted_before_commit(
+            self, mock_client):
+        client = mock_client.return_value
+        client.collection.return_value.document.side_effect = \
+            lambda entry_id: mock.MagicMock(id=entry_id)
+        deleted = set()
+        client.get_all.side_effect = lambda documents, field_paths: [
+            mock.MagicMock(id=d.id, exists=d.id not in deleted)
+            for d in documents]
+        batch = client.batch.return_value
+
+        def commit():
+            if not deleted:
+                deleted.add("2")
+                raise google_exceptions.NotFound("gone")
+        batch.commit.side_effect = commit
+
+        updated, missing = update_entries(
+            'submissions', ["1", "2", "3"], {"isApproved": True})
+        self.assertEqual(updated, ["1", "3"])
+        self.assertEqual(missing, ["2"])
+        self.assertEqual(client.get_all.call_count, 2)
+        self.assertEqual(batch.commit.call_count, 2)
+
+    def test_add_entries_reports_failed_chunks(self, mock_client):
+        entries = [{"id": str(i), "name": "a"} for i in range(BATCH_LIMIT + 2)]
+        batch = mock_client.return_value.batch.return_value
+        batch.commit.side_effect = [
+            google_exceptions.AlreadyExists("exists"),
+            google_exceptions.DeadlineExceeded("slow")]
+
+        added, failed = add_entries('submissions', entries)
+        self.assertEqual(added, {})
+        self.assertEqual(len(failed), BATCH_LIMIT + 2)
+        self.assertIsInstance(failed["0"], EntryAlreadyExists)
+        self.assertEqual(
+            failed[str(BATCH_LIMIT)].error_response_body(),
+            {"error": "write_failed", "message": "slow"})
+        self.assertEqual(failed[str(BATCH_LIMIT)].code, 500)
+
 
 class MockFirebaseUser:
 
@@ -143,6 +408,9 @@ class MockFirebaseUserList:
     def create_users(self, count):
         return [MockFirebaseUser(i) for i in range(count)]
 
+    def iterate_all(self):
+        return iter(self.users)
+
 
 @mock.patch('firebase_admin.auth.list_users')
 class TestFirebaseCalls(unittest.TestCase):
@@ -159,21 +427,39 @@ class TestFirebaseCalls(unittest.TestCase):
         user_list = get_email_addresses()
         self.assertEqual(user_list, expected)
 
+    def test_get_email_addresses_includes_users_past_first_page(
+            self, mock_get):
+        users = mock_get.return_value = MockFirebaseUserList(1001)
+        users.users[1000].email = None
+        user_list = get_email_addresses()
+        self.assertEqual(len(user_list), 1000)
+        self.assertEqual(user_list[-1], 'foo999@example.com')
+
+
+@mock.patch('firebase_admin.auth.get_user_by_email')
+class TestFirebaseEmailLookup(unittest.TestCase):
+
+    def test_email_address_exists_returns_True_if_user_found(self, mock_get):
+        self.assertTrue(email_address_exists('foo@example.com'))
+        mock_get.assert_called_with('foo@example.com')
+
+    def test_email_address_exists_returns_False_if_not_found(self, mock_get):
+        mock_get.side_effect = auth.UserNotFoundError('not found')
+        self.assertFalse(email_address_exists('foo@example.com'))
+
 
 class MockGoogleAuthCredentials:
 
     @classmethod
-    def from_path(cls, path):
+    def from_config(cls, config):
         """
-        The default Firebase Certificate constructor expects a path, so we're
-        creating a method here that can be used in mocks to intercept the
-        provided path and make assertions about what's being passed in
+        The Firebase Certificate constructor accepts the decoded service
+        account key, so we're creating a method here that can be used in
+        mocks to make assertions about what's being passed in
 
-        :param path:
+        :param config:
         :return:
         """
-        with open(path, "rb") as fp:
-            config = json.loads(fp.read())
         assert isinstance(config, dict)
         return cls()
 
@@ -232,7 +518,7 @@ class TestFirebaseAppCreation(unittest.TestCase):
     @mock.patch('firebase_admin.initialize_app')
     def test_authenticate_firebase_returns_configured_firebase_instance(
             self, mocked_app, mocked_cert):
-        mocked_cert.side_effect = MockGoogleAuthCredentials.from_path
+        mocked_cert.side_effect = MockGoogleAuthCredentials.from_config
         uri = encode_json_uri("firestore", {"project_id": "some-project-id"})
         authenticate_firebase(uri)
 
@@ -242,3 +528,52 @@ class TestFirebaseAppCreation(unittest.TestCase):
                 "projectId": "some-project-id",
                 "storageBucket": "some-project-id.appspot.com"
             })
+        mocked_cert.assert_called_with({"project_id": "some-project-id"})
+
+
+@mock.patch('springapi.models.firebase.client._create_client')
+@mock.patch('firebase_admin.get_app')
+class TestFirestoreClient(unittest.TestCase):
+
+    def setUp(self):
+        configure_client()
+
+    def tearDown(self):
+        configure_client()
+
+    def test_get_client_creates_client_once(self, mock_app, mock_create):
+        client = get_client()
+        self.assertIs(client, get_client())
+        mock_create.assert_called_once_with(
+            mock_app.return_value, CHANNEL_OPTIONS)
+
+    @mock.patch('os.getpid')
+    def test_get_client_creates_new_client_after_fork(
+            self, mock_pid, mock_app, mock_create):
+        mock_pid.return_value = 1
+        get_client()
+        mock_pid.return_value = 2
+        get_client()
+        self.assertEqual(mock_create.call_count, 2)
+
+    @mock.patch('springapi.models.firebase.client.firestore_transports')
+    @mock.patch('springapi.models.firebase.client.google_firestore.Client')
+    def test_create_client_uses_channel_options(
+            self, mock_firestore, mock_transports, mock_app, mock_create):
+        mock_create.side_effect = _create_client
+        client = get_client()
+
+        transport = mock_transports.FirestoreGrpcTransport
+        transport.create_channel.assert_called_once_with(
+            client._target, credentials=client._credentials,
+            options=CHANNEL_OPTIONS)
+        mock_firestore.assert_called_once_with(
+            project=mock_app.return_value.project_id,
+            credentials=mock_app.return_value.credential.get_credential())
+
+    def test_configure_client_sets_channel_options(
+            self, mock_app, mock_create):
+        options = [("grpc.max_concurrent_streams", 200)]
+        configure_client(options)
+        get_client()
+        mock_create.assert_called_once_with(mock_app.return_value, options)
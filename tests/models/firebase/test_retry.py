@@ -0,0 +1,117 @@
+import unittest
+from unittest import mock
+
+from google.api_core import exceptions as google_exceptions  # type: ignore
+
+from springapi.exceptions import DatabaseUnavailable, EntryAlreadyExists
+from springapi.models.firebase.client import add_entry, get_entry
+from springapi.models.firebase.retry import (
+    Deadline, call_with_retry, request_deadline)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestCallWithRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def call(self, fn):
+        return call_with_retry(fn, sleep=self.clock.sleep, jitter=lambda: 1)
+
+    def test_returns_result_passing_remaining_time_as_timeout(self):
+        fn = mock.Mock(return_value="ok")
+        with request_deadline(5, clock=self.clock):
+            self.assertEqual(self.call(fn), "ok")
+        fn.assert_called_once_with(5.0)
+
+    def test_retries_transient_errors_with_backoff(self):
+        fn = mock.Mock(side_effect=[
+            google_exceptions.ServiceUnavailable("down"),
+            google_exceptions.Aborted("contention"),
+            "ok"])
+        with request_deadline(5, clock=self.clock):
+            self.assertEqual(self.call(fn), "ok")
+        self.assertEqual(fn.call_count, 3)
+        self.assertAlmostEqual(self.clock.now, 0.1 + 0.2)
+        self.assertAlmostEqual(fn.call_args[0][0], 5 - 0.3)
+
+    def test_does_not_retry_other_errors(self):
+        fn = mock.Mock(side_effect=google_exceptions.NotFound("missing"))
+        with request_deadline(5, clock=self.clock):
+            with self.assertRaises(google_exceptions.NotFound):
+                self.call(fn)
+        fn.assert_called_once()
+
+    def test_DatabaseUnavailable_when_deadline_spent(self):
+        fn = mock.Mock(
+            side_effect=google_exceptions.ServiceUnavailable("down"))
+        with request_deadline(1, clock=self.clock):
+            with self.assertRaises(DatabaseUnavailable) as cm:
+                self.call(fn)
+        self.assertEqual(cm.exception.code, 503)
+        self.assertEqual(cm.exception.error, "unavailable")
+        self.assertLess(self.clock.now, 1)
+        self.assertGreater(fn.call_count, 1)
+
+    def test_operations_share_request_deadline(self):
+        def slow(timeout):
+            self.clock.now += 3
+            return timeout
+
+        with request_deadline(5, clock=self.clock):
+            self.assertEqual(self.call(slow), 5)
+            self.assertEqual(self.call(slow), 2)
+            with self.assertRaises(DatabaseUnavailable):
+                self.call(slow)
+
+    def test_deadline_remaining_never_negative(self):
+        deadline = Deadline(1, clock=self.clock)
+        self.clock.now = 2
+        self.assertEqual(deadline.remaining(), 0)
+
+
+@mock.patch("springapi.models.firebase.retry.INITIAL_BACKOFF", 0)
+@mock.patch("springapi.models.firebase.client.get_client")
+class TestFirestoreCallsRetry(unittest.TestCase):
+
+    def test_get_entry_retries_transient_error(self, mock_client):
+        document = mock_client.return_value.collection.return_value.document
+        snapshot = mock.Mock(exists=True)
+        snapshot.to_dict.return_value = {"name": "Person"}
+        document.return_value.get.side_effect = [
+            google_exceptions.DeadlineExceeded("slow"), snapshot]
+
+        self.assertEqual(get_entry("submissions", "1"), {"name": "Person"})
+        self.assertEqual(document.return_value.get.call_count, 2)
+
+    def test_add_entry_AlreadyExists_after_retry_is_success(
+            self, mock_client):
+        reference = mock_client.return_value.collection.return_value
+        reference.add.side_effect = [
+            google_exceptions.ServiceUnavailable("down"),
+            google_exceptions.AlreadyExists("exists")]
+
+        data = {"name": "This Person", "id": "abc123"}
+        response = add_entry("submissions", data.copy())
+
+        self.assertEqual(response, {"abc123": data})
+        self.assertEqual(reference.add.call_count, 2)
+
+    def test_add_entry_AlreadyExists_on_first_attempt_raises(
+            self, mock_client):
+        reference = mock_client.return_value.collection.return_value
+        reference.add.side_effect = google_exceptions.AlreadyExists("exists")
+
+        with self.assertRaises(EntryAlreadyExists):
+            add_entry("submissions", {"name": "This Person", "id": "abc123"})
@@ -0,0 +1,174 @@
+import unittest
+
+from springapi.models.firebase.view import CollectionView
+from unittest import mock
+
+
+class MockClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _change(change_type, entry_id, data=None):
+    change = mock.MagicMock()
+    change.type.name = change_type
+    change.document.id = entry_id
+    change.document.to_dict.return_value = data
+    return change
+
+
+@mock.patch('springapi.models.firebase.client.get_client')
+class TestCollectionView(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = MockClock()
+        self.view = CollectionView(
+            "submissions", ("isApproved", "location"), clock=self.clock)
+        self.entries = {
+            "1": {"name": "a", "isApproved": True, "location": "Here"},
+            "2": {"name": "b", "isApproved": False, "location": "Here"},
+            "3": {"name": "c", "isApproved": False, "location": "There"}
+        }
+
+    def start(self, mock_client):
+        reference = mock_client.return_value.collection.return_value
+        watch = reference.on_snapshot.return_value
+        watch.is_active = True
+        self.view.start()
+        callback = reference.on_snapshot.call_args[0][0]
+        return callback, watch
+
+    def test_view_is_inactive_until_initial_snapshot(self, mock_client):
+        self.assertFalse(self.view.active)
+        callback, _ = self.start(mock_client)
+        self.assertFalse(self.view.active)
+        self.assertIsNone(self.view.since_last_change())
+
+        callback(None, [_change("ADDED", k, v)
+                        for k, v in self.entries.items()], None)
+        self.assertTrue(self.view.active)
+        mock_client.return_value.collection.assert_called_with("submissions")
+
+    def test_view_is_inactive_if_listener_stops(self, mock_client):
+        callback, watch = self.start(mock_client)
+        callback(None, [], None)
+        watch.is_active = False
+
+        self.assertFalse(self.view.active)
+
+    def test_serving_restarts_stopped_listener(self, mock_client):
+        callback, watch = self.start(mock_client)
+        callback(None, [_change("ADDED", "1", self.entries["1"])], None)
+        self.assertTrue(self.view.serving())
+        reference = mock_client.return_value.collection.return_value
+        restarted = mock.MagicMock(is_active=True)
+        reference.on_snapshot.return_value = restarted
+        watch.is_active = False
+
+        self.assertFalse(self.view.serving())
+        watch.unsubscribe.assert_called_once()
+        self.assertEqual(reference.on_snapshot.call_count, 2)
+        self.assertEqual(self.view.query(), {})
+
+        callback = reference.on_snapshot.call_args[0][0]
+        callback(None, [_change("ADDED", "2", self.entries["2"])], None)
+        self.assertTrue(self.view.serving())
+        self.assertEqual(list(self.view.query()), ["2"])
+
+    def test_serving_restarts_at_most_once_per_interval(self, mock_client):
+        _, watch = self.start(mock_client)
+        reference = mock_client.return_value.collection.return_value
+        reference.on_snapshot.side_effect = RuntimeError("unavailable")
+        watch.is_active = False
+
+        self.assertFalse(self.view.serving())
+        self.assertFalse(self.view.serving())
+        self.assertEqual(reference.on_snapshot.call_count, 2)
+
+        self.clock.now = 5.0
+        reference.on_snapshot.side_effect = None
+        self.assertFalse(self.view.serving())
+        self.assertEqual(reference.on_snapshot.call_count, 3)
+        watch.unsubscribe.assert_called_once()
+
+    def test_serving_does_not_restart_stopped_view(self, mock_client):
+        _, watch = self.start(mock_client)
+        self.view.stop()
+        reference = mock_client.return_value.collection.return_value
+
+        self.assertFalse(self.view.serving())
+        self.assertEqual(reference.on_snapshot.call_count, 1)
+
+    def test_query_uses_indexes_and_filters(self, mock_client):
+        callback, _ = self.start(mock_client)
+        callback(None, [_change("ADDED", k, v)
+                        for k, v in self.entries.items()], None)
+
+        self.assertEqual(list(self.view.query()), ["1", "2", "3"])
+        self.assertEqual(
+            self.view.query({"isApproved": False, "location": "Here"}),
+            {"2": self.entries["2"]})
+        self.assertEqual(
+            self.view.query({"name": "c"}, field_paths=["name"]),
+            {"3": {"name": "c"}})
+        self.assertEqual(self.view.query({"location": "Nowhere"}), {})
+
+    def test_changes_update_entries_and_indexes(self, mock_client):
+        callback, _ = self.start(mock_client)
+        callback(None, [_change("ADDED", k, v)
+                        for k, v in self.entries.items()], None)
+        modified = {**self.entries["2"], "isApproved": True}
+        callback(None, [
+            _change("MODIFIED", "2", modified), _change("REMOVED", "1")], None)
+
+        self.assertEqual(list(self.view.query({"isApproved": True})), ["2"])
+        self.assertEqual(list(self.view.query({"isApproved": False})), ["3"])
+        self.assertIsNone(self.view.get("1"))
+
+    def test_get_returns_copy(self, mock_client):
+        callback, _ = self.start(mock_client)
+        callback(None, [_change("ADDED", "1", self.entries["1"])], None)
+
+        entry = self.view.get("1")
+        entry["id"] = "1"
+        self.assertNotIn("id", self.view.get("1"))
+        self.assertEqual(self.view.get("1", ["name"]), {"name": "a"})
+
+    def test_since_last_change_is_time_since_last_snapshot(
+            self, mock_client):
+        callback, _ = self.start(mock_client)
+        self.clock.now = 10.0
+        callback(None, [], None)
+        self.clock.now = 25.0
+
+        self.assertEqual(self.view.since_last_change(), 15.0)
+
+    def test_version_changes_with_entries(self, mock_client):
+        callback, _ = self.start(mock_client)
+        callback(None, [_change("ADDED", "1", self.entries["1"])], None)
+        version = self.view.version
+
+        callback(None, [], None)
+        self.assertEqual(self.view.version, version)
+        callback(None, [_change("REMOVED", "1")], None)
+        self.assertNotEqual(self.view.version, version)
+        version = self.view.version
+        self.view.stop()
+        self.assertNotEqual(self.view.version, version)
+
+    def test_versions_of_other_views_differ(self, mock_client):
+        other = CollectionView("submissions", clock=self.clock)
+        self.assertNotEqual(self.view.version, other.version)
+
+    def test_stop_unsubscribes_and_clears_view(self, mock_client):
+        callback, watch = self.start(mock_client)
+        callback(None, [_change("ADDED", "1", self.entries["1"])], None)
+        self.view.stop()
+
+        watch.unsubscribe.assert_called_once()
+        self.assertFalse(self.view.active)
+        self.assertEqual(self.view.query(), {})
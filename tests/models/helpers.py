@@ -1,5 +1,6 @@
 import contextlib
 import unittest
+from typing import Any
 from unittest import mock
 
 from springapi.exceptions import (
@@ -59,18 +60,19 @@ class ModelResponseAssertions(ResponseAssertions):
 
     @mock.patch('springapi.models.firebase.client.get_collection')
     def assert_get_collection_returns_all_valid_entries(
-            self, collection, method, valid, invalid, mock_get):
+            self, collection, method, valid, invalid, mock_get,
+            call_kwargs=None):
         mock_get.return_value = {**valid, **invalid}
         response = method()
         entries = [r.to_json() for r in response]
         valid_entries = [valid[k] for k in valid]
 
         self.assertListEqual(entries, valid_entries)
-        mock_get.assert_called_with(collection)
+        mock_get.assert_called_with(collection, **(call_kwargs or {}))
 
     @mock.patch('springapi.models.firebase.client.get_collection')
     def assert_get_collection_raises_CollectionNotFound(
-            self, collection, method, mock_get):
+            self, collection, method, mock_get, call_kwargs=None):
         exception = CollectionNotFound
         mock_get.side_effect = exception(collection)
         err = _create_collection_not_found_err_message(collection)
@@ -78,7 +80,7 @@ class ModelResponseAssertions(ResponseAssertions):
         with self._assert_expected_exception_and_error(
                 exception, err):
             method()
-        mock_get.assert_called_with(collection)
+        mock_get.assert_called_with(collection, **(call_kwargs or {}))
 
     @mock.patch('springapi.models.firebase.client.add_entry')
     @mock.patch('uuid.uuid4', MockUid.create_mock_uid)
@@ -118,23 +120,26 @@ class ModelResponseAssertions(ResponseAssertions):
 
     @mock.patch('springapi.models.firebase.client.get_entry')
     def assert_get_single_entry_returns_entry(
-            self, collection, cls, method, entry_id, expected, mock_get):
+            self, collection, cls, method, entry_id, expected, mock_get,
+            call_kwargs=None):
         mock_get.return_value = expected
         response = method(entry_id)
         response_json = cls.to_json(response)
         self.assertEqual(response_json, expected)
-        mock_get.assert_called_with(collection, entry_id)
+        mock_get.assert_called_with(
+            collection, entry_id, **(call_kwargs or {}))
 
     @mock.patch('springapi.models.firebase.client.get_entry')
     def assert_get_single_entry_raises_EntryNotFound(
-            self, collection, method, entry_id, mock_get):
+            self, collection, method, entry_id, mock_get, call_kwargs=None):
         exception = EntryNotFound
         mock_get.side_effect = exception(entry_id, collection)
         err = _create_entry_not_found_err_message(entry_id, collection)
 
         with self._assert_expected_exception_and_error(exception, err):
             method(entry_id)
-        mock_get.assert_called_with(collection, entry_id)
+        mock_get.assert_called_with(
+            collection, entry_id, **(call_kwargs or {}))
 
     @mock.patch('springapi.models.firebase.client.update_entry')
     def assert_update_single_entry_returns_success(
@@ -197,3 +202,159 @@ class ClientResponseAssertions(ResponseAssertions):
 
         with self._assert_expected_exception_and_error(exception, err):
             method(collection, data)
+
+
+class BackendContractTests:
+    """
+    Checks every storage backend in <springapi.models.backends> must pass.
+    Mix into a TestCase whose setUp gives the backend empty storage, and
+    set `backend` to the backend module.
+    """
+
+    backend: Any = None
+
+    def setUp(self):
+        super().setUp()
+        self.entries = populate_backend(self.backend)
+
+    def test_get_collection_returns_entries_in_id_order(self):
+        response = self.backend.get_collection("submissions")
+        self.assertEqual(response, self.entries)
+        self.assertEqual(list(response), ["1", "2", "3"])
+
+    def test_get_collection_raises_CollectionNotFound(self):
+        with self.assertRaises(CollectionNotFound):
+            self.backend.get_collection("tokens")
+        with self.assertRaises(CollectionNotFound):
+            self.backend.get_collection(
+                "submissions", filters={"location": "Nowhere"})
+
+    def test_get_collection_filters_on_field_values(self):
+        response = self.backend.get_collection(
+            "submissions", filters={"location": "Here", "isApproved": False})
+        self.assertEqual(response, {"3": self.entries["3"]})
+        response = self.backend.get_collection(
+            "submissions", "location", "There")
+        self.assertEqual(response, {"2": self.entries["2"]})
+
+    def test_get_collection_pages_after_id(self):
+        response = self.backend.get_collection(
+            "submissions", limit=1, start_after="1")
+        self.assertEqual(response, {"2": self.entries["2"]})
+
+    def test_get_collection_reads_only_field_paths(self):
+        response = self.backend.get_collection(
+            "submissions", field_paths=["name"])
+        self.assertEqual(response["1"], {"name": "Person"})
+
+    def test_stream_collection_yields_entries(self):
+        response = self.backend.stream_collection(
+            "submissions", filters={"location": "Here"})
+        self.assertEqual(
+            list(response),
+            [("1", self.entries["1"]), ("3", self.entries["3"])])
+        self.assertEqual(list(self.backend.stream_collection("tokens")), [])
+
+    def test_get_entry_returns_copy_of_entry(self):
+        entry = self.backend.get_entry("submissions", "2")
+        self.assertEqual(entry, self.entries["2"])
+        entry["name"] = "Changed"
+        self.assertEqual(
+            self.backend.get_entry("submissions", "2"), self.entries["2"])
+        self.assertEqual(
+            self.backend.get_entry("submissions", "2", ["location"]),
+            {"location": "There"})
+
+    def test_get_entry_raises_EntryNotFound(self):
+        with self.assertRaises(EntryNotFound):
+            self.backend.get_entry("submissions", "4")
+        with self.assertRaises(EntryNotFound):
+            self.backend.get_entry("tokens", "1")
+
+    def test_get_entries_returns_found_in_order_and_missing(self):
+        found, missing = self.backend.get_entries(
+            "submissions", ["3", "4", "1"])
+        self.assertEqual(list(found), ["3", "1"])
+        self.assertEqual(missing, ["4"])
+
+    def test_add_entry_returns_entry_with_id(self):
+        data = {"name": "New", "id": "abc"}
+        self.assertEqual(
+            self.backend.add_entry("submissions", data.copy()),
+            {"abc": {"name": "New", "id": "abc"}})
+        self.assertEqual(
+            self.backend.add_entry("tokens", data.copy(), verify=True),
+            {"abc": {"name": "New", "id": "abc"}})
+
+    def test_add_entry_raises_EntryAlreadyExists(self):
+        with self.assertRaises(EntryAlreadyExists):
+            self.backend.add_entry(
+                "submissions", {"name": "Again", "id": "1"})
+
+    def test_add_entry_raises_ValidationError_without_id(self):
+        with self.assertRaises(ValidationError):
+            self.backend.add_entry("submissions", {"name": "No id"})
+
+    def test_add_entries_writes_entries(self):
+        added, failed = self.backend.add_entries(
+            "submissions", [{"id": "5", "name": "A"}, {"id": "6"}])
+        self.assertEqual(
+            added, {"5": {"id": "5", "name": "A"}, "6": {"id": "6"}})
+        self.assertEqual(failed, {})
+        self.assertEqual(
+            self.backend.get_entry("submissions", "5"), {"name": "A"})
+
+    def test_add_entries_fails_whole_chunk_on_conflict(self):
+        added, failed = self.backend.add_entries(
+            "submissions", [{"id": "5", "name": "A"}, {"id": "1"}])
+        self.assertEqual(added, {})
+        self.assertEqual(set(failed), {"5", "1"})
+        self.assertIsInstance(failed["5"], EntryAlreadyExists)
+        with self.assertRaises(EntryNotFound):
+            self.backend.get_entry("submissions", "5")
+
+    def test_update_entry_sets_fields(self):
+        self.backend.update_entry(
+            "submissions", {"isApproved": True, "id": "2"}, "2")
+        self.assertEqual(
+            self.backend.get_entry("submissions", "2"),
+            {**self.entries["2"], "isApproved": True})
+
+    def test_update_entry_raises_EntryNotFound(self):
+        with self.assertRaises(EntryNotFound):
+            self.backend.update_entry(
+                "submissions", {"isApproved": True}, "4")
+
+    def test_update_entries_reports_missing(self):
+        updated, missing = self.backend.update_entries(
+            "submissions", ["2", "4", "3"], {"isApproved": True})
+        self.assertEqual(updated, ["2", "3"])
+        self.assertEqual(missing, ["4"])
+        response = self.backend.get_collection(
+            "submissions", filters={"isApproved": True})
+        self.assertEqual(set(response), {"1", "2", "3"})
+
+    def test_delete_entries(self):
+        self.backend.delete_entry("submissions", "1")
+        self.backend.delete_entries("submissions", ["2", "4"])
+        self.assertEqual(
+            list(self.backend.get_collection("submissions")), ["3"])
+
+    def test_email_addresses_are_ids_of_email_entries(self):
+        self.backend.add_entries(
+            self.backend.EMAIL_COLLECTION, [{"id": "a@b"}, {"id": "c@d"}])
+        self.assertEqual(
+            sorted(self.backend.get_email_addresses()), ["a@b", "c@d"])
+        self.assertTrue(self.backend.email_address_exists("A@b"))
+        self.assertFalse(self.backend.email_address_exists("e@f"))
+
+
+def populate_backend(backend):
+    entries = {
+        "1": {"name": "Person", "location": "Here", "isApproved": True},
+        "2": {"name": "Other", "location": "There", "isApproved": False},
+        "3": {"name": "Third", "location": "Here", "isApproved": False}
+    }
+    for entry_id, data in entries.items():
+        backend.add_entry("submissions", {**data, "id": entry_id})
+    return entries
@@ -0,0 +1,87 @@
+import threading
+import unittest
+from unittest import mock
+
+from springapi.exceptions import DatabaseUnavailable, EntryNotFound
+from springapi.models.memory import client
+from springapi.models.memory.client import (
+    add_entry, get_collection, get_entry)
+from tests.models.helpers import BackendContractTests, populate_backend
+
+
+class MemoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        client.clear()
+        client.configure_client()
+        self.addCleanup(client.clear)
+        self.addCleanup(client.configure_client)
+
+
+class TestMemoryClient(BackendContractTests, MemoryTestCase):
+
+    backend = client
+
+    def test_concurrent_adds_are_all_stored(self):
+        def add(start):
+            for i in range(start, start + 100):
+                add_entry("load", {"id": f"{i:04}"})
+
+        threads = [
+            threading.Thread(target=add, args=(n * 100,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(get_collection("load")), 800)
+
+
+@mock.patch("springapi.models.memory.client.time.sleep")
+class TestMemoryClientInjection(MemoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        populate_backend(client)
+
+    def test_no_latency_or_errors_by_default(self, mock_sleep):
+        get_entry("submissions", "1")
+        self.assertFalse(mock_sleep.called)
+
+    def test_fixed_latency_delays_every_call(self, mock_sleep):
+        client.configure_client(latency=0.05)
+        get_entry("submissions", "1")
+        get_collection("submissions")
+        self.assertEqual(mock_sleep.call_args_list, [mock.call(0.05)] * 2)
+
+    def test_latency_distribution_is_reproducible_with_seed(
+            self, mock_sleep):
+        delays = []
+        for _ in range(2):
+            client.configure_client(latency=0.05, latency_sigma=1, seed=7)
+            for _ in range(20):
+                get_entry("submissions", "1")
+            delays.append([c[0][0] for c in mock_sleep.call_args_list])
+            mock_sleep.reset_mock()
+        self.assertEqual(delays[0], delays[1])
+        self.assertGreater(len(set(delays[0])), 1)
+        self.assertTrue(all(d > 0 for d in delays[0]))
+
+    def test_error_rate_fails_share_of_calls(self, mock_sleep):
+        client.configure_client(error_rate=0.5, seed=1)
+        failures = 0
+        for _ in range(200):
+            try:
+                get_entry("submissions", "1")
+            except DatabaseUnavailable:
+                failures += 1
+        self.assertTrue(60 < failures < 140)
+
+    def test_error_rate_of_one_fails_every_call(self, mock_sleep):
+        client.configure_client(error_rate=1)
+        with self.assertRaises(DatabaseUnavailable) as cm:
+            add_entry("submissions", {"id": "9"})
+        self.assertEqual(cm.exception.code, 503)
+        client.configure_client()
+        with self.assertRaises(EntryNotFound):
+            get_entry("submissions", "9")
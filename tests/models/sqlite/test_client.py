@@ -0,0 +1,57 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from springapi.exceptions import ValidationError
+from springapi.models.sqlite import client, db
+from tests.models.helpers import BackendContractTests, populate_backend
+
+
+class SqliteTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = os.path.join(directory.name, "test.sqlite")
+        db.init_db(self.database)
+
+
+class TestSqliteClient(BackendContractTests, SqliteTestCase):
+
+    backend = client
+
+    def test_get_collection_rejects_field_names_that_are_not_plain(self):
+        with self.assertRaises(ValidationError):
+            client.get_collection("submissions", filters={"a') OR ('1": "x"})
+
+    def test_threads_use_their_own_connection(self):
+        connections = []
+        thread = threading.Thread(
+            target=lambda: connections.append(client.get_client()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(connections[0], client.get_client())
+
+
+class TestSqliteSchema(SqliteTestCase):
+
+    def test_database_uses_write_ahead_log(self):
+        mode = client.get_client().execute("PRAGMA journal_mode").fetchone()
+        self.assertEqual(mode[0], "wal")
+
+    def test_init_db_keeps_stored_entries(self):
+        entries = populate_backend(client)
+        db.init_db(self.database)
+        self.assertEqual(client.get_collection("submissions"), entries)
+
+    def test_filters_use_indexes(self):
+        for field, index in [
+                ("isApproved", "entries_is_approved"),
+                ("location", "entries_location")]:
+            sql, params = client._select(
+                "submissions", filters={field: "x"})
+            plan = client.get_client().execute(
+                f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            self.assertIn(index, " ".join(row[-1] for row in plan))
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import springapi.models.firebase.client as firebase_client
+import springapi.models.sqlite.client as sqlite_client
+from springapi.models import backends
+from springapi.models.backends import (
+    EMAIL, OPERATIONS, SUBMISSION, TOKEN, get_backend, register_backend,
+    reset_backends, use_backend)
+from springapi.models.email import EMAIL_INDEX, Email
+from springapi.models.sqlite import db
+from springapi.models.submission import Submission
+from springapi.models.token import Token
+
+
+class TestBackendRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(reset_backends)
+
+    def test_get_backend_defaults_to_firebase(self):
+        self.assertIs(get_backend(SUBMISSION), firebase_client)
+        self.assertIs(get_backend(TOKEN), firebase_client)
+        self.assertIs(get_backend(EMAIL), firebase_client)
+
+    def test_emails_stay_on_firebase_when_tokens_move(self):
+        use_backend(TOKEN, "sqlite")
+        self.assertIs(get_backend(EMAIL), firebase_client)
+
+    def test_use_backend_selects_backend_per_model(self):
+        use_backend(TOKEN, "sqlite")
+        self.assertIs(get_backend(TOKEN), sqlite_client)
+        self.assertIs(get_backend(SUBMISSION), firebase_client)
+
+    def test_models_using_lists_models_on_backend(self):
+        use_backend(TOKEN, "sqlite")
+        use_backend(SUBMISSION, "memory")
+        self.assertEqual(backends.models_using("sqlite"), [TOKEN])
+        self.assertEqual(backends.models_using("firebase"), [])
+
+    def test_use_backend_raises_ValueError_on_unknown_scheme(self):
+        with self.assertRaises(ValueError) as context:
+            use_backend(TOKEN, "badscheme")
+        self.assertEqual(
+            str(context.exception), "Unknown database protocol: badscheme")
+
+    def test_register_backend_requires_every_operation(self):
+        backend = types.ModuleType("partial")
+        backend.get_entry = mock.Mock()
+        with self.assertRaises(ValueError):
+            register_backend("partial", backend)
+        self.assertNotIn("partial", backends.BACKENDS)
+
+    @mock.patch.dict(backends.BACKENDS)
+    def test_registered_backend_serves_models(self):
+        backend = types.ModuleType("custom")
+        for operation in OPERATIONS:
+            setattr(backend, operation, mock.Mock())
+        backend.get_entry.return_value = {
+            "name": "Person", "message": "Hi", "location": "Here"}
+        register_backend("custom", backend)
+        use_backend(SUBMISSION, "custom")
+
+        submission = Submission.get_submission("abc")
+        self.assertEqual(submission.to_json()["name"], "Person")
+        backend.get_entry.assert_called_once_with(
+            "submissions", "abc", field_paths=None)
+
+
+class TestModelsOnSqlite(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        db.init_db(os.path.join(directory.name, "test.sqlite"))
+        use_backend(TOKEN, "sqlite")
+        use_backend(EMAIL, "sqlite")
+        self.addCleanup(reset_backends)
+        EMAIL_INDEX.invalidate()
+        self.addCleanup(EMAIL_INDEX.invalidate)
+
+    def test_tokens_are_stored_in_sqlite(self):
+        Token.create_token({"token": "abc", "email": "foo@bar"})
+        self.assertTrue(Token.token_exists("abc"))
+        self.assertFalse(Token.token_exists("def"))
+        Token.delete_token("abc")
+        self.assertFalse(Token.token_exists("abc"))
+
+    def test_authorized_emails_are_read_from_sqlite(self):
+        sqlite_client.add_entry(sqlite_client.EMAIL_COLLECTION, {"id": "a@b"})
+        self.assertIn("A@b", Email.get_authorized_emails())
+        self.assertNotIn("c@d", Email.get_authorized_emails())
+
+    def test_authorize_emails_adds_new_addresses(self):
+        self.assertEqual(
+            Email.authorize_emails(["A@b", "c@d"]), ["a@b", "c@d"])
+        self.assertEqual(Email.authorize_emails(["a@B", "e@f"]), ["e@f"])
+        self.assertIn("e@f", Email.get_authorized_emails())
+        self.assertEqual(
+            sorted(sqlite_client.get_email_addresses()),
+            ["a@b", "c@d", "e@f"])
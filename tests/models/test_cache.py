@@ -0,0 +1,135 @@
+import unittest
+
+from springapi.models.cache import HashedSetCache, hash_value
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHashedSetCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.loaded = [["abc", "def"]]
+        self.calls = 0
+
+    def loader(self):
+        self.calls += 1
+        return self.loaded[-1]
+
+    def create_cache(self, ttl=60):
+        return HashedSetCache(self.loader, ttl, clock=self.clock)
+
+    def wait_for_refresh(self, cache):
+        thread = cache._thread
+        if thread is not None:
+            thread.join()
+
+    def test_hash_value_returns_sha256_hexdigest(self):
+        self.assertEqual(
+            hash_value("abc"),
+            "ba7816bf8f01cfea414140de5dae2223"
+            "b00361a396177a9cb410ff61f20015ad")
+
+    def test_contains_loads_once_and_answers_membership(self):
+        cache = self.create_cache()
+        self.assertIn("abc", cache)
+        self.assertNotIn("xyz", cache)
+        self.assertNotIn(None, cache)
+        self.assertEqual(self.calls, 1)
+
+    def test_contains_does_not_reload_within_ttl(self):
+        cache = self.create_cache()
+        self.assertIn("abc", cache)
+        self.clock.now = 59
+        self.assertIn("def", cache)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_lookup_answers_from_current_set_and_refreshes(self):
+        cache = self.create_cache()
+        self.assertIn("abc", cache)
+        self.loaded.append(["xyz"])
+        self.clock.now = 60
+
+        self.assertIn("abc", cache)
+        self.wait_for_refresh(cache)
+        self.assertEqual(self.calls, 2)
+        self.assertNotIn("abc", cache)
+        self.assertIn("xyz", cache)
+
+    def test_add_is_visible_without_reload(self):
+        cache = self.create_cache()
+        self.assertNotIn("xyz", cache)
+        cache.add("xyz")
+        self.assertIn("xyz", cache)
+        self.assertEqual(self.calls, 1)
+
+    def test_add_survives_concurrent_refresh(self):
+        cache = self.create_cache()
+
+        def loader():
+            cache.add("xyz")
+            return ["abc"]
+
+        cache._loader = loader
+        cache.refresh()
+        self.assertIn("xyz", cache)
+        self.assertIn("abc", cache)
+
+    def test_discard_removes_value(self):
+        cache = self.create_cache()
+        self.assertIn("abc", cache)
+        cache.discard("abc")
+        self.assertIn("def", cache)
+        self.assertNotIn("abc", cache)
+
+    def test_invalidate_forces_reload_on_next_lookup(self):
+        cache = self.create_cache()
+        self.assertIn("abc", cache)
+        self.loaded.append(["xyz"])
+        cache.invalidate()
+
+        self.assertIn("xyz", cache)
+        self.assertEqual(self.calls, 2)
+
+    def test_values_expire_without_reload(self):
+        now = FakeClock()
+        self.loaded.append([("abc", 100), ("def", 0)])
+        cache = HashedSetCache(self.loader, 60, clock=self.clock, now=now)
+        now.now = 49
+        self.assertIn("abc", cache)
+        cache.add("xyz", 50)
+        self.assertIn("xyz", cache)
+
+        now.now = 100
+        self.assertNotIn("abc", cache)
+        self.assertNotIn("xyz", cache)
+        self.assertIn("def", cache)
+        self.assertEqual(self.calls, 1)
+
+    def test_fallback_may_return_expiry(self):
+        now = FakeClock()
+        cache = HashedSetCache(
+            self.loader, 60, clock=self.clock, now=now,
+            fallback=lambda value: 10 if value == "xyz" else False)
+        self.assertIn("xyz", cache)
+        self.assertNotIn("uvw", cache)
+        now.now = 10
+        self.assertNotIn("xyz", cache)
+
+    def test_fallback_is_asked_about_missing_values(self):
+        found = {"xyz"}
+        cache = HashedSetCache(
+            self.loader, 60, clock=self.clock, fallback=found.__contains__)
+        self.assertIn("xyz", cache)
+        self.assertNotIn("uvw", cache)
+
+        found.clear()
+        self.assertIn("xyz", cache)
+        self.assertEqual(self.calls, 1)
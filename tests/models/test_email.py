@@ -1,12 +1,49 @@
 import unittest
-from springapi.models.email import Email
+from springapi.models.email import EMAIL_INDEX, Email
 from unittest import mock
 
 
+@mock.patch('springapi.models.firebase.client.email_address_exists')
 @mock.patch('springapi.models.firebase.client.get_email_addresses')
 class TestUserGetAuthorizedEmails(unittest.TestCase):
 
-    def test_get_authorized_emails_returns_email_list(self, mock_addr):
-        expected = mock_addr.return_value = ["foo@bar"]
+    def setUp(self):
+        EMAIL_INDEX.invalidate()
+
+    def tearDown(self):
+        EMAIL_INDEX.invalidate()
+
+    def test_get_authorized_emails_answers_membership(
+            self, mock_addr, mock_exists):
+        mock_addr.return_value = ["foo@bar"]
+        mock_exists.return_value = False
         email_list = Email.get_authorized_emails()
-        self.assertEqual(email_list, expected)
+        self.assertIn("foo@bar", email_list)
+        self.assertIn("Foo@Bar", email_list)
+        self.assertNotIn("bar@foo", email_list)
+        self.assertEqual(mock_addr.call_count, 1)
+
+    def test_get_authorized_emails_asks_auth_provider_on_miss(
+            self, mock_addr, mock_exists):
+        mock_addr.return_value = []
+        mock_exists.return_value = True
+        self.assertIn("foo@bar", Email.get_authorized_emails())
+        self.assertIn("foo@bar", Email.get_authorized_emails())
+        mock_exists.assert_called_once_with("foo@bar")
+
+    def test_refresh_authorized_emails_reloads_list(
+            self, mock_addr, mock_exists):
+        mock_addr.return_value = ["foo@bar"]
+        mock_exists.return_value = False
+        self.assertNotIn("bar@foo", Email.get_authorized_emails())
+
+        mock_addr.return_value = ["bar@foo"]
+        Email.refresh_authorized_emails()
+        self.assertIn("bar@foo", Email.get_authorized_emails())
+        self.assertNotIn("foo@bar", Email.get_authorized_emails())
+
+    def test_authorize_emails_raises_ValueError_on_firebase(
+            self, mock_addr, mock_exists):
+        with self.assertRaises(ValueError):
+            Email.authorize_emails(["foo@bar"])
+        self.assertFalse(mock_addr.called)
@@ -1,3 +1,11 @@
+import asyncio
+from unittest import mock
+
+from springapi.exceptions import (
+    CollectionNotFound, EntryNotFound, ValidationError)
+from springapi.models.backends import SUBMISSION, reset_backends, use_backend
+from springapi.models.helpers import encode_cursor
+from springapi.models.memory import client as memory_client
 from springapi.models.submission import COLLECTION, Submission
 from tests.models.helpers import ModelResponseAssertions
 
@@ -8,11 +16,249 @@ class TestSubmissionGetAllSubmissions(ModelResponseAssertions):
         valid = {"1": {"name": "a", "message": "b", "location": "c"}}
         invalid = {"2": {"name": "d", "message": "e"}}
         self.assert_get_collection_returns_all_valid_entries(
-            COLLECTION, Submission.get_submissions, valid, invalid)
+            COLLECTION, Submission.get_submissions, valid, invalid,
+            call_kwargs={"filters": None, "field_paths": None})
 
     def test_get_submissions_raises_CollectionNotFound(self):
         self.assert_get_collection_raises_CollectionNotFound(
-            COLLECTION, Submission.get_submissions)
+            COLLECTION, Submission.get_submissions,
+            call_kwargs={"filters": None, "field_paths": None})
+
+
+@mock.patch('springapi.models.firebase.client.get_entry')
+@mock.patch('springapi.models.firebase.client.get_collection')
+@mock.patch('springapi.models.submission.SUBMISSION_VIEW')
+class TestSubmissionServedFromView(ModelResponseAssertions):
+
+    def test_get_submissions_reads_view_if_active(
+            self, mock_view, mock_get, mock_get_entry):
+        mock_view.serving.return_value = True
+        mock_view.query.return_value = {
+            "1": {"name": "a", "message": "b", "location": "c"}}
+        submissions = Submission.get_submissions({"isApproved": False})
+
+        self.assertEqual([s.to_json()["id"] for s in submissions], ["1"])
+        mock_view.query.assert_called_with({"isApproved": False}, None)
+        self.assertFalse(mock_get.called)
+
+    def test_get_submissions_raises_CollectionNotFound_if_view_empty(
+            self, mock_view, mock_get, mock_get_entry):
+        mock_view.serving.return_value = True
+        mock_view.query.return_value = {}
+
+        with self.assertRaises(CollectionNotFound):
+            Submission.get_submissions()
+
+    def test_get_submission_reads_view_if_active(
+            self, mock_view, mock_get, mock_get_entry):
+        mock_view.serving.return_value = True
+        mock_view.get.side_effect = lambda entry_id, field_paths: \
+            {"name": "a", "message": "b", "location": "c"} \
+            if entry_id == "1" else None
+
+        self.assertEqual(
+            Submission.get_submission("1").to_json()["name"], "a")
+        with self.assertRaises(EntryNotFound):
+            Submission.get_submission("2")
+        self.assertFalse(mock_get_entry.called)
+
+    def test_reads_fall_back_to_firestore_if_view_inactive(
+            self, mock_view, mock_get, mock_get_entry):
+        mock_view.serving.return_value = False
+        mock_get.return_value = {
+            "1": {"name": "a", "message": "b", "location": "c"}}
+
+        self.assertEqual(len(Submission.get_submissions()), 1)
+        self.assertFalse(mock_view.query.called)
+
+    def test_get_view_version_is_None_if_view_inactive(
+            self, mock_view, mock_get, mock_get_entry):
+        mock_view.serving.return_value = False
+        self.assertIsNone(Submission.get_view_version())
+        mock_view.serving.return_value = True
+        mock_view.version = "view:1"
+        self.assertEqual(Submission.get_view_version(), "view:1")
+
+    def test_async_reads_use_view_if_active(
+            self, mock_view, mock_get, mock_get_entry):
+        mock_view.serving.return_value = True
+        mock_view.query.return_value = {
+            "1": {"name": "a", "message": "b", "location": "c"}}
+        mock_view.get.return_value = {"name": "a"}
+
+        submissions = asyncio.run(Submission.get_submissions_async())
+        self.assertEqual([s.to_json()["id"] for s in submissions], ["1"])
+        submission = asyncio.run(
+            Submission.get_submission_async("1", ["id", "name"]))
+        self.assertEqual(submission.to_json(), {"id": "1", "name": "a"})
+        self.assertFalse(mock_get.called)
+        self.assertFalse(mock_get_entry.called)
+
+    def test_async_reads_run_other_backends_on_executor(
+            self, mock_view, mock_get, mock_get_entry):
+        use_backend(SUBMISSION, "memory")
+        self.addCleanup(reset_backends)
+        self.addCleanup(memory_client.clear)
+        memory_client.add_entry(COLLECTION, {
+            "id": "1", "name": "a", "message": "b", "location": "c"})
+
+        submissions = asyncio.run(Submission.get_submissions_async())
+        self.assertEqual([s.to_json()["id"] for s in submissions], ["1"])
+        submission = asyncio.run(Submission.get_submission_async("1"))
+        self.assertEqual(submission.to_json()["name"], "a")
+        self.assertFalse(mock_view.query.called)
+
+    def test_reads_ignore_view_if_backend_is_not_firebase(
+            self, mock_view, mock_get, mock_get_entry):
+        mock_view.serving.return_value = True
+        memory_client.clear()
+        self.addCleanup(memory_client.clear)
+        use_backend(SUBMISSION, "memory")
+        self.addCleanup(reset_backends)
+        memory_client.add_entry(COLLECTION, {
+            "id": "1", "name": "a", "message": "b", "location": "c"})
+
+        self.assertEqual(
+            [s.to_json()["id"] for s in Submission.get_submissions()], ["1"])
+        self.assertEqual(
+            Submission.get_submission("1").to_json()["name"], "a")
+        self.assertFalse(mock_view.query.called)
+        self.assertFalse(mock_view.get.called)
+
+
+class TestSubmissionParseFilters(ModelResponseAssertions):
+
+    def test_parse_filters_types_whitelisted_fields(self):
+        filters = Submission.parse_filters({
+            "isApproved": "false", "allowSharing": "True",
+            "location": "Here", "name": "ignored", "limit": "10"})
+
+        self.assertEqual(filters, {
+            "isApproved": False, "allowSharing": True, "location": "Here"})
+
+    def test_parse_filters_raises_ValidationError_on_bad_boolean(self):
+        with self.assertRaises(ValidationError) as context:
+            Submission.parse_filters({"isApproved": "yes", "allowSNS": "1"})
+
+        self.assertEqual(
+            context.exception.error_response_body(),
+            {"error": "validation_failure",
+             "message": "Invalid: allowSNS, isApproved"})
+
+
+class TestSubmissionProjection(ModelResponseAssertions):
+
+    def test_parse_projection_returns_fields_in_model_order_with_id(self):
+        projection = Submission.parse_projection("name, isApproved")
+
+        self.assertEqual(projection, ["isApproved", "name", "id"])
+
+    def test_parse_projection_returns_None_if_not_given(self):
+        self.assertIsNone(Submission.parse_projection(None))
+
+    def test_parse_projection_raises_ValidationError_on_unknown_field(self):
+        with self.assertRaises(ValidationError) as context:
+            Submission.parse_projection("name,password")
+
+        self.assertEqual(
+            context.exception.error_response_body(),
+            {"error": "validation_failure",
+             "message": "Not allowed: password"})
+
+    @mock.patch('springapi.models.firebase.client.get_collection')
+    def test_get_submissions_reads_and_emits_projected_fields(
+            self, mock_get):
+        mock_get.return_value = {
+            "1": {"name": "a", "isApproved": True},
+            "2": {"isApproved": False}
+        }
+        projection = ["isApproved", "name", "id"]
+        submissions = Submission.get_submissions(projection=projection)
+
+        self.assertEqual(
+            [s.to_json() for s in submissions],
+            [{"isApproved": True, "name": "a", "id": "1"}])
+        mock_get.assert_called_with(
+            COLLECTION, filters=None, field_paths=["isApproved", "name"])
+
+    @mock.patch('springapi.models.firebase.client.get_entry')
+    def test_get_submission_reads_and_emits_projected_fields(self, mock_get):
+        mock_get.return_value = {"message": "b"}
+        submission = Submission.get_submission("1", ["message", "id"])
+
+        self.assertEqual(submission.to_json(), {"message": "b", "id": "1"})
+        mock_get.assert_called_with(COLLECTION, "1", field_paths=["message"])
+
+
+@mock.patch('springapi.models.firebase.client.stream_collection')
+class TestSubmissionStreamSubmissions(ModelResponseAssertions):
+
+    def test_stream_submissions_yields_valid_entries(self, mock_stream):
+        mock_stream.return_value = iter([
+            ("1", {"name": "a", "message": "b", "location": "c"}),
+            ("2", {"name": "d", "message": "e"})
+        ])
+        submissions = Submission.stream_submissions()
+
+        self.assertFalse(mock_stream.called)
+        self.assertEqual([s.to_json()["id"] for s in submissions], ["1"])
+        mock_stream.assert_called_with(
+            COLLECTION, filters=None, field_paths=None)
+
+
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestSubmissionGetSubmissionsPage(ModelResponseAssertions):
+
+    def test_get_submissions_page_returns_next_cursor_if_page_full(
+            self, mock_get):
+        mock_get.return_value = {
+            "1": {"name": "a", "message": "b", "location": "c"},
+            "2": {"name": "d", "message": "e"}
+        }
+        page, next_cursor = Submission.get_submissions_page(2)
+
+        self.assertEqual([s.to_json()["id"] for s in page], ["1"])
+        self.assertEqual(next_cursor, encode_cursor("2"))
+        mock_get.assert_called_with(
+            COLLECTION, limit=2, start_after=None, filters=None,
+            field_paths=None)
+
+    def test_get_submissions_page_starts_after_cursor(self, mock_get):
+        mock_get.return_value = {
+            "3": {"name": "a", "message": "b", "location": "c"}}
+        page, next_cursor = Submission.get_submissions_page(
+            2, encode_cursor("2"))
+
+        self.assertEqual(len(page), 1)
+        self.assertIsNone(next_cursor)
+        mock_get.assert_called_with(
+            COLLECTION, limit=2, start_after="2", filters=None,
+            field_paths=None)
+
+    def test_get_submissions_page_returns_empty_page_past_end(
+            self, mock_get):
+        mock_get.side_effect = CollectionNotFound(COLLECTION)
+        page, next_cursor = Submission.get_submissions_page(
+            2, encode_cursor("9"))
+
+        self.assertEqual(page, [])
+        self.assertIsNone(next_cursor)
+
+    def test_get_submissions_page_raises_CollectionNotFound_on_first_page(
+            self, mock_get):
+        mock_get.side_effect = CollectionNotFound(COLLECTION)
+        with self.assertRaises(CollectionNotFound):
+            Submission.get_submissions_page(2)
+
+    def test_get_submissions_page_raises_ValidationError_on_bad_cursor(
+            self, mock_get):
+        with self.assertRaises(ValidationError) as context:
+            Submission.get_submissions_page(2, "%%%")
+
+        self.assertEqual(
+            context.exception.error_response_body(),
+            {"error": "validation_failure", "message": "Invalid: cursor"})
+        self.assertFalse(mock_get.called)
 
 
 class TestSubmissionGetSingleSubmission(ModelResponseAssertions):
@@ -23,11 +269,12 @@ class TestSubmissionGetSingleSubmission(ModelResponseAssertions):
             "id": entry_id, "name": "a", "message": "b", "location": "c"}
         self.assert_get_single_entry_returns_entry(
             COLLECTION, Submission, Submission.get_submission, entry_id,
-            expected)
+            expected, call_kwargs={"field_paths": None})
 
     def test_get_submission_raises_EntryNotFound(self):
         self.assert_get_single_entry_raises_EntryNotFound(
-            COLLECTION, Submission.get_submission, "1")
+            COLLECTION, Submission.get_submission, "1",
+            call_kwargs={"field_paths": None})
 
 
 class TestSubmissionCreateSubmission(ModelResponseAssertions):
@@ -61,6 +308,18 @@ class TestSubmissionCreateSubmission(ModelResponseAssertions):
             COLLECTION, Submission.create_submission, data)
 
 
+@mock.patch('springapi.models.firebase.client.add_entries')
+class TestSubmissionCreateSubmissions(ModelResponseAssertions):
+
+    def test_create_submissions_writes_nothing_if_all_invalid(self, mock_add):
+        mock_add.return_value = ({}, {})
+        results = Submission.create_submissions([{"name": "a"}, []])
+
+        self.assertEqual([r["status"] for r in results], [400, 400])
+        self.assertEqual([r["index"] for r in results], [0, 1])
+        mock_add.assert_called_with(COLLECTION, [])
+
+
 class TestSubmissionUpdateSubmission(ModelResponseAssertions):
 
     def test_update_submission_returns_success_if_found_and_valid(self):
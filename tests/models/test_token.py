@@ -1,7 +1,16 @@
-from springapi.models.token import COLLECTION, Token
+from unittest import mock
+
+from springapi.exceptions import (
+    CollectionNotFound, EntryAlreadyExists, EntryNotFound)
+from springapi.models.cache import hash_value
+from springapi.models.token import (
+    COLLECTION, REVOKED_COLLECTION, REVOKED_INDEX, TOKEN_INDEX, Token)
 from tests.models.helpers import ModelResponseAssertions
 
 
+DEFAULTS = {"email": "", "expires": 0}
+
+
 class TestTokenGetAllTokens(ModelResponseAssertions):
 
     def test_get_tokens_returns_all_valid_entries(self):
@@ -15,32 +24,336 @@ class TestTokenGetAllTokens(ModelResponseAssertions):
             COLLECTION, Token.get_tokens)
 
 
+@mock.patch('springapi.models.firebase.client.get_entry')
+class TestTokenGetToken(ModelResponseAssertions):
+
+    def test_get_token_reads_single_entry_by_token_hash(self, mock_get):
+        mock_get.return_value = {"token": "abc123"}
+        token = Token.get_token("abc123")
+
+        self.assertEqual(
+            token.to_json(),
+            {**DEFAULTS, "id": hash_value("abc123"), "token": "abc123"})
+        mock_get.assert_called_once_with(COLLECTION, hash_value("abc123"))
+
+    def test_get_token_raises_EntryNotFound(self, mock_get):
+        entry_id = hash_value("abc123")
+        mock_get.side_effect = EntryNotFound(entry_id, COLLECTION)
+
+        with self.assertRaises(EntryNotFound):
+            Token.get_token("abc123")
+        mock_get.assert_called_once_with(COLLECTION, entry_id)
+
+    def test_token_exists(self, mock_get):
+        mock_get.return_value = {"token": "abc123"}
+        self.assertTrue(Token.token_exists("abc123"))
+
+        mock_get.return_value = {"token": "abc123", "expires": 2 ** 40}
+        self.assertTrue(Token.token_exists("abc123"))
+
+        mock_get.return_value = {"token": "abc123", "expires": 1}
+        self.assertFalse(Token.token_exists("abc123"))
+
+        mock_get.side_effect = EntryNotFound("abc123", COLLECTION)
+        self.assertFalse(Token.token_exists("abc123"))
+
+
+@mock.patch('springapi.models.firebase.client.get_entry')
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestTokenGetValidTokens(ModelResponseAssertions):
+
+    def setUp(self):
+        TOKEN_INDEX.invalidate()
+
+    def tearDown(self):
+        TOKEN_INDEX.invalidate()
+
+    def test_get_valid_tokens_answers_membership(self, mock_get, mock_entry):
+        mock_get.return_value = {"1": {"token": "abc"}, "2": {"token": 1}}
+        mock_entry.side_effect = EntryNotFound("def", COLLECTION)
+        tokens = Token.get_valid_tokens()
+        self.assertIn("abc", tokens)
+        self.assertNotIn("def", tokens)
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_get_valid_tokens_omits_expired_tokens(
+            self, mock_get, mock_entry):
+        mock_get.return_value = {
+            "1": {"token": "abc", "expires": 1},
+            "2": {"token": "def", "expires": 2 ** 40}
+        }
+        mock_entry.side_effect = EntryNotFound("abc", COLLECTION)
+        tokens = Token.get_valid_tokens()
+        self.assertNotIn("abc", tokens)
+        self.assertIn("def", tokens)
+
+    @mock.patch.object(TOKEN_INDEX, '_now')
+    def test_get_valid_tokens_rejects_cached_token_once_expired(
+            self, mock_time, mock_get, mock_entry):
+        mock_time.return_value = 2 ** 40 - 1
+        mock_get.return_value = {"1": {"token": "abc", "expires": 2 ** 40}}
+        mock_entry.side_effect = EntryNotFound("abc", COLLECTION)
+        self.assertIn("abc", Token.get_valid_tokens())
+
+        mock_time.return_value = 2 ** 40
+        self.assertNotIn("abc", Token.get_valid_tokens())
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_get_valid_tokens_is_empty_if_collection_not_found(
+            self, mock_get, mock_entry):
+        mock_get.side_effect = CollectionNotFound(COLLECTION)
+        mock_entry.side_effect = EntryNotFound("abc", COLLECTION)
+        self.assertNotIn("abc", Token.get_valid_tokens())
+
+    def test_get_valid_tokens_falls_back_to_single_entry_read(
+            self, mock_get, mock_entry):
+        mock_get.return_value = {"1": {"token": "abc"}}
+        mock_entry.return_value = {"token": "def"}
+        tokens = Token.get_valid_tokens()
+        self.assertIn("def", tokens)
+        self.assertIn("def", tokens)
+        mock_entry.assert_called_once_with(COLLECTION, hash_value("def"))
+
+    @mock.patch('springapi.models.firebase.client.add_entry')
+    def test_create_token_adds_to_valid_tokens(
+            self, mock_add, mock_get, mock_entry):
+        mock_get.return_value = {"1": {"token": "abc"}}
+        mock_entry.side_effect = EntryNotFound("def", COLLECTION)
+        mock_add.side_effect = lambda c, d: {d["id"]: dict(d)}
+        self.assertNotIn("def", Token.get_valid_tokens())
+
+        Token.create_token({"token": "def"})
+        self.assertIn("def", Token.get_valid_tokens())
+        self.assertEqual(mock_get.call_count, 1)
+
+
+@mock.patch('springapi.models.firebase.client.add_entry')
 class TestTokenCreateToken(ModelResponseAssertions):
 
-    def test_create_token_returns_json_if_data_valid(self):
+    def test_create_token_stores_entry_under_token_hash(self, mock_add):
         data = {"token": "abc123"}
-        self.assert_create_entry_returns_success(
-            COLLECTION, Token, Token.create_token, data)
+        expected = {**DEFAULTS, "id": hash_value("abc123"), "token": "abc123"}
+        mock_add.return_value = {expected["id"]: {"token": "abc123"}}
+
+        result = Token.create_token(data)
+        self.assertEqual(result.to_json(), expected)
+        mock_add.assert_called_with(COLLECTION, expected)
 
-    def test_create_token_raises_ValidationError_not_allowed(self):
+    def test_create_token_raises_ValidationError_not_allowed(self, mock_add):
         data = {"token": "abc123", "bad_field": "err"}
         message = "bad_field"
         self.assert_create_entry_raises_ValidationError(
             Token.create_token, data, message, "not_allowed")
 
-    def test_create_token_raises_ValidationError_missing(self):
+    def test_create_token_raises_ValidationError_missing(self, mock_add):
         data = {}
         message = "token"
         self.assert_create_entry_raises_ValidationError(
             Token.create_token, data, message, "missing")
 
-    def test_create_token_raises_ValidationError_type(self):
+    def test_create_token_raises_ValidationError_type(self, mock_add):
         data = {"token": 123}
         message = "token is <class 'int'>, should be <class 'str'>."
         self.assert_create_entry_raises_ValidationError(
             Token.create_token, data, message, "type")
 
-    def test_create_token_raises_EntryAlreadyExists(self):
-        data = {"token": "abc123"}
-        self.assert_create_entry_raises_EntryAlreadyExists(
-            COLLECTION, Token.create_token, data)
+    def test_create_token_returns_existing_token_if_already_stored(
+            self, mock_add):
+        entry_id = hash_value("abc123")
+        mock_add.side_effect = EntryAlreadyExists(entry_id, COLLECTION)
+
+        result = Token.create_token({"token": "abc123"})
+        self.assertEqual(
+            result.to_json(), {**DEFAULTS, "id": entry_id, "token": "abc123"})
+
+
+@mock.patch('springapi.models.firebase.client.delete_entry')
+@mock.patch('springapi.models.firebase.client.get_collection')
+@mock.patch('springapi.models.firebase.client.add_entry')
+class TestTokenRevokeToken(ModelResponseAssertions):
+
+    def setUp(self):
+        REVOKED_INDEX.invalidate()
+        TOKEN_INDEX.invalidate()
+
+    def tearDown(self):
+        REVOKED_INDEX.invalidate()
+        TOKEN_INDEX.invalidate()
+
+    def test_revoke_token_stores_digest_and_updates_revoked_set(
+            self, mock_add, mock_get, mock_delete):
+        mock_get.side_effect = CollectionNotFound(REVOKED_COLLECTION)
+        mock_add.side_effect = lambda c, d: {d["id"]: dict(d)}
+        self.assertNotIn("abc", Token.get_revoked_tokens())
+
+        Token.revoke_token("abc")
+        self.assertIn("abc", Token.get_revoked_tokens())
+        mock_add.assert_called_with(
+            REVOKED_COLLECTION, {"id": hash_value("abc"), "expires": 0})
+        mock_get.assert_called_once_with(REVOKED_COLLECTION)
+
+    def test_revoke_token_stores_expiry(self, mock_add, mock_get, mock_delete):
+        mock_get.return_value = {}
+        mock_add.side_effect = lambda c, d: {d["id"]: dict(d)}
+
+        revoked = Token.revoke_token("abc", expires=300)
+        self.assertEqual(revoked.to_json()["expires"], 300)
+        mock_add.assert_called_with(
+            REVOKED_COLLECTION, {"id": hash_value("abc"), "expires": 300})
+
+    def test_revoke_token_deletes_stored_token(
+            self, mock_add, mock_get, mock_delete):
+        mock_get.side_effect = lambda c: {
+            COLLECTION: {hash_value("abc"): {"token": "abc"}},
+            REVOKED_COLLECTION: {}}[c]
+        self.assertIn("abc", Token.get_valid_tokens())
+
+        Token.revoke_token("abc")
+        mock_delete.assert_called_once_with(COLLECTION, hash_value("abc"))
+        with mock.patch(
+                'springapi.models.firebase.client.get_entry') as mock_entry:
+            mock_entry.side_effect = EntryNotFound("abc", COLLECTION)
+            self.assertNotIn("abc", Token.get_valid_tokens())
+
+    def test_revoked_set_loads_digests_and_legacy_tokens(
+            self, mock_add, mock_get, mock_delete):
+        mock_get.return_value = {
+            hash_value("abc"): {"expires": 2 ** 40},
+            "random": {"token": "def"},
+            hash_value("ghi"): {"expires": 1}
+        }
+        revoked = Token.get_revoked_tokens()
+        self.assertIn("abc", revoked)
+        self.assertIn("def", revoked)
+        self.assertNotIn("ghi", revoked)
+
+
+@mock.patch('springapi.models.firebase.client.delete_entry')
+class TestTokenDeleteToken(ModelResponseAssertions):
+
+    def tearDown(self):
+        TOKEN_INDEX.invalidate()
+
+    @mock.patch('springapi.models.firebase.client.get_entry')
+    @mock.patch('springapi.models.firebase.client.get_collection')
+    def test_delete_token_deletes_entry_and_drops_from_index(
+            self, mock_get, mock_entry, mock_delete):
+        mock_get.return_value = {"1": {"token": "abc"}}
+        mock_entry.side_effect = EntryNotFound("abc", COLLECTION)
+        expected = mock_delete.return_value = {"success": "yes"}
+        self.assertIn("abc", Token.get_valid_tokens())
+
+        self.assertEqual(Token.delete_token("abc"), expected)
+        mock_delete.assert_called_once_with(COLLECTION, hash_value("abc"))
+        self.assertNotIn("abc", Token.get_valid_tokens())
+
+
+@mock.patch('springapi.models.firebase.client.delete_entries')
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestTokenCompactTokens(ModelResponseAssertions):
+
+    def tearDown(self):
+        REVOKED_INDEX.invalidate()
+
+    def test_compact_tokens_deletes_expired_and_superseded_tokens(
+            self, mock_get, mock_delete):
+        collections = {
+            COLLECTION: {
+                "expired": {"token": "a", "email": "x@y.z", "expires": 100},
+                "old": {"token": "b", "email": "x@y.z", "expires": 300},
+                "new": {"token": "c", "email": "x@y.z", "expires": 400},
+                "other": {"token": "d", "email": "u@v.w", "expires": 250},
+                "legacy": {"token": "e"}
+            },
+            REVOKED_COLLECTION: {
+                "gone": {"token": "f", "expires": 150},
+                "live": {"token": "g", "expires": 250},
+                "forever": {"token": "h", "expires": 0},
+                "legacy": {"token": "i"}
+            }
+        }
+        mock_get.side_effect = lambda c: collections[c]
+
+        result = Token.compact_tokens(now=200, keep_per_email=1)
+        self.assertEqual(
+            result, {"expired": 1, "superseded": 1, "revoked": 1})
+        mock_delete.assert_has_calls([
+            mock.call(REVOKED_COLLECTION, ["gone"]),
+            mock.call(COLLECTION, ["expired", "old"])])
+
+    def test_compact_tokens_does_nothing_if_nothing_to_delete(
+            self, mock_get, mock_delete):
+        mock_get.return_value = {
+            "1": {"token": "a", "email": "x@y.z", "expires": 300}}
+
+        result = Token.compact_tokens(now=200)
+        self.assertEqual(
+            result, {"expired": 0, "superseded": 0, "revoked": 0})
+        self.assertFalse(mock_delete.called)
+
+    def test_compact_tokens_handles_missing_collection(
+            self, mock_get, mock_delete):
+        mock_get.side_effect = CollectionNotFound(COLLECTION)
+
+        result = Token.compact_tokens(now=200)
+        self.assertEqual(
+            result, {"expired": 0, "superseded": 0, "revoked": 0})
+        self.assertFalse(mock_delete.called)
+
+
+@mock.patch('springapi.models.firebase.client.delete_entry')
+@mock.patch('springapi.models.firebase.client.add_entry')
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestTokenMigrateTokenIds(ModelResponseAssertions):
+
+    def test_migrate_token_ids_rekeys_entries_by_token_hash(
+            self, mock_get, mock_add, mock_delete):
+        mock_get.side_effect = [
+            {
+                "random": {"token": "abc"},
+                hash_value("def"): {"token": "def"},
+                "invalid": {"bad_field": "qwerty"}
+            },
+            CollectionNotFound(REVOKED_COLLECTION)
+        ]
+
+        result = Token.migrate_token_ids()
+        self.assertEqual(result, {COLLECTION: 1, REVOKED_COLLECTION: 0})
+        mock_add.assert_called_once_with(
+            COLLECTION, {"id": hash_value("abc"), "token": "abc"})
+        mock_delete.assert_called_once_with(COLLECTION, "random")
+
+    def test_migrate_token_ids_deletes_duplicate_entries(
+            self, mock_get, mock_add, mock_delete):
+        mock_get.side_effect = [
+            {"random": {"token": "abc"}},
+            CollectionNotFound(REVOKED_COLLECTION)
+        ]
+        mock_add.side_effect = EntryAlreadyExists(
+            hash_value("abc"), COLLECTION)
+
+        Token.migrate_token_ids()
+        mock_delete.assert_called_once_with(COLLECTION, "random")
+
+    def test_migrate_token_ids_drops_token_from_revocations(
+            self, mock_get, mock_add, mock_delete):
+        mock_get.side_effect = [
+            CollectionNotFound(COLLECTION),
+            {
+                "random": {"token": "abc", "expires": 5},
+                hash_value("def"): {"token": "def", "expires": 6},
+                hash_value("ghi"): {"expires": 7}
+            }
+        ]
+
+        result = Token.migrate_token_ids()
+        self.assertEqual(result, {COLLECTION: 0, REVOKED_COLLECTION: 2})
+        mock_add.assert_has_calls([
+            mock.call(
+                REVOKED_COLLECTION, {"id": hash_value("abc"), "expires": 5}),
+            mock.call(
+                REVOKED_COLLECTION, {"id": hash_value("def"), "expires": 6})])
+        mock_delete.assert_has_calls([
+            mock.call(REVOKED_COLLECTION, "random"),
+            mock.call(REVOKED_COLLECTION, hash_value("def"))],
+            any_order=True)
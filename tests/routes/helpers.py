@@ -13,7 +13,7 @@ class RouteResponseAssertions(unittest.TestCase):
         request_headers.update(credentials if credentials is not None else {})
         with make_test_client(config) as client:
             call = getattr(client, method)
-            if method in ['post', 'put']:
+            if method in ['post', 'put', 'patch']:
                 r = call(path, data=body, headers=request_headers)
             else:
                 r = call(path, headers=request_headers)
@@ -104,6 +104,12 @@ class RouteResponseAssertions(unittest.TestCase):
             'post', path, '201 CREATED', expected_response, json.dumps(body),
             credentials=credentials)
 
+    def assert_post_raises_multi_status(
+            self, path, body, expected_response=None, credentials=None):
+        return self.assert_expected_code_and_response(
+            'post', path, '207 MULTI STATUS', expected_response,
+            json.dumps(body), credentials=credentials)
+
     def assert_post_raises_invalid_body(
             self, path, expected_response, body, credentials=None):
         return self.assert_expected_code_and_response(
@@ -128,6 +134,12 @@ class RouteResponseAssertions(unittest.TestCase):
             'put', path, '200 OK', expected_response, json.dumps(body),
             credentials=credentials)
 
+    def assert_patch_raises_ok(
+            self, path, body, expected_response=None, credentials=None):
+        return self.assert_expected_code_and_response(
+            'patch', path, '200 OK', expected_response, json.dumps(body),
+            credentials=credentials)
+
     def assert_put_raises_not_found(
             self, path, body, expected_response=None, credentials=None):
         return self.assert_expected_code_and_response(
@@ -1,5 +1,6 @@
 from tests.routes.helpers import make_test_client
 import unittest
+from unittest import mock
 
 
 class TestHealthCheckHandler(unittest.TestCase):
@@ -12,3 +13,15 @@ class TestHealthCheckHandler(unittest.TestCase):
             self.assertEqual(
                 "application/json", response.headers["Content-type"])
             self.assertEqual({"success": True}, json)
+
+    @mock.patch('springapi.models.submission.SUBMISSION_VIEW')
+    def test_healthcheck_reports_submission_view_if_enabled(self, mock_view):
+        mock_view.active = True
+        mock_view.since_last_change.return_value = 12.5
+        with make_test_client({"SUBMISSION_VIEW": "true"}) as client:
+            response = client.get("/api/v1/healthcheck")
+            self.assertEqual({
+                "success": True,
+                "submissionView": {
+                    "active": True, "secondsSinceChange": 12.5}
+            }, response.get_json())
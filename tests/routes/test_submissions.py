@@ -1,6 +1,14 @@
+import json
+from springapi.config_helpers import TOKEN_VERIFICATION
+from springapi.helpers import encode_json_uri
 from springapi.exceptions import \
-    CollectionNotFound, EntryNotFound, EntryAlreadyExists, ValidationError
+    CollectionNotFound, DatabaseUnavailable, EntryNotFound, \
+    EntryAlreadyExists, ValidationError
+from springapi.models.helpers import encode_cursor
+from springapi.models.memory import client as memory_client
 from springapi.models.submission import Submission
+from springapi.utils.authorization import generate_api_token
+from tests.helpers import make_test_client
 from tests.routes.helpers import RouteResponseAssertions
 from unittest import mock
 
@@ -47,7 +55,7 @@ class TestSubmissionsRouteGetAll(RouteResponseAssertions):
         self.assert_get_raises_ok(
             '/api/v1/submissions', {'submissions': expected},
             credentials={"Authorization": "Bearer abc"})
-        mocked.assert_called_with('submissions')
+        mocked.assert_called_with('submissions', filters={}, field_paths=None)
 
     def test_get_all_returns_empty_list(self, mocked, auth):
         auth.return_value = MOCK_TOKENS
@@ -55,7 +63,7 @@ class TestSubmissionsRouteGetAll(RouteResponseAssertions):
         self.assert_get_raises_ok(
             '/api/v1/submissions', {'submissions': []},
             credentials={"Authorization": "Bearer abc"})
-        mocked.assert_called_with('submissions')
+        mocked.assert_called_with('submissions', filters={}, field_paths=None)
 
     def test_get_all_omits_entries_with_required_field_missing(
             self, mocked, auth):
@@ -80,7 +88,7 @@ class TestSubmissionsRouteGetAll(RouteResponseAssertions):
         self.assert_get_raises_ok(
             '/api/v1/submissions', {'submissions': [expected]},
             credentials={"Authorization": "Bearer abc"})
-        mocked.assert_called_with('submissions')
+        mocked.assert_called_with('submissions', filters={}, field_paths=None)
 
     def test_get_all_returns_not_found(self, mocked, auth):
         auth.return_value = MOCK_TOKENS
@@ -89,6 +97,19 @@ class TestSubmissionsRouteGetAll(RouteResponseAssertions):
             '/api/v1/submissions', err.error_response_body(),
             credentials={"Authorization": "Bearer abc"})
 
+    def test_get_all_returns_unavailable_with_retry_after(
+            self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        err = mocked.side_effect = DatabaseUnavailable(
+            "circuit open", retry_after=2.5)
+        with make_test_client() as client:
+            response = client.get(
+                '/api/v1/submissions',
+                headers={"Authorization": "Bearer abc"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "3")
+        self.assertEqual(response.get_json(), err.error_response_body())
+
     def test_get_all_omits_entries_with_invalid_field(self, mocked, auth):
         auth.return_value = MOCK_TOKENS
         mocked.return_value = {
@@ -113,7 +134,393 @@ class TestSubmissionsRouteGetAll(RouteResponseAssertions):
         self.assert_get_raises_ok(
             '/api/v1/submissions', {'submissions': [expected]},
             credentials={"Authorization": "Bearer abc"})
-        mocked.assert_called_with('submissions')
+        mocked.assert_called_with('submissions', filters={}, field_paths=None)
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestSubmissionsRouteGetAllFiltered(RouteResponseAssertions):
+
+    def test_get_all_passes_typed_filters_to_query(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = {
+            "abc": {"name": "a", "message": "b", "location": "Here"}}
+        self.assert_get_raises_ok(
+            '/api/v1/submissions?isApproved=false&location=Here&foo=bar',
+            None, credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_with(
+            'submissions', filters={"isApproved": False, "location": "Here"},
+            field_paths=None)
+
+    def test_get_all_filters_pages(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = {
+            "abc": {"name": "a", "message": "b", "location": "Here"}}
+        self.assert_get_raises_ok(
+            '/api/v1/submissions?limit=5&allowSharing=true', None,
+            credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_with(
+            'submissions', limit=5, start_after=None,
+            filters={"allowSharing": True}, field_paths=None)
+
+    def test_get_all_rejects_invalid_boolean_filter(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        expected = {
+            "error": "validation_failure", "message": "Invalid: isApproved"}
+        self.assert_get_raises_invalid_body(
+            '/api/v1/submissions?isApproved=maybe', expected,
+            credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mocked.called)
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestSubmissionsRouteGetAllProjected(RouteResponseAssertions):
+
+    def test_get_all_returns_only_requested_fields(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = {"abc": {"name": "a", "isApproved": False}}
+        self.assert_get_raises_ok(
+            '/api/v1/submissions?fields=name,isApproved',
+            {"submissions": [
+                {"isApproved": False, "name": "a", "id": "abc"}]},
+            credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_with(
+            'submissions', filters={}, field_paths=["isApproved", "name"])
+
+    def test_get_single_returns_only_requested_fields(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        with mock.patch(
+                'springapi.models.firebase.client.get_entry') as get:
+            get.return_value = {"message": "Hi"}
+            self.assert_get_raises_ok(
+                '/api/v1/submissions/abc?fields=message',
+                {"message": "Hi", "id": "abc"},
+                credentials={"Authorization": "Bearer abc"})
+            get.assert_called_with(
+                'submissions', 'abc', field_paths=["message"])
+
+    def test_get_all_rejects_unknown_field(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        expected = {
+            "error": "validation_failure", "message": "Not allowed: secret"}
+        self.assert_get_raises_invalid_body(
+            '/api/v1/submissions?fields=name,secret', expected,
+            credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mocked.called)
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestSubmissionsRouteConditionalGet(RouteResponseAssertions):
+
+    def setUp(self):
+        self.entries = {
+            "abc": {"name": "a", "message": "b", "location": "c"}}
+
+    def get(self, path, **headers):
+        with make_test_client() as client:
+            return client.get(
+                path, headers={"Authorization": "Bearer abc", **headers})
+
+    def test_get_all_returns_not_modified_given_matching_etag(
+            self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.side_effect = lambda *a, **kw: dict(self.entries)
+        first = self.get('/api/v1/submissions')
+        etag = first.headers["ETag"]
+        self.assertEqual(first.status, '200 OK')
+
+        second = self.get('/api/v1/submissions', **{"If-None-Match": etag})
+        self.assertEqual(second.status, '304 NOT MODIFIED')
+        self.assertEqual(second.get_data(), b"")
+        self.assertEqual(second.headers["ETag"], etag)
+
+    def test_get_all_returns_body_given_stale_etag(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.side_effect = lambda *a, **kw: dict(self.entries)
+        etag = self.get('/api/v1/submissions').headers["ETag"]
+        self.entries["abc"]["isApproved"] = True
+
+        response = self.get('/api/v1/submissions', **{"If-None-Match": etag})
+        self.assertEqual(response.status, '200 OK')
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertTrue(
+            response.get_json()["submissions"][0]["isApproved"])
+
+    def test_get_single_returns_not_modified_given_matching_etag(
+            self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        with mock.patch(
+                'springapi.models.firebase.client.get_entry') as get:
+            get.side_effect = lambda *a, **kw: dict(self.entries["abc"])
+            etag = self.get('/api/v1/submissions/abc').headers["ETag"]
+            response = self.get(
+                '/api/v1/submissions/abc', **{"If-None-Match": etag})
+        self.assertEqual(response.status, '304 NOT MODIFIED')
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.get_collection')
+@mock.patch('springapi.models.submission.Submission.get_view_version')
+class TestSubmissionsRouteConditionalGetFromView(RouteResponseAssertions):
+
+    def setUp(self):
+        self.entries = {
+            "abc": {"name": "a", "message": "b", "location": "c"}}
+
+    def get(self, path, **headers):
+        with make_test_client() as client:
+            return client.get(
+                path, headers={"Authorization": "Bearer abc", **headers})
+
+    def test_get_all_returns_not_modified_without_reading(
+            self, mock_version, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mock_version.return_value = "view:1"
+        mocked.side_effect = lambda *a, **kw: dict(self.entries)
+        etag = self.get('/api/v1/submissions').headers["ETag"]
+        mocked.reset_mock()
+
+        response = self.get('/api/v1/submissions', **{"If-None-Match": etag})
+        self.assertEqual(response.status, '304 NOT MODIFIED')
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertFalse(mocked.called)
+
+    def test_get_all_returns_body_once_version_changes(
+            self, mock_version, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mock_version.return_value = "view:1"
+        mocked.side_effect = lambda *a, **kw: dict(self.entries)
+        etag = self.get('/api/v1/submissions').headers["ETag"]
+        mock_version.return_value = "view:2"
+
+        response = self.get('/api/v1/submissions', **{"If-None-Match": etag})
+        self.assertEqual(response.status, '200 OK')
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_etag_depends_on_query(self, mock_version, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mock_version.return_value = "view:1"
+        mocked.side_effect = lambda *a, **kw: dict(self.entries)
+        etag = self.get('/api/v1/submissions').headers["ETag"]
+
+        response = self.get(
+            '/api/v1/submissions?fields=name', **{"If-None-Match": etag})
+        self.assertEqual(response.status, '200 OK')
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_get_single_returns_not_modified_without_reading(
+            self, mock_version, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mock_version.return_value = "view:1"
+        with mock.patch(
+                'springapi.models.firebase.client.get_entry') as get:
+            get.side_effect = lambda *a, **kw: dict(self.entries["abc"])
+            etag = self.get('/api/v1/submissions/abc').headers["ETag"]
+            get.reset_mock()
+            response = self.get(
+                '/api/v1/submissions/abc', **{"If-None-Match": etag})
+        self.assertEqual(response.status, '304 NOT MODIFIED')
+        self.assertFalse(get.called)
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.get_entries')
+class TestSubmissionsRouteGetAllByIds(RouteResponseAssertions):
+
+    def test_get_all_returns_found_and_missing_ids(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = (
+            {"def": {"name": "d", "message": "e", "location": "f"},
+             "abc": {"name": "a", "message": "b"}},
+            ["ghi"])
+        expected = Submission.from_json({
+            "id": "def", "name": "d", "message": "e", "location": "f"})
+        self.assert_get_raises_ok(
+            '/api/v1/submissions?ids=def,abc,ghi,def',
+            {"submissions": [expected.to_json()], "missing": ["ghi"]},
+            credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_once_with(
+            'submissions', ["def", "abc", "ghi"], field_paths=None)
+
+    def test_get_all_projects_fields_given_ids(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = ({"abc": {"name": "a"}}, [])
+        self.assert_get_raises_ok(
+            '/api/v1/submissions?ids=abc&fields=name',
+            {"submissions": [{"name": "a", "id": "abc"}], "missing": []},
+            credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_once_with(
+            'submissions', ["abc"], field_paths=["name"])
+
+    @mock.patch('springapi.routes.submissions.MAX_PAGE_SIZE', 2)
+    def test_get_all_rejects_invalid_ids(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        expected = {"error": "validation_failure", "message": "Invalid: ids"}
+        for ids in ["", ",", "a,b,c"]:
+            self.assert_get_raises_invalid_body(
+                f'/api/v1/submissions?ids={ids}', expected,
+                credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mocked.called)
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestSubmissionsRouteGetAllPaginated(RouteResponseAssertions):
+
+    def setUp(self):
+        self.entries = {
+            "abc": {"name": "a", "message": "b", "location": "c"},
+            "def": {"name": "d", "message": "e", "location": "f"}
+        }
+
+    def test_get_all_returns_page_and_next_cursor(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = self.entries
+        expected = [
+            Submission.from_json({"id": k, **v}).to_json()
+            for k, v in self.entries.items()]
+        self.assert_get_raises_ok(
+            '/api/v1/submissions?limit=2',
+            {'submissions': expected, 'next_cursor': encode_cursor("def")},
+            credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_with(
+            'submissions', limit=2, start_after=None, filters={},
+            field_paths=None)
+
+    def test_get_all_uses_default_page_size_given_cursor(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = self.entries
+        cursor = encode_cursor("aaa")
+        self.assert_get_raises_ok(
+            f'/api/v1/submissions?cursor={cursor}', None,
+            credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_with(
+            'submissions', limit=100, start_after="aaa", filters={},
+            field_paths=None)
+
+    def test_get_all_rejects_invalid_limit(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        expected = {"error": "validation_failure", "message": "Invalid: limit"}
+        for limit in ["abc", "0", "501"]:
+            self.assert_get_raises_invalid_body(
+                f'/api/v1/submissions?limit={limit}', expected,
+                credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mocked.called)
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.stream_collection')
+class TestSubmissionsRouteGetAllStreaming(RouteResponseAssertions):
+
+    def setUp(self):
+        self.entries = [
+            ("abc", {"name": "a", "message": "b", "location": "c"}),
+            ("def", {"name": "d", "message": "e"}),
+            ("ghi", {"name": "g", "message": "h", "location": "i"})
+        ]
+        self.expected = [
+            Submission.from_json({"id": k, **v}).to_json()
+            for k, v in [self.entries[0], self.entries[2]]]
+
+    def assert_streams_valid_entries(self, path, headers):
+        with make_test_client() as client:
+            r = client.get(path, headers=headers)
+            self.assertEqual(r.status, '200 OK')
+            self.assertEqual(r.mimetype, "application/x-ndjson")
+            self.assertTrue(r.is_streamed)
+            lines = r.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
+
+    def test_get_all_streams_given_stream_param(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = iter(self.entries)
+        self.assert_streams_valid_entries(
+            '/api/v1/submissions?stream=1', {"Authorization": "Bearer abc"})
+        mocked.assert_called_with('submissions', filters={}, field_paths=None)
+
+    def test_get_all_streams_given_accept_header(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = iter(self.entries)
+        self.assert_streams_valid_entries(
+            '/api/v1/submissions', {
+                "Authorization": "Bearer abc",
+                "Accept": "application/x-ndjson"})
+
+    def test_get_all_streams_empty_collection(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = iter([])
+        with make_test_client() as client:
+            r = client.get(
+                '/api/v1/submissions?stream=1',
+                headers={"Authorization": "Bearer abc"})
+            self.assertEqual(r.status, '200 OK')
+            self.assertEqual(r.get_data(as_text=True), "")
+
+    def test_get_all_stream_answers_unavailable_before_streaming(
+            self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.side_effect = DatabaseUnavailable(
+            "circuit open", retry_after=2.5)
+        with make_test_client() as client:
+            r = client.get(
+                '/api/v1/submissions?stream=1',
+                headers={"Authorization": "Bearer abc"})
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(r.headers["Retry-After"], "3")
+        self.assertEqual(r.get_json()["error"], "unavailable")
+
+    def test_get_all_does_not_stream_given_wildcard_accept(
+            self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        with mock.patch(
+                'springapi.models.firebase.client.get_collection') as get:
+            get.return_value = {}
+            self.assert_get_raises_ok(
+                '/api/v1/submissions', {'submissions': []},
+                credentials={
+                    "Authorization": "Bearer abc", "Accept": "*/*"})
+        self.assertFalse(mocked.called)
+
+
+@mock.patch('springapi.models.token.Token.get_revoked_tokens')
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestSubmissionsRouteGetAllJwtVerification(RouteResponseAssertions):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config = {TOKEN_VERIFICATION: "jwt"}
+
+    def test_get_all_accepts_signed_token_without_lookup(
+            self, mocked, auth, revoked):
+        revoked.return_value = []
+        mocked.return_value = {}
+        token = generate_api_token("foo@bar.com", "secretkey")
+        self.assert_expected_code_and_response(
+            'get', '/api/v1/submissions', '200 OK', {'submissions': []},
+            credentials={"Authorization": f"Bearer {token.decode()}"},
+            config=self.config)
+        self.assertFalse(auth.called)
+
+    def test_get_all_rejects_token_signed_with_other_key(
+            self, mocked, auth, revoked):
+        revoked.return_value = []
+        token = generate_api_token("foo@bar.com", "otherkey")
+        self.assert_expected_code_and_response(
+            'get', '/api/v1/submissions', '403 FORBIDDEN', None,
+            credentials={"Authorization": f"Bearer {token.decode()}"},
+            config=self.config)
+        self.assertFalse(mocked.called)
+
+    def test_get_all_rejects_revoked_token(self, mocked, auth, revoked):
+        token = generate_api_token("foo@bar.com", "secretkey").decode()
+        revoked.return_value = [token]
+        self.assert_expected_code_and_response(
+            'get', '/api/v1/submissions', '403 FORBIDDEN', None,
+            credentials={"Authorization": f"Bearer {token}"},
+            config=self.config)
 
 
 @mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
@@ -142,7 +549,7 @@ class TestSubmissionsRouteGetSingle(RouteResponseAssertions):
         self.assert_get_raises_ok(
             f'/api/v1/submissions/{entry_id}', expected.to_json(),
             credentials={"Authorization": "Bearer abc"})
-        mocked.assert_called_with("submissions", entry_id)
+        mocked.assert_called_with("submissions", entry_id, field_paths=None)
 
     def test_get_single_returns_not_found(self, mocked, auth):
         auth.return_value = MOCK_TOKENS
@@ -214,6 +621,94 @@ class TestSubmissionsRouteCreate(RouteResponseAssertions):
             '/api/v1/submissions', err.error_response_body(), invalid_body)
 
 
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.add_entries')
+class TestSubmissionsRouteCreateBatch(RouteResponseAssertions):
+
+    def test_create_batch_requires_admin_authentication(self, mock_add, auth):
+        auth.return_value = MOCK_TOKENS
+        self.assert_requires_admin_authentication(
+            "post", "/api/v1/submissions/batch")
+        self.assertFalse(mock_add.called)
+
+    @mock.patch('springapi.models.submission.create_uid')
+    def test_create_batch_returns_created_if_all_written(
+            self, mock_id, mock_add, auth):
+        auth.return_value = MOCK_TOKENS
+        mock_id.side_effect = ["abc", "def"]
+        body = [
+            {"name": "a", "message": "b", "location": "c"},
+            {"name": "d", "message": "e", "location": "f", "isApproved": True}
+        ]
+        written = [
+            Submission.from_json({**body[0], "id": "abc"}).to_json(),
+            Submission.from_json({**body[1], "id": "def"}).to_json()
+        ]
+        mock_add.return_value = ({"abc": written[0], "def": written[1]}, {})
+        expected = {"results": [
+            {"index": 0, "status": 201, "submission": written[0]},
+            {"index": 1, "status": 201, "submission": written[1]}
+        ]}
+        self.assert_post_raises_created(
+            '/api/v1/submissions/batch', body, expected,
+            credentials={"Authorization": "Bearer abc"})
+        mock_add.assert_called_once_with("submissions", written)
+
+    @mock.patch('springapi.models.submission.create_uid')
+    def test_create_batch_reports_partial_failure(
+            self, mock_id, mock_add, auth):
+        auth.return_value = MOCK_TOKENS
+        mock_id.side_effect = ["abc", "def", "ghi"]
+        body = [
+            {"name": "a", "message": "b", "location": "c"},
+            {"name": "d", "message": "e"},
+            "foobar",
+            {"name": "g", "message": "h", "location": "i"}
+        ]
+        written = Submission.from_json({**body[0], "id": "abc"}).to_json()
+        conflict = EntryAlreadyExists("ghi", "submissions")
+        mock_add.return_value = ({"abc": written}, {"ghi": conflict})
+        expected = {"results": [
+            {"index": 0, "status": 201, "submission": written},
+            {"index": 1, "status": 400, "error": {
+                "error": "validation_failure",
+                "message": "Missing: location"}},
+            {"index": 2, "status": 400, "error": {
+                "error": "validation_failure",
+                "message": "Bad types: 2 is <class 'str'>, "
+                           "should be <class 'dict'>."}},
+            {"index": 3, "status": 409,
+             "error": conflict.error_response_body()}
+        ]}
+        self.assert_post_raises_multi_status(
+            '/api/v1/submissions/batch', body, expected,
+            credentials={"Authorization": "Bearer abc"})
+        written_ids = [d["id"] for d in mock_add.call_args[0][1]]
+        self.assertEqual(written_ids, ["abc", "ghi"])
+
+    def test_create_batch_rejects_body_which_is_not_a_list(
+            self, mock_add, auth):
+        auth.return_value = MOCK_TOKENS
+        expected = {
+            "error": "validation_failure",
+            "message": "Bad types: submissions is <class 'dict'>, "
+                       "should be <class 'list'>."}
+        self.assert_post_raises_invalid_body(
+            '/api/v1/submissions/batch', expected, json.dumps({"a": 1}),
+            credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mock_add.called)
+
+    @mock.patch('springapi.routes.submissions.MAX_BATCH_SIZE', 2)
+    def test_create_batch_rejects_too_many_submissions(self, mock_add, auth):
+        auth.return_value = MOCK_TOKENS
+        expected = {
+            "error": "validation_failure", "message": "Invalid: submissions"}
+        self.assert_post_raises_invalid_body(
+            '/api/v1/submissions/batch', expected, json.dumps([{}] * 3),
+            credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mock_add.called)
+
+
 @mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
 @mock.patch('springapi.models.firebase.client.update_entry')
 class TestSubmissionsRouteUpdate(RouteResponseAssertions):
@@ -248,3 +743,152 @@ class TestSubmissionsRouteUpdate(RouteResponseAssertions):
         self.assert_put_raises_invalid_body(
             f'/api/v1/submissions/{entry_id}', err.error_response_body(),
             invalid_body, credentials={"Authorization": "Bearer abc"})
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.update_entries')
+class TestSubmissionsRouteUpdateBatch(RouteResponseAssertions):
+
+    def test_update_batch_requires_admin_authentication(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        self.assert_requires_admin_authentication(
+            "put", "/api/v1/submissions/batch")
+        self.assertFalse(mocked.called)
+
+    def test_update_batch_reports_updated_and_missing(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        mocked.return_value = (["abc", "def"], ["ghi"])
+        body = {"ids": ["abc", "def", "abc", "ghi"],
+                "patch": {"isApproved": True}}
+        self.assert_put_raises_ok(
+            '/api/v1/submissions/batch', body,
+            {"updated": ["abc", "def"], "missing": ["ghi"]},
+            credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_once_with(
+            "submissions", ["abc", "def", "ghi"], {"isApproved": True})
+
+    def test_update_batch_rejects_invalid_patch(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        bad_patches = [
+            ({"id": "x"}, "Not allowed: id"),
+            ({"isApproved": "yes"},
+             "Bad types: isApproved is <class 'str'>, "
+             "should be <class 'bool'>."),
+            ({}, "Missing: patch")
+        ]
+        for patch, message in bad_patches:
+            self.assert_put_raises_invalid_body(
+                '/api/v1/submissions/batch',
+                {"error": "validation_failure", "message": message},
+                json.dumps({"ids": ["abc"], "patch": patch}),
+                credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mocked.called)
+
+    def test_update_batch_rejects_invalid_ids(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        self.assert_put_raises_invalid_body(
+            '/api/v1/submissions/batch',
+            {"error": "validation_failure",
+             "message": "Bad types: ids is <class 'str'>, "
+                        "should be <class 'list'>."},
+            json.dumps({"ids": "abc", "patch": {"isApproved": True}}),
+            credentials={"Authorization": "Bearer abc"})
+        self.assert_put_raises_invalid_body(
+            '/api/v1/submissions/batch',
+            {"error": "validation_failure", "message": "Missing: ids"},
+            json.dumps({"patch": {"isApproved": True}}),
+            credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mocked.called)
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+@mock.patch('springapi.models.firebase.client.update_entry')
+class TestSubmissionsRoutePatch(RouteResponseAssertions):
+
+    def test_patch_single_requires_admin_authentication(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        self.assert_requires_admin_authentication(
+            "patch", "/api/v1/submissions/abc")
+        self.assertFalse(mocked.called)
+
+    def test_patch_single_sends_only_supplied_fields(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        expected = mocked.return_value = {
+            'success': 'abc updated in submissions'}
+        self.assert_patch_raises_ok(
+            '/api/v1/submissions/abc', {"isApproved": True}, expected,
+            credentials={"Authorization": "Bearer abc"})
+        mocked.assert_called_with(
+            "submissions", {"isApproved": True}, "abc")
+
+    def test_patch_single_returns_not_found(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        err = mocked.side_effect = EntryNotFound('abc', 'submissions')
+        self.assert_expected_code_and_response(
+            'patch', '/api/v1/submissions/abc', '404 NOT FOUND',
+            err.error_response_body(), json.dumps({"message": "Hi"}),
+            credentials={"Authorization": "Bearer abc"})
+
+    def test_patch_single_rejects_invalid_fields(self, mocked, auth):
+        auth.return_value = MOCK_TOKENS
+        bad_bodies = [
+            ({"foo": "x"}, "Not allowed: foo"),
+            ({"name": 1},
+             "Bad types: name is <class 'int'>, should be <class 'str'>."),
+            ({}, "Missing: body")
+        ]
+        for body, message in bad_bodies:
+            self.assert_expected_code_and_response(
+                'patch', '/api/v1/submissions/abc', '400 BAD REQUEST',
+                {"error": "validation_failure", "message": message},
+                json.dumps(body),
+                credentials={"Authorization": "Bearer abc"})
+        self.assertFalse(mocked.called)
+
+
+@mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+class TestSubmissionsRouteMemoryBackend(RouteResponseAssertions):
+
+    def setUp(self):
+        memory_client.clear()
+        self.addCleanup(memory_client.clear)
+        self.addCleanup(memory_client.configure_client)
+
+    def make_client(self, **options):
+        return make_test_client(
+            {"SUBMISSION": encode_json_uri("memory", options)})
+
+    def test_created_submission_is_read_back(self, auth):
+        auth.return_value = MOCK_TOKENS
+        credentials = {"Authorization": "Bearer abc"}
+        body = {"name": "Some Guy", "message": "Hi", "location": "Here"}
+        with self.make_client() as client:
+            created = client.post("/api/v1/submissions", json=body)
+            entry_id = created.get_json()["id"]
+            single = client.get(
+                f"/api/v1/submissions/{entry_id}", headers=credentials)
+            listing = client.get(
+                "/api/v1/submissions?location=Here", headers=credentials)
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(single.get_json()["name"], "Some Guy")
+        self.assertEqual(
+            [s["id"] for s in listing.get_json()["submissions"]], [entry_id])
+
+    def test_injected_errors_are_answered_unavailable(self, auth):
+        auth.return_value = MOCK_TOKENS
+        with self.make_client(error_rate=1) as client:
+            response = client.get(
+                "/api/v1/submissions/abc",
+                headers={"Authorization": "Bearer abc"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()["error"], "unavailable")
+
+    def test_injected_errors_are_answered_unavailable_when_streaming(
+            self, auth):
+        auth.return_value = MOCK_TOKENS
+        with self.make_client(error_rate=1) as client:
+            response = client.get(
+                "/api/v1/submissions?stream=1",
+                headers={"Authorization": "Bearer abc"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()["error"], "unavailable")
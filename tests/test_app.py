@@ -1,8 +1,14 @@
+import os
 import unittest
 
 from flask import Flask
-from springapi.config_helpers import AUTH, TOKEN, create_database_instance
+from springapi.config_helpers import (
+    AUTH, EMAIL, INSTANCE_PATH, KEY, SUBMISSION, SUBMISSION_VIEW, TOKEN,
+    TOKEN_VERIFICATION, create_database_instance)
+from springapi.app import main
 from springapi.helpers import encode_json_uri
+from springapi.models import backends
+from springapi.models.backends import get_backend, reset_backends
 from tests.helpers import make_test_client
 from unittest import mock
 
@@ -39,11 +45,55 @@ class TestSpringapiAppCreation(unittest.TestCase):
                 self.assertEqual(str(context.exception),
                                  f"Unknown authorization protocol: {scheme}")
 
+    def test_springapi_defaults_to_token_lookup_verification(self):
+        with make_test_client() as app:
+            app_env = app.application.config
+
+        self.assertEqual(app_env[TOKEN_VERIFICATION], 'lookup')
+
+    def test_springapi_raises_ValueError_on_unknown_verification_mode(self):
+        with self.assertRaises(ValueError) as context:
+            with make_test_client({TOKEN_VERIFICATION: "foo"}):
+                pass
+
+        self.assertEqual(
+            str(context.exception), "Unknown token verification mode: foo")
+
+    def test_springapi_raises_ValueError_on_view_without_firebase(self):
+        environ = {
+            SUBMISSION: encode_json_uri("memory", {}),
+            SUBMISSION_VIEW: "true"}
+        with self.assertRaises(ValueError) as context:
+            with make_test_client(environ):
+                pass
+
+        self.assertEqual(
+            str(context.exception),
+            "SUBMISSION_VIEW needs a firebase SUBMISSION")
+
+    def test_springapi_reads_emails_from_firebase_by_default(self):
+        with make_test_client():
+            self.assertIs(get_backend(EMAIL), backends.BACKENDS["firebase"])
+
+    def test_springapi_selects_email_backend_if_given(self):
+        with make_test_client({EMAIL: encode_json_uri("memory", {})}) as app:
+            self.assertIn(EMAIL, app.application.config)
+            self.assertIs(get_backend(EMAIL), backends.BACKENDS["memory"])
+
 
 @mock.patch('springapi.config_helpers.authenticate_firebase')
 @mock.patch('springapi.config_helpers.admin.get_app')
 class TestDatabaseCreationFirebase(unittest.TestCase):
 
+    def setUp(self):
+        self.addCleanup(reset_backends)
+
+    def test_create_database_instance_with_firebase_selects_backend(
+            self, mock_app, mock_auth):
+        config = {TOKEN: 'firebase://ImFiY2RlIg=='}
+        create_database_instance(config, TOKEN)
+        self.assertIs(get_backend(TOKEN), backends.BACKENDS["firebase"])
+
     def test_create_database_instance_with_firebase_authenticates(
             self, mock_app, mock_auth):
         mock_app.side_effect = ValueError
@@ -78,6 +128,16 @@ class TestDatabaseCreationFirebase(unittest.TestCase):
 @mock.patch('springapi.config_helpers.db.init_app')
 class TestDatabaseCreationSqlite(unittest.TestCase):
 
+    def setUp(self):
+        self.addCleanup(reset_backends)
+
+    def test_create_database_instance_with_sqlite_selects_backend(
+            self, mock_db):
+        config = {TOKEN: encode_json_uri("sqlite", {})}
+        create_database_instance(config, TOKEN, Flask(__name__))
+        self.assertIs(get_backend(TOKEN), backends.BACKENDS["sqlite"])
+        self.assertIs(get_backend(SUBMISSION), backends.BACKENDS["firebase"])
+
     def test_create_database_instance_with_sqlite_calls_init_app(
             self, mock_db):
         app = Flask(__name__)
@@ -85,3 +145,121 @@ class TestDatabaseCreationSqlite(unittest.TestCase):
         config = {TOKEN: f'{scheme}://ImFiY2RlIg=='}
         create_database_instance(config, TOKEN, app)
         mock_db.assert_called_with(app)
+
+    def test_create_database_instance_with_sqlite_uses_path_if_given(
+            self, mock_db):
+        app = Flask(__name__)
+        path = os.path.join(app.instance_path, "other.sqlite")
+        config = {TOKEN: encode_json_uri("sqlite", {"path": path})}
+        create_database_instance(config, TOKEN, app)
+        self.assertEqual(app.config["SQLITE_DB"], path)
+
+    def test_create_database_instance_with_sqlite_shares_database(
+            self, mock_db):
+        app = Flask(__name__)
+        path = os.path.join(app.instance_path, "other.sqlite")
+        config = {
+            TOKEN: encode_json_uri("sqlite", {"path": path}),
+            SUBMISSION: encode_json_uri("sqlite", {"path": path})}
+        create_database_instance(config, TOKEN, app)
+        create_database_instance(config, SUBMISSION, app)
+        self.assertIs(get_backend(SUBMISSION), backends.BACKENDS["sqlite"])
+        self.assertEqual(app.config["SQLITE_DB"], path)
+
+    def test_create_database_instance_with_sqlite_rejects_other_path(
+            self, mock_db):
+        app = Flask(__name__)
+        config = {
+            TOKEN: encode_json_uri("sqlite", {}),
+            SUBMISSION: encode_json_uri(
+                "sqlite", {"path": os.path.join(app.instance_path, "b")})}
+        create_database_instance(config, TOKEN, app)
+        with self.assertRaises(ValueError) as context:
+            create_database_instance(config, SUBMISSION, app)
+        self.assertEqual(
+            str(context.exception),
+            "SUBMISSION and TOKEN name different SQLite databases")
+        self.assertIs(get_backend(SUBMISSION), backends.BACKENDS["firebase"])
+        self.assertEqual(
+            app.config["SQLITE_DB"],
+            os.path.join(app.instance_path, "springapi.sqlite"))
+
+    def test_create_database_instance_with_sqlite_defaults_to_instance(
+            self, mock_db):
+        app = Flask(__name__)
+        config = {TOKEN: encode_json_uri("sqlite", {})}
+        create_database_instance(config, TOKEN, app)
+        self.assertEqual(
+            app.config["SQLITE_DB"],
+            os.path.join(app.instance_path, "springapi.sqlite"))
+
+    @mock.patch('springapi.config_helpers.db.init_db')
+    def test_create_database_instance_with_sqlite_without_app_inits_db(
+            self, mock_init_db, mock_db):
+        path = os.path.join(INSTANCE_PATH, "other.sqlite")
+        config = {TOKEN: encode_json_uri("sqlite", {"path": path})}
+        create_database_instance(config, TOKEN)
+        mock_init_db.assert_called_with(path)
+        mock_db.assert_not_called()
+        self.assertIs(get_backend(TOKEN), backends.BACKENDS["sqlite"])
+
+    @mock.patch('springapi.config_helpers.db.init_db')
+    def test_create_database_instance_with_sqlite_without_app_defaults(
+            self, mock_init_db, mock_db):
+        config = {TOKEN: encode_json_uri("sqlite", {})}
+        create_database_instance(config, TOKEN)
+        mock_init_db.assert_called_with(
+            os.path.join(INSTANCE_PATH, "springapi.sqlite"))
+        self.assertEqual(
+            INSTANCE_PATH, Flask("springapi.app").instance_path)
+
+
+@mock.patch('springapi.config_helpers.memory_client.configure_client')
+class TestDatabaseCreationMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(reset_backends)
+
+    def test_create_database_instance_with_memory_configures_injection(
+            self, mock_configure):
+        config = {SUBMISSION: encode_json_uri(
+            "memory", {"latency": 0.02, "error_rate": 0.1})}
+        create_database_instance(config, SUBMISSION)
+        mock_configure.assert_called_with(
+            latency=0.02, latency_sigma=0.0, error_rate=0.1, seed=None)
+        self.assertIs(get_backend(SUBMISSION), backends.BACKENDS["memory"])
+
+    def test_create_database_instance_with_memory_accepts_no_options(
+            self, mock_configure):
+        config = {SUBMISSION: encode_json_uri("memory", None)}
+        create_database_instance(config, SUBMISSION)
+        mock_configure.assert_called_with(
+            latency=0.0, latency_sigma=0.0, error_rate=0.0, seed=None)
+
+
+@mock.patch('springapi.app.Flask.run')
+@mock.patch('springapi.app.create_database_instance')
+class TestSpringapiMain(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(reset_backends)
+        self.environ = {
+            AUTH: encode_json_uri("google", {"web": {"client_id": "abc"}}),
+            KEY: "secretkey",
+            TOKEN: encode_json_uri("memory", {})}
+
+    def _submission_calls(self, mock_create):
+        return [c for c in mock_create.call_args_list if c[0][1] == SUBMISSION]
+
+    def test_main_sets_up_firebase_submissions(self, mock_create, mock_run):
+        self.environ[SUBMISSION] = encode_json_uri("firebase", {})
+        main(self.environ)
+        self.assertEqual(len(self._submission_calls(mock_create)), 1)
+        mock_run.assert_called_once()
+
+    def test_main_leaves_other_submissions_to_create_app(
+            self, mock_create, mock_run):
+        self.environ[SUBMISSION] = encode_json_uri("memory", {})
+        main(self.environ)
+        self.assertEqual(len(self._submission_calls(mock_create)), 1)
+        mock_run.assert_called_once()
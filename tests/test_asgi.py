@@ -0,0 +1,197 @@
+import asyncio
+import contextlib
+import json
+import unittest
+
+from springapi.asgi import create_asgi_app
+from springapi.exceptions import EntryNotFound
+from tests.helpers import make_test_client
+from unittest import mock
+
+
+MOCK_TOKENS = ["abc"]
+
+
+def _call(app, method, path, query=b"", headers=None, body=b""):
+    scope = {
+        "type": "http", "method": method, "path": path,
+        "query_string": query, "http_version": "1.1",
+        "headers": [
+            (k.lower().encode(), v.encode())
+            for k, v in (headers or {}).items()]}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    response_headers = {
+        k.decode(): v.decode() for k, v in start["headers"]}
+    data = b"".join(m.get("body", b"") for m in sent[1:])
+    return start["status"], response_headers, data
+
+
+def _collection(entries, calls):
+    async def get_collection(collection, **kwargs):
+        calls.append(kwargs)
+        return {k: dict(v) for k, v in entries.items()}
+    return get_collection
+
+
+def _entry(entries):
+    async def get_entry(collection, entry_id, field_paths=None):
+        if entry_id not in entries:
+            raise EntryNotFound(entry_id, collection)
+        return dict(entries[entry_id])
+    return get_entry
+
+
+class AsgiTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.entries = {
+            "abc": {"name": "a", "message": "b", "location": "c"}}
+        self.calls = []
+        stack = contextlib.ExitStack()
+        self.addCleanup(stack.close)
+        client = stack.enter_context(make_test_client())
+        self.app = create_asgi_app(client.application)
+        for target, new in [
+                ('springapi.models.firebase.aio_client.get_collection',
+                 _collection(self.entries, self.calls)),
+                ('springapi.models.firebase.aio_client.get_entry',
+                 _entry(self.entries))]:
+            patcher = mock.patch(target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('springapi.routes.helpers.get_valid_admin_tokens')
+        patcher.start().return_value = MOCK_TOKENS
+        self.addCleanup(patcher.stop)
+
+    def get(self, path, query=b"", **headers):
+        return _call(
+            self.app, "GET", path, query,
+            {"Authorization": "Bearer abc", **headers})
+
+
+@mock.patch('springapi.models.firebase.client.get_collection')
+class TestAsgiReads(AsgiTestCase):
+
+    def test_get_all_reads_with_async_client(self, mock_sync):
+        status, headers, data = self.get(
+            "/api/v1/submissions", b"isApproved=false")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "application/json")
+        self.assertEqual(json.loads(data)["submissions"][0]["id"], "abc")
+        self.assertEqual(self.calls[0]["filters"], {"isApproved": False})
+        self.assertFalse(mock_sync.called)
+
+    def test_get_all_returns_not_modified_given_matching_etag(
+            self, mock_sync):
+        _, headers, _ = self.get("/api/v1/submissions")
+
+        status, _, data = self.get(
+            "/api/v1/submissions", **{"If-None-Match": headers["etag"]})
+        self.assertEqual(status, 304)
+        self.assertEqual(data, b"")
+
+    @mock.patch('springapi.models.submission.Submission.get_view_version')
+    def test_get_all_answers_view_etag_without_reading(
+            self, mock_version, mock_sync):
+        mock_version.return_value = "view:1"
+        _, headers, _ = self.get("/api/v1/submissions")
+        del self.calls[:]
+
+        status, _, _ = self.get(
+            "/api/v1/submissions", **{"If-None-Match": headers["etag"]})
+        self.assertEqual(status, 304)
+        self.assertEqual(self.calls, [])
+
+    def test_get_all_requires_authorization(self, mock_sync):
+        status, _, data = _call(self.app, "GET", "/api/v1/submissions")
+
+        self.assertEqual(status, 401)
+        self.assertEqual(json.loads(data), {
+            "error": "unauthorized",
+            "message": "Request requires Authorization header"})
+        self.assertEqual(self.calls, [])
+
+    def test_get_all_rejects_unknown_token(self, mock_sync):
+        status, _, _ = self.get(
+            "/api/v1/submissions", Authorization="Bearer unknown")
+        self.assertEqual(status, 403)
+
+    def test_get_single_reads_with_async_client(self, mock_sync):
+        status, _, data = self.get("/api/v1/submissions/abc")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(data)["name"], "a")
+
+    def test_get_single_returns_not_found(self, mock_sync):
+        status, _, data = self.get("/api/v1/submissions/def")
+
+        self.assertEqual(status, 404)
+        self.assertEqual(json.loads(data)["error"], "not_found")
+
+    def test_healthcheck_is_served(self, mock_sync):
+        status, _, data = _call(self.app, "GET", "/api/v1/healthcheck")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(data), {"success": True})
+
+
+class TestAsgiFlaskFallback(AsgiTestCase):
+
+    @mock.patch('springapi.models.firebase.client.get_collection')
+    def test_paged_reads_are_served_by_flask(self, mock_sync):
+        mock_sync.return_value = dict(self.entries)
+        status, _, data = self.get("/api/v1/submissions", b"limit=1")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(data)["next_cursor"], mock.ANY)
+        self.assertTrue(mock_sync.called)
+        self.assertEqual(self.calls, [])
+
+    @mock.patch('springapi.models.firebase.client.stream_collection')
+    def test_streamed_reads_are_served_by_flask(self, mock_stream):
+        mock_stream.side_effect = lambda *a, **kw: iter(
+            [(k, dict(v)) for k, v in self.entries.items()])
+        status, headers, data = self.get(
+            "/api/v1/submissions", Accept="application/x-ndjson")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "application/x-ndjson")
+        self.assertEqual(json.loads(data)["id"], "abc")
+
+    @mock.patch('springapi.models.firebase.client.add_entry')
+    def test_writes_are_served_by_flask(self, mock_add):
+        mock_add.side_effect = lambda collection, data: {data["id"]: data}
+        body = {"name": "a", "message": "b", "location": "c"}
+        status, _, data = _call(
+            self.app, "POST", "/api/v1/submissions",
+            headers={"Content-Type": "application/json"},
+            body=json.dumps(body).encode())
+
+        self.assertEqual(status, 201)
+        self.assertEqual(json.loads(data)["name"], "a")
+
+    def test_lifespan_completes(self):
+        messages = [
+            {"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(self.app({"type": "lifespan"}, receive, send))
+        self.assertEqual(
+            sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
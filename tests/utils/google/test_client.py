@@ -1,10 +1,16 @@
 import json
+import jwt
 import requests
+import time
 import unittest
 
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
 from springapi.utils.google.client import (
-    create_auth_request_uri, get_oauth_token, get_authenticated_user_email,
-    AuthProviderResponseError)
+    create_auth_request_uri, get_oauth_token, get_oauth_token_data,
+    get_authenticated_user_email, verify_id_token, AuthProviderResponseError,
+    KeySetCache)
 from unittest import mock
 
 
@@ -28,9 +34,10 @@ class TestGoogleAuthorization(unittest.TestCase):
         params = [s.split("=")[0] for s in param_str.split("&")]
         self.assertEqual(url, expected_url)
         self.assertListEqual(params, expected_params)
+        self.assertIn("openid", param_str)
 
 
-@mock.patch.object(requests, "post")
+@mock.patch('springapi.utils.http.post')
 class TestGoogleToken(unittest.TestCase):
 
     def test_exchange_auth_token_returns_token(self, mock_post):
@@ -40,6 +47,14 @@ class TestGoogleToken(unittest.TestCase):
             {"code": "1234"}, GOOGLE_CREDENTIALS, "https://example.com")
         self.assertEqual(response, json.loads(expected)["access_token"])
 
+    def test_get_oauth_token_data_returns_full_response(self, mock_post):
+        mock_post.return_value.content = \
+            b'{"access_token": "12345", "id_token": "abc"}'
+        response = get_oauth_token_data(
+            {"code": "1234"}, GOOGLE_CREDENTIALS, "https://example.com")
+        self.assertEqual(
+            response, {"access_token": "12345", "id_token": "abc"})
+
     def test_exchange_auth_token_raises_AuthProviderResponseError(
             self, mock_post):
         mock_post.return_value.content = b'{"error": "bad response"}'
@@ -52,8 +67,17 @@ class TestGoogleToken(unittest.TestCase):
             str(context.exception),
             f"Error retrieving token from {token_url}")
 
+    def test_exchange_auth_token_raises_AuthProviderResponseError_on_timeout(
+            self, mock_post):
+        mock_post.side_effect = requests.Timeout()
+        token_url = "https://someoauthprovider.com"
+        with self.assertRaises(AuthProviderResponseError):
+            get_oauth_token(
+                {"code": "1234"}, GOOGLE_CREDENTIALS, "https://example.com",
+                token_url)
+
 
-@mock.patch.object(requests, "get")
+@mock.patch('springapi.utils.http.get')
 class TestGetAuthenticatedUser(unittest.TestCase):
 
     def test_get_authenticated_user_email_returns_user_info(self, mock_get):
@@ -71,3 +95,129 @@ class TestGetAuthenticatedUser(unittest.TestCase):
         self.assertEqual(
             str(context.exception),
             f"Error retrieving user info from {user_url}")
+
+    def test_get_authenticated_user_email_raises_on_connection_error(
+            self, mock_get):
+        mock_get.side_effect = requests.ConnectionError()
+        with self.assertRaises(AuthProviderResponseError):
+            get_authenticated_user_email("abc123")
+
+
+def _create_signing_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+SIGNING_KEY = _create_signing_key()
+
+
+def _create_key_set_response(key_id, key=SIGNING_KEY, max_age=None):
+    jwk = json.loads(RSAAlgorithm.to_jwk(key.public_key()))
+    jwk["kid"] = key_id
+    response = mock.Mock()
+    response.content = json.dumps({"keys": [jwk]}).encode("utf8")
+    response.headers = \
+        {"Cache-Control": f"public, max-age={max_age}"} if max_age else {}
+    return response
+
+
+def _create_id_token(key_id="key1", key=SIGNING_KEY, **claims):
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": "abc",
+        "email": "foo@bar.com",
+        "email_verified": True,
+        "iat": int(time.time()),
+        "exp": int(time.time()) + 3600
+    }
+    payload.update(claims)
+    return jwt.encode(
+        payload, key, algorithm="RS256", headers={"kid": key_id}).decode()
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@mock.patch('springapi.utils.http.get')
+class TestKeySetCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.key_set = KeySetCache("https://example.com", clock=self.clock)
+
+    def test_get_key_fetches_once_until_expiry(self, mock_get):
+        mock_get.return_value = _create_key_set_response("key1", max_age=100)
+        self.key_set.get_key("key1")
+        self.clock.now = 99
+        self.key_set.get_key("key1")
+        self.assertEqual(mock_get.call_count, 1)
+
+        self.clock.now = 100
+        self.key_set.get_key("key1")
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_get_key_refetches_unknown_key_at_most_once_a_minute(
+            self, mock_get):
+        mock_get.return_value = _create_key_set_response("key1")
+        self.key_set.get_key("key1")
+        with self.assertRaises(AuthProviderResponseError):
+            self.key_set.get_key("key2")
+        self.assertEqual(mock_get.call_count, 1)
+
+        self.clock.now = 60
+        mock_get.return_value = _create_key_set_response("key2")
+        self.key_set.get_key("key2")
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_get_key_raises_AuthProviderResponseError_on_bad_response(
+            self, mock_get):
+        mock_get.return_value.content = b'{"bad_field": "error"}'
+        with self.assertRaises(AuthProviderResponseError):
+            self.key_set.get_key("key1")
+
+
+@mock.patch('springapi.utils.http.get')
+class TestVerifyIdToken(unittest.TestCase):
+
+    def setUp(self):
+        self.key_set = KeySetCache("https://example.com")
+
+    def test_verify_id_token_returns_email(self, mock_get):
+        mock_get.return_value = _create_key_set_response("key1")
+        email = verify_id_token(_create_id_token(), "abc", self.key_set)
+        self.assertEqual(email, "foo@bar.com")
+
+    def test_verify_id_token_rejects_wrong_audience(self, mock_get):
+        mock_get.return_value = _create_key_set_response("key1")
+        with self.assertRaises(AuthProviderResponseError):
+            verify_id_token(_create_id_token(), "def", self.key_set)
+
+    def test_verify_id_token_rejects_wrong_issuer(self, mock_get):
+        mock_get.return_value = _create_key_set_response("key1")
+        id_token = _create_id_token(iss="https://example.com")
+        with self.assertRaises(AuthProviderResponseError):
+            verify_id_token(id_token, "abc", self.key_set)
+
+    def test_verify_id_token_rejects_unverified_email(self, mock_get):
+        mock_get.return_value = _create_key_set_response("key1")
+        id_token = _create_id_token(email_verified=False)
+        with self.assertRaises(AuthProviderResponseError):
+            verify_id_token(id_token, "abc", self.key_set)
+
+    def test_verify_id_token_rejects_expired_token(self, mock_get):
+        mock_get.return_value = _create_key_set_response("key1")
+        id_token = _create_id_token(exp=int(time.time()) - 10)
+        with self.assertRaises(AuthProviderResponseError):
+            verify_id_token(id_token, "abc", self.key_set)
+
+    def test_verify_id_token_rejects_token_signed_with_other_key(
+            self, mock_get):
+        mock_get.return_value = _create_key_set_response("key1")
+        id_token = _create_id_token(key=_create_signing_key())
+        with self.assertRaises(AuthProviderResponseError):
+            verify_id_token(id_token, "abc", self.key_set)
@@ -1,8 +1,18 @@
+import jwt
 import unittest
 from springapi.utils.authorization import (
     create_api_token, exchange_oauth_token, generate_api_token,
-    get_auth_code_uri)
-from springapi.exceptions import AuthorizationError, AuthProviderResponseError
+    get_auth_code_uri, revoke_api_token, verify_api_token)
+from springapi.exceptions import (
+    AuthorizationError, AuthProviderResponseError, InvalidAuthorization,
+    ValidationError)
+from springapi.config_helpers import (
+    KEY, TOKEN, TOKEN_VERIFICATION, TOKEN_VERIFICATION_JWT)
+from springapi.models.backends import reset_backends, use_backend
+from springapi.models.memory import client as memory_client
+from springapi.models.token import (
+    REVOKED_COLLECTION, REVOKED_INDEX, TOKEN_INDEX, Token)
+from springapi.routes.helpers import is_valid_admin_token
 from unittest import mock
 
 
@@ -16,7 +26,7 @@ class TestGetAuthorizationCode(unittest.TestCase):
         self.assertEqual(response, expected)
 
 
-@mock.patch('springapi.utils.authorization.get_oauth_token')
+@mock.patch('springapi.utils.authorization.get_oauth_token_data')
 class TestExchangeOAuthToken(unittest.TestCase):
 
     @mock.patch('springapi.models.email.Email.get_authorized_emails')
@@ -25,11 +35,45 @@ class TestExchangeOAuthToken(unittest.TestCase):
             self, mock_user, mock_email, mock_oauth):
         oauth_args = b"abc", {"foo": "bar"}, "http://example.com"
         email = "foo@bar.com"
+        mock_oauth.return_value = {"access_token": "abc123"}
         mock_user.return_value = email
         mock_email.return_value = [email]
         response = exchange_oauth_token(*oauth_args)
 
         mock_oauth.assert_called_with(*oauth_args)
+        mock_user.assert_called_with("abc123")
+        self.assertEqual(response, email)
+
+    @mock.patch('springapi.models.email.Email.get_authorized_emails')
+    @mock.patch('springapi.utils.authorization.get_authenticated_user_email')
+    @mock.patch('springapi.utils.authorization.verify_id_token')
+    def test_exchange_oauth_token_uses_verified_id_token(
+            self, mock_verify, mock_user, mock_email, mock_oauth):
+        email = mock_verify.return_value = "foo@bar.com"
+        mock_oauth.return_value = {
+            "access_token": "abc123", "id_token": "def456"}
+        mock_email.return_value = [email]
+        response = exchange_oauth_token(
+            b"abc", {"web": {"client_id": "123"}}, "http://example.com")
+
+        mock_verify.assert_called_with("def456", "123")
+        self.assertFalse(mock_user.called)
+        self.assertEqual(response, email)
+
+    @mock.patch('springapi.models.email.Email.get_authorized_emails')
+    @mock.patch('springapi.utils.authorization.get_authenticated_user_email')
+    @mock.patch('springapi.utils.authorization.verify_id_token')
+    def test_exchange_oauth_token_falls_back_to_userinfo(
+            self, mock_verify, mock_user, mock_email, mock_oauth):
+        mock_verify.side_effect = AuthProviderResponseError("bad id token")
+        email = mock_user.return_value = "foo@bar.com"
+        mock_oauth.return_value = {
+            "access_token": "abc123", "id_token": "def456"}
+        mock_email.return_value = [email]
+        response = exchange_oauth_token(
+            b"abc", {"web": {"client_id": "123"}}, "http://example.com")
+
+        mock_user.assert_called_with("abc123")
         self.assertEqual(response, email)
 
     @mock.patch('springapi.models.email.Email.get_authorized_emails')
@@ -38,7 +82,7 @@ class TestExchangeOAuthToken(unittest.TestCase):
             self, mock_user, mock_email, mock_oauth):
         user_email = mock_user.return_value = "foo@bar.com"
         mock_email.return_value = ["bar@foo.com"]
-        mock_oauth.return_value = "abc123"
+        mock_oauth.return_value = {"access_token": "abc123"}
 
         with self.assertRaises(AuthorizationError) as context:
             exchange_oauth_token(b"abc", {"foo": "bar"}, "http://example.com")
@@ -66,6 +110,110 @@ class TestGenerateApiToken(unittest.TestCase):
         self.assertEqual(expected, token)
 
 
+@mock.patch('springapi.models.token.Token.get_revoked_tokens')
+class TestVerifyApiToken(unittest.TestCase):
+
+    def test_verify_api_token_returns_payload(self, mock_revoked):
+        mock_revoked.return_value = []
+        token = generate_api_token("foo@bar.com", "keysecret")
+        payload = verify_api_token(token, "keysecret")
+
+        self.assertEqual(payload["email"], "foo@bar.com")
+        self.assertEqual(payload["iss"], "springapi")
+        self.assertEqual(payload["exp"] - payload["iat"], 60 * 60 * 24)
+
+    def test_verify_api_token_rejects_bad_signature(self, mock_revoked):
+        mock_revoked.return_value = []
+        token = generate_api_token("foo@bar.com", "keysecret")
+
+        with self.assertRaises(InvalidAuthorization):
+            verify_api_token(token, "otherkey")
+
+    def test_verify_api_token_rejects_expired_token(self, mock_revoked):
+        mock_revoked.return_value = []
+        token = generate_api_token("foo@bar.com", "keysecret", lifetime=-1)
+
+        with self.assertRaises(InvalidAuthorization):
+            verify_api_token(token, "keysecret")
+
+    def test_verify_api_token_rejects_missing_claims(self, mock_revoked):
+        mock_revoked.return_value = []
+        token = jwt.encode(
+            {"email": "foo@bar.com", "iss": "springapi"}, "keysecret",
+            algorithm="HS256")
+
+        with self.assertRaises(InvalidAuthorization):
+            verify_api_token(token, "keysecret")
+
+    def test_verify_api_token_rejects_wrong_issuer(self, mock_revoked):
+        mock_revoked.return_value = []
+        token = jwt.encode(
+            {"email": "foo@bar.com", "iss": "other", "iat": 0,
+             "exp": 2 ** 40}, "keysecret", algorithm="HS256")
+
+        with self.assertRaises(InvalidAuthorization):
+            verify_api_token(token, "keysecret")
+
+    def test_verify_api_token_rejects_revoked_token(self, mock_revoked):
+        token = generate_api_token("foo@bar.com", "keysecret")
+        mock_revoked.return_value = [token]
+
+        with self.assertRaises(InvalidAuthorization):
+            verify_api_token(token, "keysecret")
+
+
+@mock.patch('springapi.models.token.Token.revoke_token')
+class TestRevokeApiToken(unittest.TestCase):
+
+    def test_revoke_api_token_revokes_until_expiry(self, mock_revoke):
+        token = generate_api_token("foo@bar.com", "keysecret", lifetime=-1)
+        expires = jwt.decode(
+            token, options={"verify_signature": False, "verify_exp": False}
+        )["exp"]
+
+        self.assertEqual(revoke_api_token(token), mock_revoke.return_value)
+        mock_revoke.assert_called_once_with(token, expires=expires)
+
+    def test_revoke_api_token_rejects_malformed_token(self, mock_revoke):
+        with self.assertRaises(ValidationError):
+            revoke_api_token("not-a-token")
+        self.assertFalse(mock_revoke.called)
+
+    def test_revoke_api_token_requires_expiry(self, mock_revoke):
+        token = jwt.encode({"email": "foo@bar.com"}, "keysecret")
+
+        with self.assertRaises(ValidationError):
+            revoke_api_token(token)
+        self.assertFalse(mock_revoke.called)
+
+
+class TestRevokeApiTokenMemoryBackend(unittest.TestCase):
+
+    def setUp(self):
+        memory_client.clear()
+        use_backend(TOKEN, "memory")
+        self.addCleanup(memory_client.clear)
+        self.addCleanup(reset_backends)
+        for index in (TOKEN_INDEX, REVOKED_INDEX):
+            index.invalidate()
+            self.addCleanup(index.invalidate)
+
+    def test_revoked_token_is_rejected_in_both_modes(self):
+        token = generate_api_token("foo@bar.com", "k").decode()
+        Token.create_token(
+            {"token": token, "email": "foo@bar.com", "expires": 2 ** 40})
+        lookup, jwt_mode = {KEY: "k"}, {
+            KEY: "k", TOKEN_VERIFICATION: TOKEN_VERIFICATION_JWT}
+        self.assertTrue(is_valid_admin_token(lookup, token))
+        self.assertTrue(is_valid_admin_token(jwt_mode, token))
+
+        revoke_api_token(token)
+        self.assertFalse(is_valid_admin_token(lookup, token))
+        self.assertFalse(is_valid_admin_token(jwt_mode, token))
+        stored = memory_client.get_collection(REVOKED_COLLECTION)
+        self.assertNotIn(token, str(stored))
+
+
 @mock.patch('springapi.models.token.Token.create_token')
 @mock.patch('springapi.utils.authorization.generate_api_token')
 @mock.patch('springapi.utils.authorization.exchange_oauth_token')
@@ -85,6 +233,22 @@ class TestCreateApiToken(unittest.TestCase):
 
         self.assertEqual(expected, response)
 
+    @mock.patch('springapi.utils.authorization.time.time')
+    def test_create_api_token_stores_email_and_expiry(
+            self, mock_time, mock_exch, mock_gen, mock_create):
+        mock_time.return_value = 1000.5
+        mock_exch.return_value = "foo@bar.com"
+        mock_gen.return_value = b"qwerty"
+        create_api_token(*self.args)
+
+        mock_gen.assert_called_with(
+            "foo@bar.com", "secretkey", issued_at=1000)
+        mock_create.assert_called_with({
+            "email": "foo@bar.com",
+            "expires": 1000 + 60 * 60 * 24,
+            "token": "qwerty"
+        })
+
     def test_create_api_token_raises_error_if_exch_oauth_token_fails(
             self, mock_exch, mock_gen, mock_create):
         err = "OAuth failed somehow"
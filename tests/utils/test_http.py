@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+from springapi.utils import http
+
+
+class TestHttpSession(unittest.TestCase):
+
+    def tearDown(self):
+        http.configure_session()
+
+    def test_get_session_returns_shared_session(self):
+        self.assertIs(http.get_session(), http.get_session())
+
+    def test_configure_session_sets_pool_size_and_retries(self):
+        http.configure_session(pool_size=4, retries=2)
+        adapter = http.get_session().get_adapter("https://example.com")
+
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        self.assertIn("POST", adapter.max_retries.allowed_methods)
+
+    def test_configure_session_replaces_session(self):
+        session = http.get_session()
+        http.configure_session()
+        self.assertIsNot(session, http.get_session())
+
+    @mock.patch('requests.Session.get')
+    def test_get_applies_default_timeout(self, mock_get):
+        http.configure_session(timeout=2.5)
+        http.get("https://example.com")
+        mock_get.assert_called_with("https://example.com", timeout=2.5)
+
+    @mock.patch('requests.Session.post')
+    def test_post_keeps_explicit_timeout(self, mock_post):
+        http.post("https://example.com", data={"a": "b"}, timeout=1)
+        mock_post.assert_called_with(
+            "https://example.com", data={"a": "b"}, timeout=1)